@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Module implementing AsyncP2PSession, an asyncio based version of P2PSession.
+
+AsyncP2PSession provides the same methods as P2PSession, but all of them are
+coroutines. Thus all platforms which use a session can be evaluated on one
+event loop instead of needing one thread per platform. Especially waiting for
+the generation of account statements does not block a thread anymore.
+Retrying, polling and saving downloads are shared with P2PSession via
+BaseSession, only the input/output is asynchronous.
+
+AsyncP2PSession is based on httpx, which is an optional dependency of
+easyp2p. HTTP/2 is used if requested and the h2 package is installed.
+
+"""
+
+import asyncio
+import importlib.util
+from typing import (
+    Awaitable, Callable, Dict, Mapping, Optional, Sequence, Tuple, Union)
+
+import httpx
+
+from easyp2p.p2p_cookies import CookieStore
+from easyp2p.p2p_credentials import get_credentials
+from easyp2p.p2p_session import (
+    BaseSession, PollPolicy, RetryPolicy, url_from_partial_link,
+    value_from_script, value_from_tag, values_from_tag_by_name)
+from easyp2p.p2p_signals import Signals
+
+
+class AsyncP2PSession(BaseSession):
+    """
+    Asynchronous representation of a P2P session.
+
+    The methods and their arguments are identical to P2PSession, but must be
+    awaited.
+
+    """
+
+    # Signals for communicating with the GUI
+    signals = Signals()
+
+    def __init__(
+            self, name: str, logout_url: str,
+            signals: Optional[Signals], json: bool = False,
+            retry_policy: Optional[RetryPolicy] = None,
+            timeout: Optional[Tuple[float, float]] = None,
+            pool_maxsize: Optional[int] = None,
+            cookie_store: Optional[CookieStore] = None,
+            http2: bool = False,
+            poll_policy: Optional[PollPolicy] = None) -> None:
+        """
+        Constructor of AsyncP2PSession class.
+
+        Args:
+            name: Name of the P2P platform.
+            logout_url: URL of the logout page.
+            signals: Signals instance for communicating with the calling class.
+            json: If True post data in requests in JSON format.
+            retry_policy: Policy for retrying failed requests. If None, the
+                default RetryPolicy is used.
+            timeout: Tuple (connect timeout, read timeout) in seconds for all
+                requests. If None, TIMEOUT is used.
+            pool_maxsize: Number of connections per host which are kept
+                alive. If None, POOL_MAXSIZE is used.
+            cookie_store: Store for persisting the session cookies between
+                runs. If None, the session always ends with a logout.
+            http2: If True use HTTP/2 if the server supports it.
+            poll_policy: Policy for waiting until the account statement is
+                generated. If None, the default PollPolicy is used.
+
+        """
+        super().__init__(
+            name, logout_url, signals, json=json, retry_policy=retry_policy,
+            timeout=timeout, pool_maxsize=pool_maxsize,
+            cookie_store=cookie_store, poll_policy=poll_policy)
+        self.http2 = http2
+        self.sess: Optional[httpx.AsyncClient] = None
+
+    @signals.watch_errors
+    async def __aenter__(self) -> 'AsyncP2PSession':
+        """
+        Start of asynchronous context management protocol.
+
+        Returns:
+            Instance of AsyncP2PSession class.
+
+        """
+        http2 = self.http2 and importlib.util.find_spec('h2') is not None
+        if self.http2 and not http2:
+            self.logger.warning(
+                '%s: h2 is not installed, falling back to HTTP/1.1.',
+                self.name)
+        self.sess = httpx.AsyncClient(
+            http2=http2, follow_redirects=True,
+            timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+            limits=httpx.Limits(max_keepalive_connections=self.pool_maxsize))
+        self.logger.debug('%s: created context manager.', self.name)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        End of asynchronous context management protocol.
+
+        Logs out of the P2P platform or saves the session cookies exactly like
+        P2PSession.__exit__ and closes all connections afterwards. Finally the
+        signals are disconnected from the calling class.
+
+        """
+        try:
+            await self._close(exc_type)
+        finally:
+            self.signals.disconnect_signals()
+
+    @signals.watch_errors
+    async def _close(self, exc_type) -> None:
+        """
+        Log out or save the session cookies and close all connections.
+
+        Args:
+            exc_type: Type of the exception which ended the context or None.
+
+        Raises:
+            RuntimeWarning: If logout is not successful.
+
+        """
+        try:
+            if self._keep_session(exc_type, self.sess.cookies.jar):
+                return
+            if self.logged_in:
+                try:
+                    resp = await self.sess.get(self.logout_url)
+                except httpx.HTTPError:
+                    self.logger.exception('%s: logout failed.', self.name)
+                    resp = None
+                self._check_logout(resp)
+        finally:
+            await self.sess.aclose()
+
+    @signals.watch_errors
+    async def restore_session(self, probe_url: Optional[str]) -> bool:
+        """
+        Try to continue the session of a previous run.
+
+        See P2PSession.restore_session for details.
+
+        Args:
+            probe_url: URL which can only be accessed by logged in users. If
+                None, sessions cannot be restored.
+
+        Returns:
+            True if the session was restored, False if a login is needed.
+
+        """
+        cookies = self._load_cookies(probe_url)
+        if cookies is None:
+            return False
+
+        self.sess.cookies.update(cookies)
+        try:
+            resp = await self.sess.get(probe_url, follow_redirects=False)
+            valid = resp.status_code == 200
+        except httpx.HTTPError:
+            valid = False
+        return self._finish_restore(valid)
+
+    async def get_credentials(self) -> Tuple[str, str]:
+        """
+        Get the credentials from the keyring or ask the user for them.
+
+        Asking the user blocks, thus it runs in the default executor.
+
+        Returns:
+            Tuple (username, password).
+
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, get_credentials, self.name, self.signals)
+
+    @signals.update_progress
+    async def log_into_page(
+            self, url: str, name_field: str, password_field: str,
+            data: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        Log into the P2P platform.
+
+        Args:
+            url: Request URL of the login page.
+            name_field: Request field name of the username.
+            password_field: Request field name of the password.
+            data: Payload for login request.
+
+        Raises:
+            RuntimeError: If login page returns an error.
+
+        """
+        self.logger.debug('%s: logging into website.', self.name)
+        data = self._login_data(
+            await self.get_credentials(), name_field, password_field, data)
+        resp = await self.request(url, 'post', self._login_error_msg(), data)
+
+        self.logged_in = True
+        self.logger.debug('%s: successfully logged in.', self.name)
+
+        return resp
+
+    @signals.update_progress
+    async def download_statement(
+            self, url: str, location: str, method: str,
+            data: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Download account statement file.
+
+        Args:
+            url: URL for downloading the statement.
+            location: Absolute file path where to save the statement.
+            method: HTTP method to be used to request the statement file; must
+                be either 'get' or 'post'.
+            data: Dictionary with data for posting request to the URL.
+
+        Raises:
+            RuntimeError: If the download page returns an error status code.
+
+        """
+        error_msg = self._download_error_msg()
+        resp = await self.request(url, method, error_msg, data, stream=True)
+        await self.save_response(resp, location, error_msg)
+
+    @signals.watch_errors
+    async def save_response(
+            self, resp: httpx.Response, location: str,
+            error_msg: str) -> None:
+        """
+        Stream the body of resp to the file location.
+
+        See P2PSession.save_response for details.
+
+        Args:
+            resp: Response whose body should be saved. It should be requested
+                with stream=True.
+            location: Absolute file path where to save the body.
+            error_msg: Error message if the download fails.
+
+        Raises:
+            RuntimeError: If the connection fails during the download or the
+                file cannot be written.
+
+        """
+        part = self._open_part_file(location)
+        try:
+            async for chunk in resp.aiter_bytes(self.DOWNLOAD_CHUNK_SIZE):
+                self._write_chunk(part, chunk)
+            part.commit()
+        except (httpx.HTTPError, OSError):
+            self._download_failed(part, error_msg)
+        finally:
+            await resp.aclose()
+            part.discard()
+        self._download_finished(part)
+
+    async def close_response(self, resp: httpx.Response) -> None:
+        """
+        Close a streamed response whose body is not needed.
+
+        Args:
+            resp: Response which was requested with stream=True.
+
+        """
+        await resp.aclose()
+
+    @signals.update_progress
+    async def generate_account_statement(
+            self, url: str, method: str,
+            data: Optional[
+                Mapping[str, Union[str, Sequence[int]]]] = None) -> None:
+        """
+        Generate account statement.
+
+        Args:
+            url: URL for generating the statement.
+            method: HTTP method to be used to send the request; must be either
+                'get' or 'post'.
+            data: Dictionary with data for posting request to the URL.
+
+        """
+        await self.request(url, method, self._generation_error_msg(), data)
+
+    @signals.watch_errors
+    async def request(
+            self, url: str, method: str, error_msg: str,
+            data: Optional[Mapping[str, str]] = None,
+            success_codes: Optional[Tuple[int, ...]] = None,
+            stream: bool = False) -> httpx.Response:
+        """
+        Send post or get request to an URL and retry transient errors.
+
+        Args:
+            url: URL to which to send the request.
+            method: HTTP method to be used to request the statement file; must
+                be either 'get' or 'post'.
+            error_msg: Error message which will be shown to the user if the
+                request fails.
+            data: Dictionary with data for posting request to the URL.
+            success_codes: Tuple of HTTP status codes for successful requests.
+                If none is provided, we assume 200 to be the success status
+                code.
+            stream: If True, the response body is not downloaded immediately
+                but can be read in chunks. Default is False.
+
+        Returns:
+            Response returned by the URL.
+
+        Raises:
+            RuntimeError: If the request still fails after the last attempt.
+
+        """
+        if success_codes is None:
+            success_codes = (200,)
+
+        max_attempts = self._max_attempts(method)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                resp = await self._send(url, method, data, stream)
+            except httpx.HTTPError as err:
+                self._check_connection_error(
+                    url, err, attempt, max_attempts, error_msg)
+            else:
+                if resp.status_code in success_codes:
+                    return resp
+                await resp.aclose()
+                if not self._is_retryable(
+                        resp.status_code, attempt, max_attempts):
+                    raise RuntimeError(error_msg)
+
+            await asyncio.sleep(
+                self._retry_delay(url, method, attempt, max_attempts))
+
+        # Not reachable since max_attempts is at least one
+        raise RuntimeError(error_msg)
+
+    async def _send(
+            self, url: str, method: str,
+            data: Optional[Mapping[str, str]], stream: bool) \
+            -> httpx.Response:
+        """
+        Send a single get or post request without any error handling.
+
+        Args:
+            url: URL to which to send the request.
+            method: HTTP method, either 'get' or 'post'.
+            data: Dictionary with data for posting request to the URL.
+            stream: If True, the response body is not downloaded immediately.
+
+        Returns:
+            Response returned by the URL.
+
+        """
+        if method == 'get':
+            request = self.sess.build_request('GET', url)
+        elif self.json:
+            request = self.sess.build_request('POST', url, json=data)
+        else:
+            request = self.sess.build_request('POST', url, data=data)
+        return await self.sess.send(request, stream=stream)
+
+    @signals.update_progress
+    async def wait(self, func: Callable[[], Awaitable[bool]]) -> None:
+        """
+        Wait until the coroutine function func returns True and raise an error
+        if that does not happen before the deadline of the poll policy.
+
+        Args:
+            func: Coroutine function which returns True if the condition to
+                wait for is fulfilled.
+
+        Raises:
+            RuntimeError: If the deadline is reached and func did not
+                return True.
+
+        """
+        deadline = self._poll_deadline()
+        attempt = 1
+        while not await func():
+            await asyncio.sleep(self._poll_delay(deadline, attempt))
+            attempt += 1
+
+    @signals.watch_errors
+    async def get_values_from_tag_by_name(
+            self, url: str, tag: str, names: Sequence[str],
+            error_msg: str, field: str = 'value') -> Dict[str, str]:
+        """
+        Get the values of HTML tags given in names from page specified by url.
+
+        See P2PSession.get_values_from_tag_by_name for details.
+
+        """
+        resp = await self.request(url, 'get', error_msg)
+        return values_from_tag_by_name(
+            resp.text, tag, names, error_msg, field)
+
+    @signals.watch_errors
+    async def get_value_from_tag(
+            self, url: str, tag: str, field: str, error_msg: str) -> str:
+        """
+        Get the string value of a single HTML tag from page specified by url.
+
+        See P2PSession.get_value_from_tag for details.
+
+        """
+        resp = await self.request(url, 'get', error_msg)
+        return value_from_tag(resp.text, tag, field, error_msg)
+
+    @signals.watch_errors
+    async def get_url_from_partial_link(
+            self, url: str, partial_link: str, error_msg: str) -> str:
+        """
+        Find the href link which contains partial_link on page url.
+
+        See P2PSession.get_url_from_partial_link for details.
+
+        """
+        resp = await self.request(url, 'get', error_msg)
+        return url_from_partial_link(resp.text, partial_link, error_msg)
+
+    @signals.watch_errors
+    async def get_value_from_script(
+            self, url: str, script_id: Mapping[str, str], tag: str, name: str,
+            error_msg: str) -> str:
+        """
+        Get a value from a tag contained in script from page specified by url.
+
+        See P2PSession.get_value_from_script for details.
+
+        """
+        resp = await self.request(url, 'get', error_msg)
+        return value_from_script(resp.text, script_id, tag, name, error_msg)
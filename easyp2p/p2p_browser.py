@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Module implementing BrowserManager, which shares browsers between platforms.
+
+Starting ChromeDriver and Chrome takes several seconds and each Chrome process
+needs hundreds of MB of memory. Instead of starting a new browser for each P2P
+platform, P2PWebDriver gets a P2PChrome instance from the BrowserManager and
+returns it afterwards. There is only one browser per headless mode. Each
+platform gets its own isolated browser context in this browser, so cookies,
+storage and downloads of different platforms are strictly separated. Platforms
+which run at the same time use separate ChromeDriver sessions which are
+attached to the same browser.
+
+The browser can also be started in the background with prewarm while the user
+is still configuring the evaluation. If it is not used within a timeout it is
+quit again.
+
+"""
+
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from easyp2p.p2p_chrome import P2PChrome
+from easyp2p.p2p_signals import PlatformFailedError, Signals
+
+
+class BrowserManager:
+
+    """Shares one browser per headless mode between all P2P platforms."""
+
+    def __init__(self, max_contexts: int = 4) -> None:
+        """
+        Constructor of BrowserManager.
+
+        Args:
+            max_contexts: Maximal number of browser contexts which can be open
+                at the same time. acquire blocks if all of them are in use.
+
+        """
+        self.logger = logging.getLogger('easyp2p.p2p_browser.BrowserManager')
+        self.max_contexts = max_contexts
+        # Browser processes by headless mode
+        self._hosts: Dict[bool, P2PChrome] = {}
+        # Idle ChromeDriver sessions by headless mode
+        self._idle: Dict[bool, List[P2PChrome]] = {True: [], False: []}
+        # Pre-warmed browsers which were not used yet and their expiry timers
+        self._prewarmed: Dict[bool, Tuple[P2PChrome, threading.Timer]] = {}
+        # Events of browsers which are currently starting by headless mode
+        self._starting: Dict[bool, threading.Event] = {}
+        self._contexts = threading.BoundedSemaphore(max_contexts)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> 'BrowserManager':
+        """
+        Start of context management protocol.
+
+        Returns:
+            Instance of BrowserManager.
+
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """End of context management protocol, quits all browsers."""
+        self.close()
+
+    def prewarm(self, headless: bool, timeout: float = 120.) -> None:
+        """
+        Start the browser in the background before it is needed.
+
+        Nothing happens if a browser in this headless mode is already running
+        or starting. Errors are only logged, acquire will report them when the
+        browser is really needed.
+
+        Args:
+            headless: If True the browser is started in headless mode.
+            timeout: Time in seconds after which the browser is quit again if
+                no platform used it.
+
+        """
+        threading.Thread(
+            target=self._start_prewarmed, args=(headless, timeout),
+            daemon=True).start()
+
+    def _start_prewarmed(self, headless: bool, timeout: float) -> None:
+        """
+        Start a pre-warmed browser and its expiry timer.
+
+        Args:
+            headless: If True the browser is started in headless mode.
+            timeout: Time in seconds after which the browser is quit again if
+                no platform used it.
+
+        """
+        with self._lock:
+            if self._closed or headless in self._hosts \
+                    or headless in self._starting:
+                return
+            started = self._starting[headless] = threading.Event()
+
+        # Starting the browser takes several seconds, don't block the lock
+        driver, timer = None, None
+        try:
+            # Each platform sets its own download directory in its context
+            driver = P2PChrome(tempfile.gettempdir(), headless)
+        except (PlatformFailedError, WebDriverException):
+            self.logger.warning('Pre-warming browser failed.', exc_info=True)
+        finally:
+            with self._lock:
+                del self._starting[headless]
+                if driver is not None and not self._closed:
+                    timer = threading.Timer(
+                        timeout, self._expire, args=(driver,))
+                    timer.daemon = True
+                    self._hosts[headless] = driver
+                    self._idle[headless].append(driver)
+                    self._prewarmed[headless] = (driver, timer)
+            started.set()
+
+        if timer is None:
+            if driver is not None:
+                # The manager was closed while the browser was starting
+                self._quit(driver)
+            return
+        timer.start()
+        self.logger.debug('Pre-warmed browser (headless=%s).', headless)
+
+    def _expire(self, driver: P2PChrome) -> None:
+        """
+        Quit a pre-warmed browser which was not used within the timeout.
+
+        Args:
+            driver: Pre-warmed browser.
+
+        """
+        with self._lock:
+            if self._prewarmed.get(driver.headless, (None,))[0] is not driver:
+                return
+            del self._prewarmed[driver.headless]
+            del self._hosts[driver.headless]
+            self._idle[driver.headless].remove(driver)
+        self.logger.debug('Pre-warmed browser was not used, quitting it.')
+        self._quit(driver)
+
+    def acquire(
+            self, download_directory: str, headless: bool,
+            signals: Optional[Signals] = None) -> P2PChrome:
+        """
+        Get a browser with a new isolated context for a P2P platform.
+
+        Args:
+            download_directory: Download directory of the platform.
+            headless: If True the browser must run in headless mode.
+            signals: Signals instance for communicating with the calling class.
+
+        Returns:
+            P2PChrome instance which must be given back by release.
+
+        """
+        self._contexts.acquire()
+        try:
+            driver = self._get_driver(download_directory, headless, signals)
+            driver.open_context()
+        except BaseException:
+            self._contexts.release()
+            raise
+        return driver
+
+    def _get_driver(
+            self, download_directory: str, headless: bool,
+            signals: Optional[Signals]) -> P2PChrome:
+        """
+        Get an idle ChromeDriver session or create a new one.
+
+        Args:
+            download_directory: Download directory of the platform.
+            headless: If True the browser must run in headless mode.
+            signals: Signals instance for communicating with the calling class.
+
+        Returns:
+            P2PChrome instance without an open browser context.
+
+        """
+        while True:
+            with self._lock:
+                if headless in self._prewarmed:
+                    self._prewarmed.pop(headless)[1].cancel()
+                idle = self._idle[headless]
+                driver = idle.pop() if idle else None
+                host = self._hosts.get(headless)
+                started = self._starting.get(headless)
+                if driver is None and host is None and started is None:
+                    self._starting[headless] = threading.Event()
+            if driver is not None or host is not None or started is None:
+                break
+            # Another thread is starting the browser, wait until it is
+            # running and attach to it afterwards
+            started.wait()
+
+        if driver is None and host is None:
+            return self._start_host(download_directory, headless, signals)
+
+        if driver is None:
+            return P2PChrome(
+                download_directory, headless, signals,
+                debugger_address=host.debugger_address,
+                home_handle=host.home_handle)
+
+        if signals:
+            driver.signals.connect_signals(signals)
+        driver.download_directory = download_directory
+        # Keep the progress bar in line with starting a new session
+        driver.signals.update_progress_bar.emit()
+        self.logger.debug('Re-using ChromeDriver session.')
+        return driver
+
+    def _start_host(
+            self, download_directory: str, headless: bool,
+            signals: Optional[Signals]) -> P2PChrome:
+        """
+        Start the browser of a headless mode.
+
+        The browser is started without holding the lock since this takes
+        several seconds. Other platforms in the same mode wait for the
+        started event and attach to the browser afterwards.
+
+        Args:
+            download_directory: Download directory of the platform.
+            headless: If True the browser is started in headless mode.
+            signals: Signals instance for communicating with the calling class.
+
+        Returns:
+            P2PChrome instance without an open browser context.
+
+        """
+        driver = None
+        try:
+            driver = P2PChrome(download_directory, headless, signals)
+        finally:
+            with self._lock:
+                started = self._starting.pop(headless)
+                # If the manager was closed in the meantime, release will
+                # quit the browser
+                if driver is not None and not self._closed:
+                    self._hosts[headless] = driver
+            started.set()
+        return driver
+
+    def release(self, driver: P2PChrome) -> None:
+        """
+        Give back a browser which is not needed anymore.
+
+        The browser context of the platform is closed and the session is kept
+        for the next platform. If closing the context fails or the manager is
+        already closed, the session is quit instead.
+
+        Args:
+            driver: Browser which was returned by acquire.
+
+        """
+        driver.signals.disconnect_signals()
+        try:
+            driver.close_context()
+        except WebDriverException:
+            self.logger.warning(
+                'Closing browser context failed, quitting session.',
+                exc_info=True)
+            self._discard(driver)
+        else:
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._idle[driver.headless].append(driver)
+            if closed:
+                self._quit(driver)
+        finally:
+            self._contexts.release()
+
+    def close(self) -> None:
+        """Quit all idle sessions and afterwards the browsers."""
+        with self._lock:
+            self._closed = True
+            for _, timer in self._prewarmed.values():
+                timer.cancel()
+            self._prewarmed = {}
+            hosts = list(self._hosts.values())
+            drivers = self._idle[True] + self._idle[False]
+            self._hosts = {}
+            self._idle = {True: [], False: []}
+        for driver in drivers:
+            if all(driver is not host for host in hosts):
+                self._quit(driver)
+        for host in hosts:
+            self._quit(host)
+
+    def _discard(self, driver: P2PChrome) -> None:
+        """
+        Quit a broken session. If it started the browser, all other idle
+        sessions of the browser are quit, too.
+
+        Args:
+            driver: Session to quit.
+
+        """
+        drivers = [driver]
+        with self._lock:
+            if self._hosts.get(driver.headless) is driver:
+                del self._hosts[driver.headless]
+                drivers += self._idle[driver.headless]
+                self._idle[driver.headless] = []
+        for driver_ in drivers:
+            self._quit(driver_)
+
+    def _quit(self, driver: P2PChrome) -> None:
+        """
+        Quit driver and ignore errors.
+
+        Args:
+            driver: Browser to quit.
+
+        """
+        try:
+            driver.quit()
+        except WebDriverException:
+            self.logger.warning('Quitting browser failed.', exc_info=True)
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Module implementing StatementCache, a cache for parsed account statements.
+
+Parsed results are stored per P2P platform in partitions of one calendar
+month. Only months which are already closed are cached since cash flows of the
+current month can still change. When the results for a date range are
+requested, only the months which are not in the cache yet need to be
+downloaded and parsed again.
+
+"""
+
+import calendar
+from datetime import date, timedelta
+import logging
+import os
+import pickle
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from PyQt5.QtCore import QCoreApplication
+
+from easyp2p.p2p_parser import P2PParser, get_zero_line
+from easyp2p.p2p_signals import PlatformFailedError
+
+_translate = QCoreApplication.translate
+
+
+class StatementCache:
+
+    """Month partitioned cache for parsed account statements of a platform."""
+
+    def __init__(self, directory: str, name: str) -> None:
+        """
+        Constructor of StatementCache.
+
+        Args:
+            directory: Directory where the monthly partitions are saved.
+            name: Name of the P2P platform.
+
+        """
+        self.directory = directory
+        self.name = name
+        self.logger = logging.getLogger('easyp2p.p2p_cache.StatementCache')
+
+    def _partition_file(self, month: date) -> str:
+        """
+        Get the file name of the partition for month.
+
+        Args:
+            month: First day of the month.
+
+        Returns:
+            File name including path of the partition.
+
+        """
+        return os.path.join(self.directory, month.strftime('%Y-%m') + '.pkl')
+
+    def _is_cached(self, month: date) -> bool:
+        """
+        Check if month is closed and present in the cache.
+
+        Args:
+            month: First day of the month.
+
+        Returns:
+            True if the partition of month can be used, False if not.
+
+        """
+        return (
+            _end_of_month(month) < date.today()
+            and os.path.isfile(self._partition_file(month)))
+
+    def missing_date_range(
+            self, date_range: Tuple[date, date]) \
+            -> Optional[Tuple[date, date]]:
+        """
+        Get the date range which still needs to be downloaded.
+
+        Args:
+            date_range: Date range (start_date, end_date) requested by the
+                user.
+
+        Returns:
+            Date range spanning all months of date_range which are not cached
+            yet or None if all months are cached. The date range always starts
+            at the first day of a month. It ends at the last day of a month,
+            but never after the end of date_range.
+
+        """
+        missing = [
+            month for month in _get_months(date_range)
+            if not self._is_cached(month)]
+        if not missing:
+            self.logger.debug('%s: all months are cached.', self.name)
+            return None
+
+        # Platforms do not accept end dates in the future
+        download_range = (
+            missing[0], min(_end_of_month(missing[-1]), date_range[1]))
+        self.logger.debug(
+            '%s: months missing in cache: %s.', self.name, str(download_range))
+        return download_range
+
+    def save(self, df: pd.DataFrame, download_range: Tuple[date, date]) \
+            -> None:
+        """
+        Save all closed months of df in the cache which download_range
+        covers completely.
+
+        Args:
+            df: Parser result for download_range.
+            download_range: Date range (start_date, end_date) for which df was
+                generated.
+
+        """
+        df = _drop_zero_lines(df)
+        months = _get_row_months(df)
+        os.makedirs(self.directory, exist_ok=True)
+
+        for month in _get_months(download_range):
+            if _end_of_month(month) >= date.today() \
+                    or month < download_range[0] \
+                    or _end_of_month(month) > download_range[1]:
+                continue
+            partition = df[months == pd.Timestamp(month).to_period('M')]
+            try:
+                partition.to_pickle(self._partition_file(month))
+            except OSError:
+                # The cache is only an optimization, failing to write it must
+                # not fail the evaluation
+                self.logger.warning(
+                    '%s: could not write partition %s.', self.name,
+                    self._partition_file(month), exc_info=True)
+
+    def load(
+            self, date_range: Tuple[date, date],
+            df: Optional[pd.DataFrame] = None,
+            download_range: Optional[Tuple[date, date]] = None) \
+            -> pd.DataFrame:
+        """
+        Get the parser results for date_range.
+
+        All months of date_range which are not covered by download_range are
+        read from the cache and combined with the freshly parsed df.
+
+        Args:
+            date_range: Date range (start_date, end_date) requested by the
+                user.
+            df: Parser result for download_range. Default is None.
+            download_range: Date range (start_date, end_date) for which df was
+                generated. Default is None.
+
+        Returns:
+            Parser result for date_range.
+
+        Raises:
+            PlatformFailedError: If a partition cannot be read.
+
+        """
+        frames = []
+        if df is not None:
+            frames.append(_drop_zero_lines(df))
+
+        for month in _get_months(date_range):
+            if download_range \
+                    and download_range[0] <= month <= download_range[1]:
+                continue
+            try:
+                frames.append(_convert_dates(
+                    pd.read_pickle(self._partition_file(month))))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                # Should not happen since missing_date_range already checked
+                # the partitions
+                self.logger.exception(
+                    '%s: could not read partition %s.', self.name,
+                    self._partition_file(month))
+                raise PlatformFailedError(_translate(
+                    'StatementCache',
+                    f'{self.name}: reading cached results failed!'))
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return get_zero_line(self.name, date_range[0])
+
+        result = pd.concat(frames, sort=False)
+        dates = pd.to_datetime(
+            result.index.get_level_values(P2PParser.DATE))
+        result = result[
+            (dates >= pd.Timestamp(date_range[0]))
+            & (dates <= pd.Timestamp(date_range[1]))].copy()
+        if result.empty:
+            return get_zero_line(self.name, date_range[0])
+
+        # Cash flow types which did not occur in some months are missing in
+        # their partitions
+        flow_columns = [
+            col for col in result.columns
+            if col not in (
+                P2PParser.START_BALANCE_NAME, P2PParser.END_BALANCE_NAME)]
+        result[flow_columns] = result[flow_columns].fillna(0.)
+        result = result[[
+            col for col in P2PParser.TARGET_COLUMNS if col in result.columns]]
+        return result.sort_index(level=[P2PParser.DATE, P2PParser.CURRENCY])
+
+
+def _get_months(date_range: Tuple[date, date]) -> List[date]:
+    """
+    Get the first day of all months which overlap with date_range.
+
+    Args:
+        date_range: Date range (start_date, end_date).
+
+    Returns:
+        Sorted list with the first day of each month.
+
+    """
+    months = []
+    month = date_range[0].replace(day=1)
+    while month <= date_range[1]:
+        months.append(month)
+        month = _end_of_month(month) + timedelta(days=1)
+    return months
+
+
+def _end_of_month(month: date) -> date:
+    """
+    Get the last day of the month.
+
+    Args:
+        month: Any day of the month.
+
+    Returns:
+        Last day of the month.
+
+    """
+    return month.replace(
+        day=calendar.monthrange(month.year, month.month)[1])
+
+
+def _get_row_months(df: pd.DataFrame) -> pd.PeriodIndex:
+    """
+    Get the month of each row of a parser result.
+
+    Args:
+        df: Parser result.
+
+    Returns:
+        Monthly periods of the date index level of df.
+
+    """
+    return pd.PeriodIndex(
+        pd.to_datetime(df.index.get_level_values(P2PParser.DATE)), freq='M')
+
+
+def _convert_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the date index level of a partition to datetime64 values.
+
+    Partitions which were written by older easyp2p versions contain date
+    objects instead.
+
+    Args:
+        df: Partition read from the cache.
+
+    Returns:
+        df with datetime64 values in the date index level.
+
+    """
+    level = df.index.names.index(P2PParser.DATE)
+    if is_datetime64_any_dtype(df.index.levels[level]):
+        return df
+    df.index = df.index.set_levels(
+        pd.to_datetime(df.index.levels[level]), level=level)
+    return df
+
+
+def _drop_zero_lines(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove the placeholder lines which the parser adds if there were no
+    cash flows.
+
+    Args:
+        df: Parser result.
+
+    Returns:
+        df without lines which only contain zeros.
+
+    """
+    return df[(df != 0.).any(axis=1)]
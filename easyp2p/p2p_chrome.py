@@ -1,27 +1,228 @@
 # -*- coding: utf-8 -*-
 #  Copyright (c) 2018-2020 Niko Sandschneider
 
-"""Module implementing P2PWebDriver."""
+"""
+Module implementing P2PChrome, the Chrome webdriver used by easyp2p.
 
+Downloads are tracked with the download events of the Chrome DevTools protocol.
+ChromeDriver forwards them into the performance log, which P2PChrome reads
+while waiting for a download. This way a download is detected as finished as
+soon as Chrome reports it and slow downloads do not fail as long as bytes are
+still being received.
+
+Several P2P platforms can share one browser process. Each of them gets its own
+isolated browser context, which is much cheaper than starting a new browser.
+Further sessions attach to the running browser via its debugger address.
+
+Resources which easyp2p does not need, e.g. images or tracking scripts, can be
+blocked to speed up page loads. TRACKER_URLS and MEDIA_URLS contain common URL
+patterns for this.
+
+Forms can be filled and values read with a single script instead of one
+ChromeDriver round trip per field or transferring the whole page source.
+
+Waiting for expected conditions does not poll in fixed intervals. A
+MutationObserver in the page reports the next change of the page, so a
+condition is checked again as soon as it can have become true.
+
+"""
+
+import json
 import logging
 import os
-from typing import cast, Optional, Tuple
+import shutil
+import time
+from typing import (
+    Any, cast, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple)
 
 from selenium.webdriver import Chrome, ChromeOptions
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import (
-    NoSuchElementException, StaleElementReferenceException, TimeoutException,
-    WebDriverException)
+    JavascriptException, NoSuchElementException,
+    StaleElementReferenceException, TimeoutException, WebDriverException)
+from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_signals import Signals
 
 _translate = QCoreApplication.translate
 
+# URL patterns of analytics, advertising and tracking scripts
+TRACKER_URLS = (
+    '*google-analytics.com*', '*googletagmanager.com*',
+    '*doubleclick.net*', '*googleadservices.com*', '*facebook.net*',
+    '*facebook.com/tr*', '*hotjar.com*', '*linkedin.com/px*',
+    '*ads.linkedin.com*', '*bing.com/bat*', '*yandex.ru/metrika*',
+    '*mc.yandex.ru*', '*intercom.io*', '*zopim.com*', '*tawk.to*')
+
+# URL patterns of images, videos and fonts. Vector graphics are not blocked
+# since some buttons consist of nothing else.
+MEDIA_URLS = (
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.mp4',
+    '*.webm', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot')
+
+# Locator strategies which the scripts below can resolve
+SCRIPT_LOCATORS = (
+    By.ID, By.NAME, By.CLASS_NAME, By.TAG_NAME, By.CSS_SELECTOR, By.XPATH)
+
+# Find the first element for a Selenium locator
+_FIND_ELEMENT_JS = '''
+function find(by, value) {
+    if (by === 'xpath') {
+        return document.evaluate(
+            value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE,
+            null).singleNodeValue;
+    }
+    if (by === 'id') return document.getElementById(value);
+    if (by === 'name') return document.getElementsByName(value)[0] || null;
+    if (by === 'class name') {
+        return document.getElementsByClassName(value)[0] || null;
+    }
+    if (by === 'tag name') {
+        return document.getElementsByTagName(value)[0] || null;
+    }
+    return document.querySelector(value);
+}
+'''
+
+# Fill [by, value, text] fields like a user would and return the values of
+# all locators which were not found. The native setter is needed for
+# frameworks like React which track the value themselves.
+_FILL_FIELDS_JS = _FIND_ELEMENT_JS + '''
+const missing = [];
+for (const [by, value, text] of arguments[0]) {
+    const elem = find(by, value);
+    if (elem === null) {
+        missing.push(value);
+        continue;
+    }
+    elem.focus();
+    Object.getOwnPropertyDescriptor(
+        Object.getPrototypeOf(elem), 'value').set.call(elem, text);
+    elem.dispatchEvent(new Event('input', {bubbles: true}));
+    elem.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return missing;
+'''
+
+# Return the property arguments[1] of all [key, by, value] elements, null for
+# missing elements. Unknown properties are read as attributes.
+_GET_VALUES_JS = _FIND_ELEMENT_JS + '''
+const values = {};
+for (const [key, by, value] of arguments[0]) {
+    const elem = find(by, value);
+    if (elem === null) {
+        values[key] = null;
+    } else if (arguments[1] in elem) {
+        values[key] = elem[arguments[1]];
+    } else {
+        values[key] = elem.getAttribute(arguments[1]);
+    }
+}
+return values;
+'''
+
+# Return the cell texts of all body rows of a table or of the first table
+# inside the located element, null if there is no table
+_GET_TABLE_ROWS_JS = _FIND_ELEMENT_JS + '''
+let table = find(arguments[0], arguments[1]);
+if (table !== null && table.tagName !== 'TABLE') {
+    table = table.querySelector('table');
+}
+if (table === null) return null;
+const bodies = Array.from(table.tBodies);
+if (table.tFoot !== null) bodies.push(table.tFoot);
+return bodies.flatMap(body => Array.from(body.rows))
+    .map(row => Array.from(row.cells))
+    .filter(cells => !cells.every(cell => cell.tagName === 'TH'))
+    .map(cells => cells.map(
+        cell => cell.textContent.replace(/\\s+/g, ' ').trim()));
+'''
+
+# Show month arguments[2] (1-12) of year arguments[1] in the open calendar
+# which contains the web element arguments[0]. Uses the API of flatpickr or of
+# jQuery datepicker if available, otherwise the month and year selectors of
+# the calendar. Returns false if the calendar supports neither.
+_SET_CALENDAR_MONTH_JS = '''
+const [monthElement, year, month] = arguments;
+const target = new Date(year, month - 1, 1);
+const inputs = Array.from(document.querySelectorAll('input'));
+for (const input of inputs) {
+    if (input._flatpickr !== undefined && input._flatpickr.isOpen) {
+        input._flatpickr.jumpToDate(target);
+        return true;
+    }
+}
+if (window.jQuery !== undefined) {
+    for (const input of inputs) {
+        const picker = window.jQuery(input).data('datepicker');
+        if (picker && picker.shown && typeof picker.setDate === 'function') {
+            picker.setDate(target);
+            return true;
+        }
+    }
+}
+// Selectors are searched in the calendar only, not in the whole page
+let calendar = monthElement;
+for (let i = 0; i < 5 && calendar.querySelector('select') === null; i++) {
+    calendar = calendar.parentElement;
+    if (calendar === null) return false;
+}
+function hasYear(option) {
+    const text = String(year);
+    return option.value === text || option.text.trim() === text;
+}
+function select(isYear) {
+    return Array.from(calendar.querySelectorAll('select')).find(
+        elem => isYear === Array.from(elem.options).some(hasYear)
+            && (isYear || elem.options.length === 12));
+}
+function change(elem, index) {
+    elem.selectedIndex = index;
+    elem.dispatchEvent(new Event('change', {bubbles: true}));
+}
+const monthSelect = select(false);
+if (monthSelect === undefined) return false;
+change(monthSelect, month - 1);
+// Calendars may be rendered again after each change
+const yearSelect = select(true);
+if (yearSelect !== undefined) {
+    change(yearSelect, Array.from(yearSelect.options).findIndex(hasYear));
+}
+return true;
+'''
+
+# Fetch arguments[0] with the cookies of the page and resolve with true if the
+# response contains arguments[1], with null if the request failed
+_FETCH_CONTAINS_JS = '''
+const done = arguments[arguments.length - 1];
+const marker = arguments[1];
+fetch(arguments[0], {credentials: 'include'})
+    .then(response => response.ok ? response.text() : null)
+    .then(text => done(text === null ? null : text.includes(marker)))
+    .catch(() => done(null));
+'''
+
+# Resolve with true on the next change of the page or with false after
+# arguments[0] milliseconds
+_WAIT_FOR_MUTATION_JS = '''
+const done = arguments[arguments.length - 1];
+const observer = new MutationObserver(() => {
+    observer.disconnect();
+    clearTimeout(timer);
+    done(true);
+});
+const timer = setTimeout(() => {
+    observer.disconnect();
+    done(false);
+}, arguments[0]);
+observer.observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true});
+'''
+
 
 class P2PChrome(Chrome):
 
@@ -30,10 +231,34 @@ class P2PChrome(Chrome):
     # Signals for communicating with the GUI
     signals = Signals()
 
+    # Maximal time in seconds between clicking the download button and the
+    # start of the download
+    DOWNLOAD_START_TIMEOUT = 10.
+
+    # Maximal time in seconds without receiving any bytes before a running
+    # download is considered stalled
+    DOWNLOAD_STALL_TIMEOUT = 30.
+
+    # Interval in seconds for reading download events from the performance log
+    DOWNLOAD_POLL_INTERVAL = 0.1
+
+    # Maximal time in seconds to wait for a change of the page before an
+    # expected condition is checked again. Conditions which do not depend on
+    # the page content, e.g. the URL, are still checked in this interval.
+    MUTATION_WAIT_INTERVAL = 0.5
+
+    # Minimal time in seconds between two checks of an expected condition.
+    # Pages with animations change all the time and would otherwise cause
+    # a round trip to the browser for every change.
+    MUTATION_MIN_INTERVAL = 0.1
+
     @signals.update_progress
     def __init__(
             self, download_directory: str, headless: bool,
-            signals: Optional[Signals] = None) -> None:
+            signals: Optional[Signals] = None,
+            debugger_address: Optional[str] = None,
+            home_handle: Optional[str] = None,
+            profile_directory: Optional[str] = None) -> None:
         """
         Initialize the P2PWebDriver class.
 
@@ -41,19 +266,43 @@ class P2PChrome(Chrome):
             download_directory: Will be set as download directory for the
                 ChromeDriver
             headless: If True run ChromeDriver in headless mode
+            signals: Signals instance for communicating with the calling class.
+            debugger_address: If provided, attach to the already running
+                browser at this address instead of starting a new one.
+            home_handle: Window handle outside of all browser contexts. Must
+                be provided together with debugger_address.
+            profile_directory: If provided, this directory is used as Chrome
+                profile instead of a temporary one. Cookies and thus logins
+                are kept between runs.
 
         """
+        self.signals = P2PChrome.signals.instance_signals()
         self.download_directory = download_directory
+        self.headless = headless
+        self.context_id: Optional[str] = None
+        self.target_id: Optional[str] = None
         self.logger = logging.getLogger('easyp2p.p2p_webdriver')
         self.driver = cast(Chrome, None)
         options = ChromeOptions()
-        prefs = {"download.default_directory": self.download_directory}
-        options.add_experimental_option("prefs", prefs)
-        options.add_argument("--start-maximized")
-        options.binary_location = "/usr/bin/chromium"
-        if headless:
-            options.add_argument("--headless")
-            options.add_argument("--window-size=1920,1200")
+        # Download events are reported in the performance log. Network events
+        # are not needed and would only fill the log.
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_experimental_option(
+            'perfLoggingPrefs', {'enableNetwork': False, 'enablePage': True})
+        if debugger_address is not None:
+            options.debugger_address = debugger_address
+        else:
+            prefs = {"download.default_directory": self.download_directory}
+            options.add_experimental_option("prefs", prefs)
+            options.add_argument("--start-maximized")
+            options.binary_location = "/usr/bin/chromium"
+            if headless:
+                options.add_argument("--headless")
+                options.add_argument("--window-size=1920,1200")
+            if profile_directory is not None:
+                # The profile contains login cookies, keep it private
+                os.makedirs(profile_directory, mode=0o700, exist_ok=True)
+                options.add_argument(f'--user-data-dir={profile_directory}')
         if signals:
             self.signals.connect_signals(signals)
 
@@ -84,30 +333,257 @@ class P2PChrome(Chrome):
                 _translate('WorkerThread', 'ChromeDriver not found!'))
             raise RuntimeError('ChromeDriver not found!')
 
-        if headless:
-            # This is needed to allow downloads in headless mode
-            params = {
-                'behavior': 'allow', 'downloadPath': self.download_directory}
-            self.execute_cdp_cmd('Page.setDownloadBehavior', params)
+        if debugger_address is not None:
+            self.home_handle = home_handle
+            self.switch_to.window(self.home_handle)
+        else:
+            self.home_handle = self.current_window_handle
+            self.set_download_directory(download_directory)
 
     def __exit__(self, *args):
         self.signals.disconnect_signals()
         super().__exit__(self, *args)
 
+    @property
+    def debugger_address(self) -> str:
+        """Address at which other sessions can attach to the browser."""
+        return self.capabilities['goog:chromeOptions']['debuggerAddress']
+
+    def set_download_directory(self, download_directory: str) -> None:
+        """
+        Set the directory where downloads are saved.
+
+        If a browser context is open, only its downloads are affected.
+
+        Args:
+            download_directory: New download directory.
+
+        """
+        self.download_directory = download_directory
+        # This is needed to allow downloads in headless mode. Each download
+        # is saved under its GUID so that the file can be found without
+        # scanning the download directory.
+        params = {
+            'behavior': 'allowAndName', 'downloadPath': self.download_directory,
+            'eventsEnabled': True}
+        if self.context_id is not None:
+            params['browserContextId'] = self.context_id
+        self.execute_cdp_cmd('Browser.setDownloadBehavior', params)
+
+    def block_urls(self, patterns: Sequence[str]) -> None:
+        """
+        Prevent the current tab from loading URLs which match patterns.
+
+        Args:
+            patterns: URL patterns, '*' is a wildcard.
+
+        """
+        self.execute_cdp_cmd('Network.enable', {})
+        self.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+        self.logger.debug('Blocking %d URL patterns.', len(patterns))
+
+    def get_cookies_for(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Get all cookies which the browser would send with a request to url.
+
+        Contrary to get_cookies this also includes cookies of other domains
+        than the one of the current page.
+
+        Args:
+            url: URL for which to get the cookies.
+
+        Returns:
+            List of cookies in the format of the Chrome DevTools protocol.
+
+        """
+        return self.execute_cdp_cmd(
+            'Network.getCookies', {'urls': [url]})['cookies']
+
+    def open_context(self) -> None:
+        """
+        Open a tab in a new isolated browser context and switch to it.
+
+        Like an incognito window, the context does not share cookies, storage
+        or cache with other contexts of the same browser. Its downloads are
+        saved in download_directory.
+
+        Raises:
+            WebDriverException: If the context cannot be created.
+
+        """
+        self.context_id = self.execute_cdp_cmd(
+            'Target.createBrowserContext',
+            {'disposeOnDetach': False})['browserContextId']
+        self.target_id = self.execute_cdp_cmd(
+            'Target.createTarget',
+            {'url': 'about:blank', 'browserContextId': self.context_id}
+        )['targetId']
+        # Depending on the ChromeDriver version window handles are the target
+        # id with or without a prefix
+        self.switch_to.window(next(
+            handle for handle in self.window_handles
+            if handle.endswith(self.target_id)))
+        self.set_download_directory(self.download_directory)
+        self.logger.debug('Opened browser context %s.', self.context_id)
+
+    def close_context(self) -> None:
+        """
+        Close the browser context including all its tabs and data.
+
+        Raises:
+            WebDriverException: If the context cannot be closed.
+
+        """
+        if self.context_id is None:
+            return
+        # CDP commands are sent via the current window, which must therefore
+        # not belong to the context
+        self.switch_to.window(self.home_handle)
+        self.execute_cdp_cmd(
+            'Target.disposeBrowserContext',
+            {'browserContextId': self.context_id})
+        self.logger.debug('Closed browser context %s.', self.context_id)
+        self.context_id = None
+        self.target_id = None
+
+    def discard_download_events(self) -> None:
+        """Discard all download events which have been reported so far."""
+        self.get_log('performance')
+
+    def _get_download_events(self) -> Iterator[Dict[str, Any]]:
+        """
+        Get the new download events from the performance log.
+
+        Chrome reports downloads by both the deprecated Page and the Browser
+        domain, depending on the version. Events of both are returned. If a
+        browser context is open, only events of its tab are returned.
+
+        Yields:
+            Parameters of the events with the event name in 'method'.
+
+        """
+        for entry in self.get_log('performance'):
+            message = json.loads(entry['message'])
+            # If several sessions share one browser, the log also contains
+            # the events of the tabs of the other sessions
+            if self.target_id is not None \
+                    and message.get('webview') != self.target_id:
+                continue
+            message = message['message']
+            if message['method'] in (
+                    'Browser.downloadWillBegin', 'Browser.downloadProgress',
+                    'Page.downloadWillBegin', 'Page.downloadProgress'):
+                yield {'method': message['method'], **message['params']}
+
+    def wait_for_download(self, statement: str) -> bool:
+        """
+        Wait until the download is finished and move the file to statement.
+
+        The download must start within DOWNLOAD_START_TIMEOUT seconds. After
+        that there is no limit for the total download time, it only fails if
+        no bytes were received for DOWNLOAD_STALL_TIMEOUT seconds.
+
+        Args:
+            statement: File name including path where the downloaded file
+                should be saved.
+
+        Returns:
+            True if the download finished successfully, False if not.
+
+        Raises:
+            WebDriverException: If the performance log is not available.
+
+        """
+        guid = None
+        received_bytes = -1
+        last_progress = time.monotonic()
+
+        while True:
+            for event in self._get_download_events():
+                if guid is None:
+                    guid = event['guid']
+                    self.logger.debug('Download %s started.', guid)
+                if event['guid'] != guid \
+                        or not event['method'].endswith('downloadProgress'):
+                    continue
+                if event['state'] == 'completed':
+                    shutil.move(
+                        os.path.join(self.download_directory, guid),
+                        statement)
+                    return True
+                if event['state'] == 'canceled':
+                    self.logger.error('Download %s was canceled.', guid)
+                    return False
+                if event['receivedBytes'] > received_bytes:
+                    received_bytes = event['receivedBytes']
+                    last_progress = time.monotonic()
+
+            waiting_time = time.monotonic() - last_progress
+            if guid is None and waiting_time > self.DOWNLOAD_START_TIMEOUT:
+                self.logger.error('Download did not start in time.')
+                return False
+            if guid is not None and waiting_time > self.DOWNLOAD_STALL_TIMEOUT:
+                self.logger.error(
+                    'Download %s stalled after %d bytes.', guid,
+                    received_bytes)
+                return False
+            time.sleep(self.DOWNLOAD_POLL_INTERVAL)
+
     def wait(
             self, wait_until: EC, delay: float = 15.0) -> WebElement:
         """
-        Shorthand for WebDriverWait.
+        Wait until an expected condition is fulfilled.
+
+        Like WebDriverWait, but instead of polling every half second the
+        condition is checked again as soon as the page changed.
 
         Args:
             wait_until: Expected condition for which the webdriver should wait
-            delay: Maximal waiting time in seconds. Default is 5.0.
+            delay: Maximal waiting time in seconds. Default is 15.0.
 
         Returns:
-            WebElement which WebDriverWait waited for.
+            Return value of wait_until, usually the WebElement which the
+            webdriver waited for.
+
+        Raises:
+            TimeoutException: If the condition is not fulfilled within delay.
+
+        """
+        deadline = time.monotonic() + delay
+        while True:
+            checked = time.monotonic()
+            try:
+                result = wait_until(self)
+                if result:
+                    return result
+            except NoSuchElementException:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(
+                    f'Waiting for {wait_until} timed out after {delay} s.')
+            self._wait_for_mutation(
+                min(remaining, self.MUTATION_WAIT_INTERVAL))
+            pause = min(
+                checked + self.MUTATION_MIN_INTERVAL, deadline) \
+                - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+
+    def _wait_for_mutation(self, timeout: float) -> None:
+        """
+        Wait until the page changes.
+
+        Args:
+            timeout: Maximal waiting time in seconds.
 
         """
-        return WebDriverWait(self, delay).until(wait_until)
+        try:
+            self.execute_async_script(
+                _WAIT_FOR_MUTATION_JS, max(1, round(timeout * 1000)))
+        except WebDriverException:
+            # E.g. if the page was unloaded while waiting
+            time.sleep(min(timeout, 0.1))
 
     @signals.watch_errors
     def click_button(
@@ -203,9 +679,128 @@ class P2PChrome(Chrome):
         except StaleElementReferenceException:
             self.enter_text(locator, text, error_msg, hit_return, wait_until)
 
+    @signals.watch_errors
+    def fill_fields(
+            self, fields: Mapping[Tuple[str, str], str], error_msg: str,
+            submit_locator: Optional[Tuple[str, str]] = None,
+            wait_until: Optional[EC.element_to_be_clickable] = None) -> None:
+        """
+            Helper method for filling several fields in one round trip.
+
+            Args:
+                fields: Dictionary mapping the locators of the fields to the
+                    text which should be filled in. Only locators from
+                    SCRIPT_LOCATORS are supported.
+                error_msg: Error message in case the fields cannot be filled.
+                submit_locator: If provided, the return key is pushed in this
+                    web element after filling the fields.
+                wait_until: Expected condition in case of success.
+
+            Raises:
+                RuntimeError: If a field cannot be found or filled.
+
+        """
+        try:
+            missing = self.execute_script(_FILL_FIELDS_JS, [
+                [*_check_locator(locator), text]
+                for locator, text in fields.items()])
+            if not missing:
+                if submit_locator is not None:
+                    self.find_element(*submit_locator).send_keys(Keys.RETURN)
+                if wait_until:
+                    self.wait(wait_until)
+        except (JavascriptException, NoSuchElementException, TimeoutException):
+            # Do not log the texts, they contain the credentials
+            self.logger.exception('Could not fill fields %s.', list(fields))
+            raise RuntimeError(error_msg)
+        if missing:
+            self.logger.error('Fields %s not found.', missing)
+            raise RuntimeError(error_msg)
+
+    def get_values(
+            self, locators: Mapping[str, Tuple[str, str]],
+            prop: str = 'value') -> Dict[str, Any]:
+        """
+            Helper method for reading several values in one round trip.
+
+            Args:
+                locators: Dictionary mapping keys of the result to the
+                    locators of the web elements. Only locators from
+                    SCRIPT_LOCATORS are supported.
+                prop: Property of the web elements to read, e.g. value or
+                    textContent. If the elements do not have this property,
+                    the attribute with this name is read. Default is value.
+
+            Returns:
+                Dictionary mapping the keys to the values, None for web
+                elements which were not found.
+
+        """
+        return self.execute_script(_GET_VALUES_JS, [
+            [key, *_check_locator(locator)]
+            for key, locator in locators.items()], prop)
+
+    def get_table_rows(
+            self, locator: Tuple[str, str]) -> Optional[List[List[str]]]:
+        """
+            Helper method for reading the texts of a table in one round trip.
+
+            Header rows are skipped and whitespace in the texts is normalized.
+
+            Args:
+                locator: Locator of the table or of a web element containing
+                    it. Only locators from SCRIPT_LOCATORS are supported.
+
+            Returns:
+                List with the cell texts of each row or None if the table
+                was not found.
+
+        """
+        return self.execute_script(
+            _GET_TABLE_ROWS_JS, *_check_locator(locator))
+
+    def set_calendar_month(
+            self, month_element: WebElement, year: int, month: int) -> bool:
+        """
+            Show the target month in an open calendar without clicking.
+
+            Args:
+                month_element: Web element of the calendar which shows the
+                    currently selected month.
+                year: Target year.
+                month: Target month from 1 to 12.
+
+            Returns:
+                True if the month was set, False if the calendar neither
+                provides a known API nor month and year selectors.
+
+        """
+        return self.execute_script(
+            _SET_CALENDAR_MONTH_JS, month_element, year, month)
+
+    def _fetch_contains(self, url: str, marker: str) -> Optional[bool]:
+        """
+        Fetch url inside the page instead of reloading it.
+
+        Args:
+            url: URL which is fetched with the cookies of the page.
+            marker: Text to look for in the response.
+
+        Returns:
+            True if the response contains marker, False if not and None if
+            fetching failed.
+
+        """
+        try:
+            return self.execute_async_script(_FETCH_CONTAINS_JS, url, marker)
+        except WebDriverException:
+            self.logger.debug('Fetching %s failed.', url, exc_info=True)
+            return None
+
     def wait_and_reload(
             self, url: str, wait_until: EC.element_to_be_clickable,
-            reload_freq: int, max_wait_time: int, error_msg: str) -> None:
+            reload_freq: int, max_wait_time: int, error_msg: str,
+            marker: Optional[str] = None) -> None:
         """
             Helper method for waiting for an expected condition to be true.
             After each unsuccessful waiting period the web page will be
@@ -213,6 +808,11 @@ class P2PChrome(Chrome):
             Robocash, where certain web elements appear only after a refresh
             of the page.
 
+            If marker is provided, the page is fetched in the background
+            instead until its HTML contains marker. Only then it is loaded
+            once. If fetching fails, e.g. since the page is on another
+            origin, the page is reloaded instead.
+
             Args:
                 url: URL of the web page.
                 wait_until: Expected condition for which to wait.
@@ -222,6 +822,8 @@ class P2PChrome(Chrome):
                     not True after max_wait_time, an error is raised.
                 error_msg: Error message if wait is not successful after
                     max_wait_time.
+                marker: Text in the HTML of the page which shows that
+                    wait_until will be fulfilled. Default is None.
 
             Raises:
                 RuntimeError: If wait_until is not True after max_wait_time.
@@ -230,6 +832,18 @@ class P2PChrome(Chrome):
         wait_time = 0
 
         while True:
+            if marker is not None:
+                found = self._fetch_contains(url, marker)
+                if found is None:
+                    self.logger.debug(
+                        'Fetching %s failed, reloading instead.', url)
+                    marker = None
+                elif not found:
+                    time.sleep(reload_freq)
+                    wait_time += reload_freq
+                    if wait_time > max_wait_time:
+                        raise RuntimeError(error_msg)
+                    continue
             try:
                 self.logger.debug(
                     'Reloading %s and wait for %s. Total waiting time: %d.',
@@ -241,3 +855,22 @@ class P2PChrome(Chrome):
                 wait_time += reload_freq
                 if wait_time > max_wait_time:
                     raise RuntimeError(error_msg)
+
+
+def _check_locator(locator: Tuple[str, str]) -> Tuple[str, str]:
+    """
+    Make sure that the scripts of P2PChrome can resolve locator.
+
+    Args:
+        locator: Selenium locator.
+
+    Returns:
+        The unchanged locator.
+
+    Raises:
+        ValueError: If the locator strategy is not supported by the scripts.
+
+    """
+    if locator[0] not in SCRIPT_LOCATORS:
+        raise ValueError(f'Locator {locator} is not supported in scripts!')
+    return locator
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Module implementing CleanupExecutor, which logs out of P2P platforms in the
+background.
+
+Logging out, closing the browser and deleting temporary files do not change
+the downloaded account statement. Instead of waiting for them, P2PWebDriver
+and P2PSession hand them to the CleanupExecutor, so that parsing the
+statement and evaluating the next platform can start immediately. The worker
+waits for all pending cleanups only at the end of the run and reports the
+ones which failed.
+
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import concurrent.futures
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+
+from PyQt5.QtCore import QCoreApplication
+
+from easyp2p.p2p_signals import PlatformFailedError
+
+_translate = QCoreApplication.translate
+
+
+class CleanupExecutor:
+
+    """Runs the logout and teardown of P2P platforms in the background."""
+
+    # Maximal time in seconds to wait for all cleanups at the end of the run
+    TIMEOUT = 60.
+
+    def __init__(
+            self, max_workers: int = 4,
+            timeout: Optional[float] = None) -> None:
+        """
+        Constructor of CleanupExecutor.
+
+        Args:
+            max_workers: Maximal number of cleanups which run at the same
+                time.
+            timeout: Maximal time in seconds to wait for all cleanups in
+                wait. If None, TIMEOUT is used.
+
+        """
+        self.logger = logging.getLogger(
+            'easyp2p.p2p_cleanup.CleanupExecutor')
+        self.timeout = timeout or self.TIMEOUT
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='easyp2p-cleanup')
+        self._pending: List[Tuple[str, Future]] = []
+
+    def submit(self, name: str, func: Callable[[], None]) -> None:
+        """
+        Run func in the background.
+
+        Args:
+            name: Name of the P2P platform which is cleaned up.
+            func: Function which performs the cleanup. Errors must be raised,
+                since the signals of the platform are not connected anymore.
+
+        """
+        self.logger.debug('%s: starting cleanup.', name)
+        self._pending.append((name, self._executor.submit(func)))
+
+    def wait(self) -> List[str]:
+        """
+        Wait for all pending cleanups and stop the executor.
+
+        Returns:
+            Error messages of all cleanups which failed or did not finish in
+            time.
+
+        """
+        deadline = time.monotonic() + self.timeout
+        errors = []
+        for name, future in self._pending:
+            try:
+                future.result(max(0., deadline - time.monotonic()))
+            except concurrent.futures.TimeoutError:
+                self.logger.error('%s: cleanup timed out.', name)
+                errors.append(_translate(
+                    'P2PPlatform', f'{name}: logout took too long!'))
+            except PlatformFailedError as err:
+                # The decorators of Signals keep the message in the cause
+                self.logger.error('%s: cleanup failed.', name, exc_info=True)
+                errors.append(str(err.__cause__ or err))
+            except Exception as err:  # pylint: disable=broad-except
+                self.logger.error('%s: cleanup failed.', name, exc_info=True)
+                errors.append(str(err) or _translate(
+                    'P2PPlatform', f'{name}: logout was not successful!'))
+        self._pending = []
+        # Cleanups which timed out are abandoned
+        self._executor.shutdown(wait=False)
+        return errors
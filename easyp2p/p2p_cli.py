@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Command line interface for running easyp2p without the GUI.
+
+The evaluation is done by the same WorkerThread as in the GUI, but only Qt core
+functionality is used. Progress is reported as structured events which are
+written as JSON lines to stdout by default. This allows running easyp2p on
+headless servers, e.g. from cron.
+
+Example:
+
+    easyp2p-cli --start 2020-01-01 --end 2020-03-31 -p Bondora -p Mintos \\
+        --output results.xlsx
+
+"""
+
+import argparse
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+import getpass
+import json
+import logging
+import os
+import sys
+from typing import Callable, List, Optional
+
+from PyQt5.QtCore import QCoreApplication, pyqtSlot
+
+from easyp2p.p2p_settings import Settings
+from easyp2p.p2p_worker import WorkerThread
+import easyp2p.platforms as p2p_platforms
+
+# Qt application for all evaluations of this process, see get_app
+_APP: Optional[QCoreApplication] = None
+
+
+@dataclass
+class ProgressEvent:
+    """A single progress event of a command line evaluation."""
+    kind: str  # Possible values are: progress, message, fatal, done
+    message: str = ''
+    error: bool = False
+
+
+class CliWorker(WorkerThread):
+
+    """WorkerThread which asks for missing credentials on the terminal."""
+
+    @pyqtSlot(str)
+    def get_credentials(self, platform: str) -> None:
+        """
+        Get credentials from the terminal and send them to the platform.
+
+        If stdin is not a terminal, empty credentials are sent. The platform
+        will then fail with an error message instead of waiting forever.
+
+        Args:
+            platform: Name of the P2P platform.
+
+        """
+        username, password = '', ''
+        if sys.stdin.isatty():
+            username = input(f'{platform} username: ')
+            password = getpass.getpass(f'{platform} password: ')
+        self.signals.send_credentials.emit(username, password)
+
+
+def get_platform_names() -> List[str]:
+    """
+    Get the names of all supported P2P platforms.
+
+    Returns:
+        Sorted list of platform names.
+
+    """
+    return sorted(name for name in dir(p2p_platforms) if name[0].isupper())
+
+
+def _parse_date(value: str) -> date:
+    """
+    Convert a command line date argument to a date.
+
+    Args:
+        value: Date in format YYYY-MM-DD.
+
+    Returns:
+        The date.
+
+    Raises:
+        argparse.ArgumentTypeError: If value is not a valid date.
+
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'{value} is not a date in format YYYY-MM-DD!')
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Create the parser for the command line arguments.
+
+    Returns:
+        Argument parser of easyp2p-cli.
+
+    """
+    defaults = Settings((date.today(), date.today()), '')
+    parser = argparse.ArgumentParser(
+        prog='easyp2p-cli',
+        description='Download and aggregate account statements of P2P '
+        'lending platforms without GUI.')
+    parser.add_argument(
+        '--start', type=_parse_date, required=True,
+        help='start date in format YYYY-MM-DD')
+    parser.add_argument(
+        '--end', type=_parse_date, required=True,
+        help='end date in format YYYY-MM-DD')
+    parser.add_argument(
+        '-p', '--platform', action='append', dest='platforms',
+        choices=get_platform_names(), metavar='PLATFORM',
+        help='P2P platform to evaluate, can be given several times. '
+        f'Supported platforms: {", ".join(get_platform_names())}. '
+        'Default are all platforms.')
+    parser.add_argument(
+        '-o', '--output', required=True, help='Excel file for the results')
+    parser.add_argument(
+        '--directory', default=defaults.directory,
+        help='directory for downloaded statements and the log file')
+    parser.add_argument(
+        '--no-headless', action='store_false', dest='headless',
+        help='show the ChromeDriver window')
+    parser.add_argument(
+        '--concurrent', action='store_true',
+        help='evaluate platforms in parallel')
+    parser.add_argument(
+        '--max-parallel-sessions', type=int,
+        default=defaults.max_parallel_sessions,
+        help='maximum number of parallel session based platforms')
+    parser.add_argument(
+        '--max-parallel-browsers', type=int,
+        default=defaults.max_parallel_browsers,
+        help='maximum number of parallel browser based platforms')
+    parser.add_argument(
+        '--async-sessions', action='store_true',
+        help='evaluate session based platforms as coroutines on one event '
+        'loop, only used together with --concurrent, requires httpx')
+    parser.add_argument(
+        '--parse-in-processes', action='store_true',
+        help='parse the statements in a process pool')
+    parser.add_argument(
+        '--cache', action='store_true', dest='cache_statements',
+        help='reuse results of previously downloaded months')
+    parser.add_argument(
+        '--reuse-sessions', action='store_true',
+        help='stay logged in between runs, requires credentials in the '
+        'keyring')
+    return parser
+
+
+def get_settings(args: argparse.Namespace) -> Settings:
+    """
+    Create the easyp2p settings from the command line arguments.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        Settings for easyp2p.
+
+    """
+    platforms = args.platforms or get_platform_names()
+    return Settings(
+        (args.start, args.end), os.path.abspath(args.output),
+        directory=args.directory, headless=args.headless,
+        platforms=set(platforms), concurrent=args.concurrent,
+        max_parallel_sessions=args.max_parallel_sessions,
+        max_parallel_browsers=args.max_parallel_browsers,
+        async_sessions=args.async_sessions,
+        parse_in_processes=args.parse_in_processes,
+        cache_statements=args.cache_statements,
+        reuse_sessions=args.reuse_sessions)
+
+
+def get_app() -> QCoreApplication:
+    """
+    Get the Qt application which delivers the signals of the worker thread.
+
+    The application is created on the first call and kept until the process
+    ends. Destroying it would also destroy the class level Signals instances
+    of all worker classes.
+
+    Returns:
+        The running Qt application or a new QCoreApplication.
+
+    """
+    global _APP  # pylint: disable=global-statement
+    if _APP is None:
+        _APP = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    return _APP
+
+
+def run_evaluation(
+        settings: Settings,
+        on_event: Callable[[ProgressEvent], None]) -> bool:
+    """
+    Evaluate all P2P platforms in settings without GUI.
+
+    Args:
+        settings: Settings for easyp2p.
+        on_event: Callback which is called in the calling thread for each
+            progress event.
+
+    Returns:
+        True if results were written to the output file, False otherwise.
+
+    """
+    app = get_app()
+    worker = CliWorker(settings)
+    worker.signals.abort = False
+
+    def on_progress() -> None:
+        on_event(ProgressEvent('progress'))
+
+    def on_message(txt: str, error: bool) -> None:
+        on_event(ProgressEvent('message', txt, error))
+
+    def on_fatal(error_msg: str, header: str) -> None:
+        on_event(ProgressEvent('fatal', f'{header}: {error_msg}', True))
+        worker.signals.abort_signal.emit()
+
+    # WorkerThread.signals is shared by all instances, so all handlers must be
+    # disconnected again after the evaluation
+    connections = [
+        (worker.signals.update_progress_bar, on_progress),
+        (worker.signals.add_progress_text, on_message),
+        (worker.signals.end_easyp2p, on_fatal)]
+    for signal, slot in connections:
+        signal.connect(slot)
+    worker.finished.connect(app.quit)
+
+    try:
+        worker.start()
+        app.exec_()
+        worker.wait()
+    finally:
+        for signal, slot in connections:
+            signal.disconnect(slot)
+        worker.signals.get_credentials.disconnect(worker.get_credentials)
+
+    success = worker.results_written
+    on_event(ProgressEvent('done', settings.output_file, not success))
+    return success
+
+
+def print_event(event: ProgressEvent) -> None:
+    """
+    Write a progress event as a single JSON line to stdout.
+
+    Args:
+        event: Progress event.
+
+    """
+    print(json.dumps(asdict(event)), flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of easyp2p-cli.
+
+    Args:
+        argv: Command line arguments. If None sys.argv will be used.
+
+    Returns:
+        Exit code: 0 on success, 1 if no results were written.
+
+    """
+    args = get_parser().parse_args(argv)
+    settings = get_settings(args)
+    if settings.date_range[0] > settings.date_range[1]:
+        get_parser().error('Start date must be before end date!')
+
+    os.makedirs(settings.directory, exist_ok=True)
+    logging.basicConfig(
+        filename=os.path.join(settings.directory, 'easyp2p.log'),
+        filemode='w', level=logging.DEBUG)
+
+    return 0 if run_evaluation(settings, print_event) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""
+Module implementing CookieStore, an encrypted on-disk store for session cookies.
+
+Persisting the cookies of a P2P platform allows re-using a still valid login
+session in the next run instead of logging in again. The cookies are encrypted
+with a random key which is saved in the system keyring next to the platform
+credentials. Thus cookies can only be stored for platforms whose credentials
+are saved in the keyring and deleting the credentials also makes the stored
+cookies unusable.
+
+Encryption requires the optional cryptography package. If it is not installed
+cookies are never stored.
+
+"""
+
+from http.cookiejar import CookieJar
+import json
+import logging
+import os
+from typing import Optional
+
+import keyring
+from keyring.errors import KeyringError
+from requests.cookies import RequestsCookieJar, create_cookie
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+
+# Keyring user name under which the cookie key of a platform is saved
+COOKIE_KEY_NAME = 'easyp2p_cookie_key'
+
+
+def delete_cookie_key(platform: str) -> None:
+    """
+    Delete the cookie key of platform from the keyring.
+
+    All cookies which were stored for platform can no longer be decrypted
+    afterwards.
+
+    Args:
+        platform: Name of the P2P platform.
+
+    """
+    try:
+        if keyring.get_password(platform, COOKIE_KEY_NAME) is not None:
+            keyring.delete_password(platform, COOKIE_KEY_NAME)
+    except KeyringError:
+        logging.getLogger('easyp2p.p2p_cookies').warning(
+            'Deleting cookie key of %s failed.', platform, exc_info=True)
+
+
+class CookieStore:
+
+    """Encrypted on-disk store for the session cookies of a P2P platform."""
+
+    def __init__(self, platform: str, file_name: str) -> None:
+        """
+        Constructor of CookieStore.
+
+        Args:
+            platform: Name of the P2P platform.
+            file_name: File name including path where the encrypted cookies
+                are saved.
+
+        """
+        self.platform = platform
+        self.file_name = file_name
+        self.logger = logging.getLogger('easyp2p.p2p_cookies.CookieStore')
+
+    def _get_username(self) -> Optional[str]:
+        """
+        Get the user name of the platform from the keyring.
+
+        Returns:
+            User name or None if the platform is not saved in the keyring.
+
+        """
+        try:
+            return keyring.get_password(self.platform, 'username')
+        except KeyringError:
+            return None
+
+    def _get_fernet(self, create: bool = False) -> Optional['Fernet']:
+        """
+        Get the Fernet instance for encrypting the cookies.
+
+        Args:
+            create: If True a new key is created if none exists yet.
+
+        Returns:
+            Fernet instance or None if cookies cannot be encrypted, i.e. if
+            cryptography is not installed or no key is available.
+
+        """
+        if Fernet is None:
+            return None
+        try:
+            key = keyring.get_password(self.platform, COOKIE_KEY_NAME)
+            if key is None and create:
+                key = Fernet.generate_key().decode()
+                keyring.set_password(self.platform, COOKIE_KEY_NAME, key)
+        except KeyringError:
+            self.logger.warning(
+                '%s: no cookie key available.', self.platform, exc_info=True)
+            return None
+        return Fernet(key.encode()) if key else None
+
+    def load(self) -> Optional[RequestsCookieJar]:
+        """
+        Load the stored cookies.
+
+        Returns:
+            Cookie jar or None if no usable cookies are stored.
+
+        """
+        username = self._get_username()
+        fernet = self._get_fernet()
+        if username is None or fernet is None \
+                or not os.path.isfile(self.file_name):
+            return None
+
+        try:
+            with open(self.file_name, 'rb') as file:
+                content = json.loads(fernet.decrypt(file.read()))
+        except (OSError, ValueError, InvalidToken):
+            self.logger.warning(
+                '%s: stored cookies cannot be read.', self.platform,
+                exc_info=True)
+            self.delete()
+            return None
+
+        # Cookies of another account must not be used
+        if content.get('username') != username:
+            self.logger.debug(
+                '%s: stored cookies belong to another user.', self.platform)
+            self.delete()
+            return None
+
+        jar = RequestsCookieJar()
+        for cookie in content['cookies']:
+            jar.set_cookie(create_cookie(**cookie))
+        self.logger.debug(
+            '%s: loaded %d cookies.', self.platform, len(jar))
+        return jar
+
+    def save(self, jar: CookieJar) -> bool:
+        """
+        Encrypt and save the cookies in jar.
+
+        Args:
+            jar: Cookie jar of the session.
+
+        Returns:
+            True if the cookies were saved, False if not.
+
+        """
+        username = self._get_username()
+        fernet = self._get_fernet(create=True)
+        if username is None or fernet is None:
+            return False
+
+        cookies = [
+            {
+                'name': cookie.name, 'value': cookie.value,
+                'domain': cookie.domain, 'path': cookie.path,
+                'secure': cookie.secure, 'expires': cookie.expires,
+            } for cookie in jar]
+        token = fernet.encrypt(
+            json.dumps({'username': username, 'cookies': cookies}).encode())
+        try:
+            os.makedirs(
+                os.path.dirname(self.file_name) or '.', exist_ok=True)
+            with open(os.open(
+                    self.file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                    0o600), 'wb') as file:
+                file.write(token)
+        except OSError:
+            self.logger.warning(
+                '%s: saving cookies failed.', self.platform, exc_info=True)
+            return False
+        self.logger.debug('%s: saved %d cookies.', self.platform, len(cookies))
+        return True
+
+    def delete(self) -> None:
+        """Delete the stored cookies."""
+        if os.path.isfile(self.file_name):
+            os.remove(self.file_name)
@@ -5,17 +5,22 @@
 Module for getting and saving credentials in the system keyring / from the user.
 
 """
+import threading
 from typing import Optional, Tuple
 
 import keyring
 from keyring.errors import PasswordDeleteError
 from PyQt5.QtCore import QCoreApplication, QObject, pyqtSignal, QEventLoop, pyqtSlot
 
+from easyp2p.p2p_cookies import delete_cookie_key
 from easyp2p.p2p_signals import Signals
-from easyp2p.ui.credentials_window import CredentialsWindow
 
 _translate = QCoreApplication.translate
 
+# Only one credentials dialog may be open at a time, otherwise credentials for
+# platforms which are evaluated in parallel could get mixed up
+_user_prompt_lock = threading.Lock()
+
 
 def keyring_exists() -> bool:
     """
@@ -68,6 +73,10 @@ def get_credentials_from_user(
         Tuple (username, password)
 
     """
+    # Import the dialog only when needed, so that easyp2p can also run without
+    # the Qt widgets, e.g. from the command line
+    from easyp2p.ui.credentials_window import CredentialsWindow
+
     cred_window = CredentialsWindow(
         platform, keyring.get_keyring(), save_in_keyring)
     cred_window.exec_()
@@ -102,8 +111,9 @@ def get_credentials(platform: str, signals: Signals) -> Tuple[str, str]:
     """
     credentials = get_credentials_from_keyring(platform)
     if credentials is None:
-        credential_receiver = CredentialReceiver(signals)
-        credentials = credential_receiver.wait_for_credentials(platform)
+        with _user_prompt_lock:
+            credential_receiver = CredentialReceiver(signals)
+            credentials = credential_receiver.wait_for_credentials(platform)
 
     if credentials[0] == '' or credentials[1] == '':
         raise RuntimeError(_translate(
@@ -150,6 +160,7 @@ def delete_platform_from_keyring(platform: str) -> bool:
                     'p2p_credentials', f'{platform} was not found in keyring!'))
         keyring.delete_password(platform, username)
         keyring.delete_password(platform, 'username')
+        delete_cookie_key(platform)
     except PasswordDeleteError:
         return False
     return True
@@ -183,6 +194,8 @@ def save_platform_in_keyring(
     try:
         keyring.set_password(platform, 'username', username)
         keyring.set_password(platform, username, password)
+        # Stored sessions belong to the old credentials
+        delete_cookie_key(platform)
     except keyring.errors.PasswordSetError:
         return False
     return True
@@ -228,6 +241,8 @@ class CredentialReceiver(QObject):
 
         """
         self.get_credentials.emit(platform)
-        self.event_loop = QEventLoop(self)
-        self.event_loop.exec()
+        # Directly connected receivers answer before emit returns
+        if self.credentials is None:
+            self.event_loop = QEventLoop(self)
+            self.event_loop.exec()
         return self.credentials
@@ -10,12 +10,14 @@ single output format.
 
 """
 from datetime import date
+from functools import lru_cache
 import logging
 from pathlib import Path
-from typing import Mapping, Optional, Tuple
+from typing import Dict, Iterable, Mapping, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
 from pandas.errors import ParserError
 from PyQt5.QtCore import QCoreApplication
 
@@ -24,6 +26,12 @@ from easyp2p.p2p_signals import Signals
 _translate = QCoreApplication.translate
 logger = logging.getLogger('easyp2p.p2p_parser')
 
+# Widths of the date format directives which can be parsed by slicing
+_FIXED_WIDTH_DIRECTIVES = {
+    '%Y': 4, '%m': 2, '%d': 2, '%H': 2, '%M': 2, '%S': 2}
+# Maximal values of the time of day directives
+_TIME_LIMITS = {'%H': 23, '%M': 59, '%S': 59}
+
 
 class P2PParser:
     """
@@ -78,7 +86,9 @@ class P2PParser:
     def __init__(
             self, name: str, date_range: Tuple[date, date],
             statement_file_name: str, header: int = 0,
-            skipfooter: int = 0, signals: Optional[Signals] = None) -> None:
+            skipfooter: int = 0, signals: Optional[Signals] = None,
+            usecols: Optional[Iterable[str]] = None,
+            dtype: Optional[Mapping[str, str]] = None) -> None:
         """
         Constructor of P2PParser class.
 
@@ -92,16 +102,24 @@ class P2PParser:
                 statement.
             skipfooter: Rows to skip at the end of the statement.
             signals: Signals instance for communicating with the calling class.
+            usecols: Columns of the statement which should be read. If None,
+                all columns are read.
+            dtype: Data types of statement columns. Types of all other columns
+                are inferred.
 
         Raises:
             RuntimeError: If the account statement could not be loaded from
                 statement file
 
         """
+        # Platforms which are parsed in parallel must not share the
+        # connections of their signals
+        self.signals = P2PParser.signals.instance_signals()
         self.name = name
         self.date_range = date_range
         self.df = get_df_from_file(
-            statement_file_name, header=header, skipfooter=skipfooter)
+            statement_file_name, header=header, skipfooter=skipfooter,
+            usecols=usecols, dtype=dtype)
         self.logger = logging.getLogger('easyp2p.p2p_parser.P2PParser')
         if signals:
             self.signals.connect_signals(signals)
@@ -141,28 +159,60 @@ class P2PParser:
         self.logger.debug(
             '%s: start aggregating results in column %s.',
             self.name, value_column)
-        orig_df = self.df
-        if value_column:
-            self.df = self.df.pivot_table(
-                values=value_column, index=[self.DATE, self.CURRENCY],
-                columns=[self.CF_TYPE], aggfunc=np.sum)
-            self.df.reset_index(inplace=True)
-        self.df.fillna(0, inplace=True)
-
-        # Start and end balance columns were summed up as well if they were
-        # present. That's obviously not correct, so we will look up the correct
-        # values in the original DataFrame and overwrite the sums.
+        if not value_column:
+            self.df.fillna(0, inplace=True)
+            self.logger.debug('%s: finished aggregating results.', self.name)
+            return
+
+        # Factorize dates and currencies once and combine them to one group
+        # key per row. Rows without date or currency are ignored.
+        date_codes, dates = pd.factorize(self.df[self.DATE], sort=True)
+        cur_codes, currencies = pd.factorize(self.df[self.CURRENCY], sort=True)
+        rows = np.flatnonzero((date_codes >= 0) & (cur_codes >= 0))
+        group_keys, groups = np.unique(
+            date_codes[rows] * len(currencies) + cur_codes[rows],
+            return_inverse=True)
+        all_values = self.df[value_column].to_numpy(dtype=float)
+        values = all_values[rows]
+
+        # Sum up the values per group and cash flow type
+        cf_codes, cf_types = pd.factorize(
+            self.df[self.CF_TYPE].iloc[rows], sort=True)
+        has_cf_type = cf_codes >= 0
+        sums = np.bincount(
+            groups[has_cf_type] * len(cf_types) + cf_codes[has_cf_type],
+            weights=np.nan_to_num(values[has_cf_type]),
+            minlength=len(group_keys) * len(cf_types)).reshape(
+                len(group_keys), len(cf_types))
+
+        # Only keep groups which contain at least one known cash flow type
+        keep = np.bincount(
+            groups[has_cf_type], minlength=len(group_keys)) > 0
+        result = pd.DataFrame(
+            sums[keep], columns=pd.Index(cf_types, name=self.CF_TYPE))
+        result.insert(
+            0, self.DATE, dates[group_keys[keep] // len(currencies)])
+        result.insert(
+            1, self.CURRENCY, currencies[group_keys[keep] % len(currencies)])
+
         if balance_column:
             # The start balance value of each day already includes the first
             # daily cash flow which needs to be subtracted again
-            self.df[self.START_BALANCE_NAME] = \
-                (orig_df.groupby([self.DATE, self.CURRENCY]).first()[
-                    balance_column]
-                 - orig_df.groupby(self.DATE).first()[
-                     value_column]).reset_index()[0]
-            self.df[self.END_BALANCE_NAME] = \
-                orig_df.groupby([self.DATE, self.CURRENCY]).last()[
-                    balance_column].reset_index()[balance_column]
+            balances = self.df[balance_column].to_numpy(dtype=float)[rows]
+            date_rows = np.flatnonzero(date_codes >= 0)
+            first_values = _first_per_group(
+                date_codes[date_rows], all_values[date_rows], len(dates))
+            start_balances = \
+                _first_per_group(groups, balances, len(group_keys)) \
+                - first_values[group_keys // len(currencies)]
+            end_balances = _first_per_group(
+                groups, balances, len(group_keys), last=True)
+            # Balances are assigned by position of the group among all
+            # groups, including the ones without known cash flow types
+            result[self.START_BALANCE_NAME] = start_balances[:len(result)]
+            result[self.END_BALANCE_NAME] = end_balances[:len(result)]
+
+        self.df = result
         self.logger.debug('%s: finished aggregating results.', self.name)
 
     def _filter_date_range(self, date_format: str) -> None:
@@ -175,15 +225,10 @@ class P2PParser:
         """
         self.logger.debug('%s: filter date range.', self.name)
         start_date = pd.Timestamp(self.date_range[0])
-        end_date = pd.Timestamp(self.date_range[1]).replace(
-            hour=23, minute=59, second=59)
-        self.df[self.DATE] = pd.to_datetime(
-            self.df[self.DATE], format=date_format)
-        self.df = self.df[
-            (self.df[self.DATE] >= start_date)
-            & (self.df[self.DATE] <= end_date)]
-        # Convert date column from datetime to date:
-        self.df[self.DATE] = self.df[self.DATE].dt.date
+        end_date = pd.Timestamp(self.date_range[1])
+        dates = parse_dates(self.df[self.DATE], date_format)
+        self.df[self.DATE] = dates
+        self.df = self.df[(dates >= start_date) & (dates <= end_date)]
         self.logger.debug('%s: filter date range finished.', self.name)
 
     def _map_cashflow_types(
@@ -211,30 +256,29 @@ class P2PParser:
             '%s: mapping cash flow types %s contained in column %s.',
             self.name, str(cashflow_types.keys()), orig_cf_column)
 
-        self.df[orig_cf_column] = self.df[orig_cf_column].str.strip()
-        self.df[self.CF_TYPE] = self.df[orig_cf_column].map(cashflow_types)
+        # Statements contain only a few distinct cash flow types, so strip and
+        # map the unique values instead of every single row
+        codes, orig_types = pd.factorize(self.df[orig_cf_column])
+        orig_types = pd.Index(orig_types).str.strip()
+        mapped_types = orig_types.map(cashflow_types)
 
         # All unknown cash flow types will be NaN
-        unknown_cf_types = self.df[orig_cf_column].where(
-            self.df[self.CF_TYPE].isna()).dropna().tolist()
-
-        # Remove duplicates, sort the entries and make them immutable
-        unknown_cf_types = tuple(sorted(set(unknown_cf_types)))
+        unknown = mapped_types.isna() & orig_types.notna()
+        unknown_cf_types = tuple(sorted(set(orig_types[unknown])))
+
+        # Several platform types can map to the same easyp2p type. Codes of
+        # rows with missing or unknown cash flow types are set to -1 (NaN).
+        type_codes, cf_types = pd.factorize(mapped_types)
+        type_codes = np.append(type_codes, -1)
+        self.df[self.CF_TYPE] = pd.Categorical.from_codes(
+            type_codes[codes], categories=cf_types)
         self.logger.debug('%s: mapping successful.', self.name)
         return unknown_cf_types
 
     def _add_zero_line(self):
         """Add a single zero cash flow for start date to the DataFrame."""
         self.logger.debug('%s: adding zero cash flow.', self.name)
-        data = [
-            (self.name, 'EUR', self.date_range[0],
-             *[0.] * len(self.TARGET_COLUMNS))]
-        columns = [
-            self.PLATFORM, self.CURRENCY, self.DATE,
-            *self.TARGET_COLUMNS]
-        self.df = pd.DataFrame(data=data, columns=columns)
-        self.df.set_index(
-            [self.PLATFORM, self.CURRENCY, self.DATE], inplace=True)
+        self.df = get_zero_line(self.name, self.date_range[0])
         self.logger.debug('%s: added zero cash flow.', self.name)
 
     @signals.watch_errors
@@ -362,15 +406,190 @@ class P2PParser:
         self.df = self.df.round(4)
 
         # Disconnect signals
-        if self.signals:
-            self.signals.disconnect_signals()
+        self.signals.disconnect_signals()
 
         self.logger.debug('%s: parser completed successfully.', self.name)
         return unknown_cf_types
 
 
+def _first_per_group(
+        groups: np.ndarray, values: np.ndarray, size: int,
+        last: bool = False) -> np.ndarray:
+    """
+    Get the first or last value per group which is not NaN.
+
+    Args:
+        groups: Group number of each value.
+        values: Values which should be looked up.
+        size: Number of groups.
+        last: If True the last instead of the first value is returned.
+
+    Returns:
+        Array of length size with the first or last value of each group or
+        NaN if a group does not contain any values.
+
+    """
+    result = np.full(size, np.nan)
+    idx = np.flatnonzero(~np.isnan(values))
+    if last:
+        idx = idx[::-1]
+    found, first = np.unique(groups[idx], return_index=True)
+    result[found] = values[idx[first]]
+    return result
+
+
+def parse_dates(dates: pd.Series, date_format: str) -> pd.Series:
+    """
+    Convert the dates of an account statement to datetime64 values.
+
+    Dates which are already datetime64 values are not parsed again. Fixed
+    width formats like '%d.%m.%Y %H:%M' are parsed by slicing the digits, all
+    other formats by pandas.to_datetime.
+
+    Args:
+        dates: Dates which should be converted.
+        date_format: Date format which the platform uses.
+
+    Returns:
+        Converted dates without the time of day.
+
+    Raises:
+        ValueError: If dates do not match date_format.
+
+    """
+    if is_datetime64_any_dtype(dates):
+        return dates.dt.normalize()
+
+    parsed = _parse_fixed_width_dates(dates.to_numpy(), date_format)
+    if parsed is not None:
+        return pd.Series(parsed, index=dates.index, name=dates.name)
+
+    return pd.to_datetime(dates, format=date_format).dt.normalize()
+
+
+@lru_cache(maxsize=None)
+def _get_date_layout(date_format: str) \
+        -> Optional[Tuple[Dict[str, int], Tuple[Tuple[int, str], ...], int]]:
+    """
+    Get the positions of all fields in strings of a fixed width date format.
+
+    Args:
+        date_format: Date format in strptime notation.
+
+    Returns:
+        Tuple with the start positions of all directives, the positions of
+        all literal characters and the width of the date strings or None if
+        date_format does not have a fixed width.
+
+    """
+    fields = {}
+    literals = []
+    pos = 0
+    i = 0
+    while i < len(date_format):
+        if date_format[i] == '%':
+            directive = date_format[i:i + 2]
+            if directive not in _FIXED_WIDTH_DIRECTIVES or directive in fields:
+                return None
+            fields[directive] = pos
+            pos += _FIXED_WIDTH_DIRECTIVES[directive]
+            i += 2
+        else:
+            literals.append((pos, date_format[i]))
+            pos += 1
+            i += 1
+    if not {'%Y', '%m', '%d'} <= fields.keys():
+        return None
+    return fields, tuple(literals), pos
+
+
+def _parse_fixed_width_dates(
+        values: np.ndarray, date_format: str) -> Optional[np.ndarray]:
+    """
+    Parse date strings of a fixed width format by slicing their digits.
+
+    Args:
+        values: Array of date strings.
+        date_format: Date format in strptime notation.
+
+    Returns:
+        Array of datetime64[D] values or None if date_format does not have a
+        fixed width or at least one value does not match it exactly.
+
+    """
+    layout = _get_date_layout(date_format)
+    if layout is None or values.dtype != object:
+        return None
+    fields, literals, width = layout
+
+    # One more character than the format width to detect longer strings.
+    # Each row of chars contains one character position of all dates.
+    try:
+        chars = values.astype(f'S{width + 1}').view(np.uint8).reshape(
+            len(values), width + 1).T.copy()
+    except (TypeError, ValueError, UnicodeEncodeError):
+        return None
+    if chars[width].any():
+        return None
+    for pos, literal in literals:
+        if (chars[pos] != ord(literal)).any():
+            return None
+
+    numbers = {}
+    for directive, start in fields.items():
+        number = np.zeros(len(values), dtype=np.int64)
+        for pos in range(start, start + _FIXED_WIDTH_DIRECTIVES[directive]):
+            # Characters below '0' wrap around and are larger than 9, too
+            digit = chars[pos] - np.uint8(ord('0'))
+            if (digit > 9).any():
+                return None
+            number = number * 10 + digit
+        numbers[directive] = number
+
+    for directive, limit in _TIME_LIMITS.items():
+        if directive in numbers and (numbers[directive] > limit).any():
+            return None
+    if ((numbers['%m'] < 1) | (numbers['%m'] > 12)
+            | (numbers['%d'] < 1)).any():
+        return None
+
+    months = ((numbers['%Y'] - 1970) * 12 + numbers['%m'] - 1).astype(
+        'datetime64[M]')
+    result = months.astype('datetime64[D]') + (numbers['%d'] - 1)
+    # Days which do not exist in their month would end up in the next month
+    if (result.astype('datetime64[M]') != months).any():
+        return None
+    return result
+
+
+def get_zero_line(name: str, start_date: date) -> pd.DataFrame:
+    """
+    Create a parser result which contains a single zero cash flow.
+
+    Args:
+        name: Name of the P2P platform.
+        start_date: Date of the zero cash flow.
+
+    Returns:
+        DataFrame in easyp2p format with one line of zeros.
+
+    """
+    data = [(
+        name, 'EUR', pd.Timestamp(start_date),
+        *[0.] * len(P2PParser.TARGET_COLUMNS))]
+    columns = [
+        P2PParser.PLATFORM, P2PParser.CURRENCY, P2PParser.DATE,
+        *P2PParser.TARGET_COLUMNS]
+    df = pd.DataFrame(data=data, columns=columns)
+    df.set_index(
+        [P2PParser.PLATFORM, P2PParser.CURRENCY, P2PParser.DATE], inplace=True)
+    return df
+
+
 def get_df_from_file(
-        input_file: str, header: int = 0, skipfooter: int = 0) -> pd.DataFrame:
+        input_file: str, header: int = 0, skipfooter: int = 0,
+        usecols: Optional[Iterable[str]] = None,
+        dtype: Optional[Mapping[str, str]] = None) -> pd.DataFrame:
     """
     Read a pandas.DataFrame from input_file.
 
@@ -378,6 +597,9 @@ def get_df_from_file(
         input_file: File name including path.
         header: Row number to use as column names and start of data.
         skipfooter: Rows to skip at the end of the statement.
+        usecols: Columns which should be read. If None, all columns are read.
+            Columns which are missing in the file are ignored.
+        dtype: Data types of columns. Types of all other columns are inferred.
 
     Returns:
         pandas.DataFrame: DataFrame which was read from the file.
@@ -389,18 +611,23 @@ def get_df_from_file(
     """
 
     file_format = Path(input_file).suffix
+    kwargs = {'header': header, 'dtype': dtype}
+    if usecols is not None:
+        # Missing columns are reported by P2PParser.check_columns instead
+        columns = set(usecols)
+        kwargs['usecols'] = lambda column: column in columns
 
     try:
         if file_format == '.csv':
             if skipfooter:
                 # The default 'c' engine does not support skipfooter
                 df = pd.read_csv(
-                    input_file, header=header, skipfooter=skipfooter,
-                    engine='python')
+                    input_file, skipfooter=skipfooter, engine='python',
+                    **kwargs)
             else:
-                df = pd.read_csv(input_file, header=header)
+                df = pd.read_csv(input_file, **kwargs)
         elif file_format in ('.xlsx', '.xls'):
-            df = pd.read_excel(input_file, header=header, skipfooter=skipfooter)
+            df = pd.read_excel(input_file, skipfooter=skipfooter, **kwargs)
         else:
             raise RuntimeError(_translate(
                 'P2PParser', 'Unknown file format during import:'), input_file)
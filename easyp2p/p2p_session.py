@@ -7,23 +7,557 @@ This module defines the P2PSession class. It contains code for performing log
 in, log out, generating and downloading the account statement. It relies mainly
 on functionality provided by the requests Session object.
 
+Transient errors are retried according to a RetryPolicy which can be
+configured per P2P platform. All sessions share one connection pool per pool
+size so that connections to the same host are kept alive and reused. Waiting
+for the generation of account statements follows a PollPolicy which starts
+with a short delay and backs off exponentially up to an overall deadline.
+
+The handling of these policies, checking responses and saving downloads is
+implemented in BaseSession, which is shared with AsyncP2PSession. Platforms
+write their download steps once as a coroutine. AwaitableSession and run_sync
+allow running such a coroutine with a blocking P2PSession.
+
 """
 
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
 import logging
+import os
+import random
+import tempfile
+import threading
 import time
-from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+from typing import (
+    Awaitable, Callable, Coroutine, Dict, Mapping, Optional, Sequence, Tuple,
+    Union)
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from PyQt5.QtCore import QCoreApplication
 import requests
+from requests.adapters import HTTPAdapter
 
+from easyp2p.p2p_cleanup import CleanupExecutor
+from easyp2p.p2p_cookies import CookieStore
 from easyp2p.p2p_credentials import get_credentials
 from easyp2p.p2p_signals import Signals
 
 _translate = QCoreApplication.translate
 
+# Process-wide HTTP adapters, one per pool size. They are shared by all
+# P2PSession instances and are never closed.
+_adapters: Dict[int, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+
+
+def get_shared_adapter(pool_maxsize: int) -> HTTPAdapter:
+    """
+    Get the process-wide HTTP adapter for the given pool size.
+
+    The adapter keeps one connection pool per host. Sessions which mount the
+    same adapter therefore reuse each other's keep-alive connections instead
+    of doing a new TCP and TLS handshake.
+
+    Args:
+        pool_maxsize: Maximal number of connections which are kept alive per
+            host.
+
+    Returns:
+        Shared HTTP adapter. Retries are disabled since they are handled by
+        P2PSession.request.
+
+    """
+    with _adapters_lock:
+        if pool_maxsize not in _adapters:
+            _adapters[pool_maxsize] = HTTPAdapter(
+                pool_maxsize=pool_maxsize, max_retries=0)
+        return _adapters[pool_maxsize]
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+
+    """Policy for retrying failed requests of a P2P platform."""
+
+    # Maximal number of attempts per request including the first one
+    max_attempts: int = 3
+    # HTTP status codes which indicate a transient error
+    status_codes: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    # Only idempotent methods are retried since e.g. a repeated post could
+    # generate a second account statement
+    methods: Tuple[str, ...] = ('get',)
+    # Base delay in seconds, it is doubled after each failed attempt
+    backoff_factor: float = 1.
+    # Upper limit for the delay between two attempts in seconds
+    max_backoff: float = 30.
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get the delay before the next attempt.
+
+        The delay is chosen randomly between zero and the exponential backoff
+        ("full jitter") to avoid that parallel requests retry at the same time.
+
+        Args:
+            attempt: Number of the attempt which just failed, starting at 1.
+
+        Returns:
+            Delay in seconds.
+
+        """
+        backoff = min(
+            self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        return random.uniform(0, backoff)
+
+
+@dataclass(frozen=True)
+class PollPolicy:
+
+    """Policy for polling until a generated account statement is ready."""
+
+    # Delay in seconds before the second check, the first one is immediate
+    first_delay: float = 0.3
+    # Factor by which the delay grows after each unsuccessful check
+    factor: float = 2.
+    # Upper limit for the delay between two checks in seconds
+    max_delay: float = 5.
+    # Overall time in seconds after which waiting is given up
+    deadline: float = 30.
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get the delay before the next check.
+
+        Args:
+            attempt: Number of the check which just failed, starting at 1.
+
+        Returns:
+            Delay in seconds.
+
+        """
+        return min(self.max_delay, self.first_delay * self.factor ** (
+            attempt - 1))
+
+
+class BaseSession:
+    """
+    Logic which is shared by P2PSession and AsyncP2PSession.
+
+    BaseSession does not send any requests itself. It contains everything
+    which does not depend on the HTTP library: applying the retry and poll
+    policies, checking responses, saving downloads atomically and keeping the
+    session cookies. Child classes only add the blocking or asynchronous
+    input/output around it. They must define the class attribute signals.
+
+    """
+
+    # Signals for communicating with the GUI, defined by each child class
+    signals: Signals
+
+    # Size in bytes of the chunks in which statements are downloaded
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    # Default (connect, read) timeouts in seconds
+    TIMEOUT = (10., 60.)
+
+    # Default number of connections per host which are kept alive
+    POOL_MAXSIZE = 4
+
+    def __init__(
+            self, name: str, logout_url: str,
+            signals: Optional[Signals], json: bool = False,
+            retry_policy: Optional[RetryPolicy] = None,
+            timeout: Optional[Tuple[float, float]] = None,
+            pool_maxsize: Optional[int] = None,
+            cookie_store: Optional[CookieStore] = None,
+            poll_policy: Optional[PollPolicy] = None) -> None:
+        """
+        Constructor of BaseSession class.
+
+        See P2PSession.__init__ for the arguments.
+
+        """
+        self.name = name
+        self.logout_url = logout_url
+        self.json = json
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout or self.TIMEOUT
+        self.pool_maxsize = pool_maxsize or self.POOL_MAXSIZE
+        self.cookie_store = cookie_store
+        self.poll_policy = poll_policy or PollPolicy()
+        self.retries = 0
+        self.sess = None
+        self.logged_in = False
+        # Parallel platforms must not share the connections of their signals
+        self.signals = type(self).signals.instance_signals()
+        if signals:
+            self.signals.connect_signals(signals)
+        self.logger = logging.getLogger(
+            f'{type(self).__module__}.{type(self).__name__}')
+        self.logger.debug(
+            '%s: created %s instance.', self.name, type(self).__name__)
+
+    def _keep_session(self, exc_type, cookies: CookieJar) -> bool:
+        """
+        Save the session cookies if the session should be continued.
+
+        Args:
+            exc_type: Type of the exception which ended the context or None.
+            cookies: Current cookies of the session.
+
+        Returns:
+            True if the cookies were saved and no logout is needed.
+
+        """
+        if self.retries:
+            self.logger.info(
+                '%s: %d requests were retried.', self.name, self.retries)
+        if self.cookie_store is None:
+            return False
+        if exc_type is None and self.logged_in \
+                and self.cookie_store.save(cookies):
+            return True
+        self.cookie_store.delete()
+        return False
+
+    def _check_logout(self, resp) -> None:
+        """
+        Check the response of the logout page.
+
+        Args:
+            resp: Response of the logout page or None if the request failed.
+
+        Raises:
+            RuntimeWarning: If logout is not successful.
+
+        """
+        if resp is None or resp.status_code != 200:
+            raise RuntimeWarning(_translate(
+                'P2PPlatform', f'{self.name}: logout was not successful!'))
+        self.logged_in = False
+
+    def _load_cookies(self, probe_url: Optional[str]) -> Optional[CookieJar]:
+        """
+        Load the cookies of the previous run, see restore_session.
+
+        Args:
+            probe_url: URL which can only be accessed by logged in users.
+
+        Returns:
+            Stored cookies or None if the session cannot be restored.
+
+        """
+        if self.cookie_store is None or probe_url is None:
+            return None
+        return self.cookie_store.load()
+
+    def _finish_restore(self, valid: bool) -> bool:
+        """
+        Keep or discard the restored session cookies.
+
+        Args:
+            valid: True if the probe request with the stored cookies
+                succeeded.
+
+        Returns:
+            valid.
+
+        """
+        if not valid:
+            self.logger.debug('%s: stored session expired.', self.name)
+            self.sess.cookies.clear()
+            self.cookie_store.delete()
+            return False
+
+        self.logged_in = True
+        self.logger.debug('%s: restored session of last run.', self.name)
+        # Replaces the progress step of the skipped login
+        self.signals.update_progress_bar.emit()
+        return True
+
+    def _login_data(
+            self, credentials: Tuple[str, str], name_field: str,
+            password_field: str,
+            data: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Add the credentials to the login request data.
+
+        Args:
+            credentials: Tuple (username, password).
+            name_field: Request field name of the username.
+            password_field: Request field name of the password.
+            data: Payload for login request.
+
+        Returns:
+            Payload including the credentials.
+
+        """
+        if data is None:
+            data = dict()
+        data[name_field] = credentials[0]
+        data[password_field] = credentials[1]
+        return data
+
+    def _login_error_msg(self) -> str:
+        """
+        Get the error message if the login fails.
+
+        Returns:
+            Translated error message.
+
+        """
+        return _translate(
+            'P2PPlatform',
+            f'{self.name}: login was not successful. Are the credentials '
+            f'correct?')
+
+    def _download_error_msg(self) -> str:
+        """
+        Get the error message if the statement download fails.
+
+        Returns:
+            Translated error message.
+
+        """
+        return _translate(
+            'P2PPlatform',
+            f'{self.name}: download of account statement failed!')
+
+    def _generation_error_msg(self) -> str:
+        """
+        Get the error message if the statement generation fails.
+
+        Returns:
+            Translated error message.
+
+        """
+        return _translate(
+            'P2PPlatform',
+            f'{self.name}: account statement generation failed!')
+
+    def _max_attempts(self, method: str) -> int:
+        """
+        Get the number of attempts for a request with method.
+
+        Args:
+            method: HTTP method, must be either 'get' or 'post'.
+
+        Returns:
+            Maximal number of attempts according to the retry policy.
+
+        Raises:
+            RuntimeError: If method is not supported.
+
+        """
+        if method not in ('get', 'post'):
+            raise RuntimeError(_translate(
+                'P2PPlatform',
+                f'{self.name}: unknown method {method} in download_statement!'))
+        if method in self.retry_policy.methods:
+            return self.retry_policy.max_attempts
+        return 1
+
+    def _check_connection_error(
+            self, url: str, err: Exception, attempt: int, max_attempts: int,
+            error_msg: str) -> None:
+        """
+        Handle a request which failed without a response.
+
+        Args:
+            url: URL of the request.
+            err: Exception raised by the HTTP library.
+            attempt: Number of the failed attempt, starting at 1.
+            max_attempts: Maximal number of attempts.
+            error_msg: Error message if the request cannot be retried.
+
+        Raises:
+            RuntimeError: If this was the last attempt.
+
+        """
+        self.logger.debug(
+            '%s: request to %s failed: %s', self.name, url, str(err))
+        if attempt == max_attempts:
+            raise RuntimeError(error_msg)
+
+    def _is_retryable(
+            self, status_code: int, attempt: int, max_attempts: int) -> bool:
+        """
+        Check if a request which returned an error status can be retried.
+
+        Args:
+            status_code: Status code of the response.
+            attempt: Number of the failed attempt, starting at 1.
+            max_attempts: Maximal number of attempts.
+
+        Returns:
+            True if the status is transient and attempts are left.
+
+        """
+        self.logger.debug(
+            '%s: returned status code %s', self.name, status_code)
+        return status_code in self.retry_policy.status_codes \
+            and attempt < max_attempts
+
+    def _retry_delay(
+            self, url: str, method: str, attempt: int,
+            max_attempts: int) -> float:
+        """
+        Count a retry and get the delay before the next attempt.
+
+        Args:
+            url: URL of the request.
+            method: HTTP method of the request.
+            attempt: Number of the failed attempt, starting at 1.
+            max_attempts: Maximal number of attempts.
+
+        Returns:
+            Delay in seconds.
+
+        """
+        delay = self.retry_policy.get_delay(attempt)
+        self.retries += 1
+        self.logger.warning(
+            '%s: retrying %s %s in %.1f s (attempt %d of %d).', self.name,
+            method, url, delay, attempt + 1, max_attempts)
+        return delay
+
+    def _poll_deadline(self) -> float:
+        """
+        Get the point in time at which waiting is given up, see wait.
+
+        Returns:
+            Deadline as value of time.monotonic.
+
+        """
+        return time.monotonic() + self.poll_policy.deadline
+
+    def _poll_delay(self, deadline: float, attempt: int) -> float:
+        """
+        Get the delay before the next check of wait.
+
+        Args:
+            deadline: Deadline returned by _poll_deadline.
+            attempt: Number of the check which just failed, starting at 1.
+
+        Returns:
+            Delay in seconds.
+
+        Raises:
+            RuntimeError: If the deadline is reached.
+
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError(_translate(
+                'P2PPlatform',
+                f'{self.name}: generating the account statement page took '
+                f'too long!'))
+        return min(self.poll_policy.get_delay(attempt), remaining)
+
+    def _open_part_file(self, location: str) -> '_PartFile':
+        """
+        Open the temporary file for downloading to location.
+
+        Args:
+            location: Absolute file path where to save the download.
+
+        Returns:
+            Temporary file in the target directory.
+
+        """
+        return _PartFile(location)
+
+    def _write_chunk(self, part: '_PartFile', chunk: bytes) -> None:
+        """
+        Write a downloaded chunk and report the progress.
+
+        Args:
+            part: Temporary file of the download.
+            chunk: Downloaded bytes.
+
+        """
+        part.write(chunk)
+        self.signals.download_progress.emit(self.name, part.size)
+
+    def _download_failed(self, part: '_PartFile', error_msg: str) -> None:
+        """
+        Log a failed download, must be called in an except clause.
+
+        Args:
+            part: Temporary file of the download.
+            error_msg: Error message for the user.
+
+        Raises:
+            RuntimeError: Always.
+
+        """
+        self.logger.exception(
+            '%s: download failed after %d bytes.', self.name, part.size)
+        raise RuntimeError(error_msg)
+
+    def _download_finished(self, part: '_PartFile') -> None:
+        """
+        Log a completed download.
+
+        Args:
+            part: Committed temporary file of the download.
+
+        """
+        self.logger.debug(
+            '%s: downloaded %d bytes to %s.', self.name, part.size,
+            part.location)
+
+
+class _PartFile:
+    """
+    Temporary file for downloading a file atomically.
+
+    The download is written to a .part file in the target directory, which is
+    renamed to the target location once it is complete. Thus memory usage does
+    not depend on the file size and location never contains a partial
+    download.
 
-class P2PSession:
+    """
+
+    def __init__(self, location: str) -> None:
+        """
+        Create the temporary file.
+
+        Args:
+            location: Absolute file path where to save the download.
+
+        """
+        self.location = location
+        self.size = 0
+        fd, self.path = tempfile.mkstemp(
+            suffix='.part', prefix=os.path.basename(location) + '.',
+            dir=os.path.dirname(location) or None)
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Append chunk to the temporary file.
+
+        Args:
+            chunk: Downloaded bytes.
+
+        """
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> None:
+        """Rename the complete temporary file to the target location."""
+        self.file.close()
+        os.replace(self.path, self.location)
+
+    def discard(self) -> None:
+        """Remove the temporary file if it was not committed."""
+        self.file.close()
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class P2PSession(BaseSession):
     """
     Representation of P2P session including required methods for interaction.
 
@@ -37,7 +571,15 @@ class P2PSession:
 
     def __init__(
             self, name: str, logout_url: str,
-            signals: Optional[Signals], json: bool = False) -> None:
+            signals: Optional[Signals], json: bool = False,
+            retry_policy: Optional[RetryPolicy] = None,
+            timeout: Optional[Tuple[float, float]] = None,
+            pool_maxsize: Optional[int] = None,
+            cookie_store: Optional[CookieStore] = None,
+            poll_policy: Optional[PollPolicy] = None,
+            cookies: Optional[CookieJar] = None,
+            headers: Optional[Mapping[str, str]] = None,
+            cleanup: Optional[CleanupExecutor] = None) -> None:
         """
         Constructor of P2PSession class.
 
@@ -46,17 +588,30 @@ class P2PSession:
             logout_url: URL of the logout page.
             signals: Signals instance for communicating with the calling class.
             json: If True post data in requests in JSON format.
+            retry_policy: Policy for retrying failed requests. If None, the
+                default RetryPolicy is used.
+            timeout: Tuple (connect timeout, read timeout) in seconds for all
+                requests. If None, TIMEOUT is used.
+            pool_maxsize: Number of connections per host which are kept
+                alive. If None, POOL_MAXSIZE is used.
+            cookie_store: Store for persisting the session cookies between
+                runs. If None, the session always ends with a logout.
+            poll_policy: Policy for waiting until the account statement is
+                generated. If None, the default PollPolicy is used.
+            cookies: Cookies which are added to the session, e.g. the login
+                cookies of a browser.
+            headers: Headers which are sent with every request.
+            cleanup: If provided, the logout is done in the background by
+                this executor.
 
         """
-        self.name = name
-        self.logout_url = logout_url
-        self.json = json
-        self.sess = None
-        self.logged_in = False
-        if signals:
-            self.signals.connect_signals(signals)
-        self.logger = logging.getLogger('easyp2p.p2p_session.P2PSession')
-        self.logger.debug('%s: created P2PSession instance.', self.name)
+        super().__init__(
+            name, logout_url, signals, json=json, retry_policy=retry_policy,
+            timeout=timeout, pool_maxsize=pool_maxsize,
+            cookie_store=cookie_store, poll_policy=poll_policy)
+        self.cookies = cookies
+        self.headers = headers
+        self.cleanup = cleanup
 
     @signals.watch_errors
     def __enter__(self) -> 'P2PSession':
@@ -68,27 +623,107 @@ class P2PSession:
 
         """
         self.sess = requests.Session()
+        adapter = get_shared_adapter(self.pool_maxsize)
+        self.sess.mount('https://', adapter)
+        self.sess.mount('http://', adapter)
+        if self.cookies is not None:
+            self.sess.cookies.update(self.cookies)
+        if self.headers is not None:
+            self.sess.headers.update(self.headers)
         self.logger.debug('%s: created context manager.', self.name)
         return self
 
-    @signals.watch_errors
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """
         End of context management protocol.
 
         If the context manager finishes the user will be logged out of the
         P2P platform. This ensures that easyp2p cleanly logs out of the website
-        even in case of errors.
+        even in case of errors. If a cookie store is used and no error
+        occurred, the session cookies are saved instead, so that the next run
+        can continue the session. If a cleanup executor was provided, the
+        logout runs in the background. Afterwards the signals are
+        disconnected from the calling class.
+
+        """
+        try:
+            self._close(exc_type)
+        finally:
+            self.signals.disconnect_signals()
+
+    @signals.watch_errors
+    def _close(self, exc_type) -> None:
+        """
+        Log out or save the session cookies, see __exit__.
+
+        Args:
+            exc_type: Type of the exception which ended the context or None.
+
+        Raises:
+            RuntimeWarning: If logout is not successful.
+
+        """
+        if self._keep_session(exc_type, self.sess.cookies):
+            return
+        if self.logged_in and self.cleanup is not None:
+            self.cleanup.submit(self.name, self._logout)
+        elif self.logged_in:
+            self._logout()
+
+    def _logout(self) -> None:
+        """
+        Log out of the P2P platform.
 
         Raises:
             RuntimeWarning: If logout is not successful.
 
         """
-        if self.logged_in:
-            resp = self.sess.get(self.logout_url)
-            if resp.status_code != 200:
-                raise RuntimeWarning(_translate(
-                    'P2PPlatform', f'{self.name}: logout was not successful!'))
+        try:
+            resp = self.sess.get(self.logout_url, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            self.logger.exception('%s: logout failed.', self.name)
+            resp = None
+        self._check_logout(resp)
+
+    @signals.watch_errors
+    def restore_session(self, probe_url: Optional[str]) -> bool:
+        """
+        Try to continue the session of a previous run.
+
+        The stored cookies are loaded and a request to probe_url checks if the
+        session is still valid. Redirects are not followed, since an expired
+        session usually redirects to the login page.
+
+        Args:
+            probe_url: URL which can only be accessed by logged in users. If
+                None, sessions cannot be restored.
+
+        Returns:
+            True if the session was restored, False if a login is needed.
+
+        """
+        cookies = self._load_cookies(probe_url)
+        if cookies is None:
+            return False
+
+        self.sess.cookies.update(cookies)
+        try:
+            resp = self.sess.get(
+                probe_url, timeout=self.timeout, allow_redirects=False)
+            valid = resp.status_code == 200
+        except requests.exceptions.RequestException:
+            valid = False
+        return self._finish_restore(valid)
+
+    def get_credentials(self) -> Tuple[str, str]:
+        """
+        Get the credentials from the keyring or ask the user for them.
+
+        Returns:
+            Tuple (username, password).
+
+        """
+        return get_credentials(self.name, self.signals)
 
     @signals.update_progress
     def log_into_page(
@@ -112,18 +747,9 @@ class P2PSession:
 
         """
         self.logger.debug('%s: logging into website.', self.name)
-
-        credentials = get_credentials(self.name, self.signals)
-
-        if data is None:
-            data = dict()
-        data[name_field] = credentials[0]
-        data[password_field] = credentials[1]
-
-        resp = self.request(url, 'post', _translate(
-            'P2PPlatform',
-            f'{self.name}: login was not successful. Are the credentials '
-            f'correct?'), data)
+        data = self._login_data(
+            self.get_credentials(), name_field, password_field, data)
+        resp = self.request(url, 'post', self._login_error_msg(), data)
 
         self.logged_in = True
         self.logger.debug('%s: successfully logged in.', self.name)
@@ -151,12 +777,54 @@ class P2PSession:
             RuntimeError: If the download page returns an error status code.
 
         """
-        resp = self.request(url, method, _translate(
-            'P2PPlatform',
-            f'{self.name}: download of account statement failed!'), data)
+        error_msg = self._download_error_msg()
+        resp = self.request(url, method, error_msg, data, stream=True)
+        self.save_response(resp, location, error_msg)
 
-        with open(location, 'bw') as file:
-            file.write(resp.content)
+    @signals.watch_errors
+    def save_response(
+            self, resp: requests.Response, location: str,
+            error_msg: str) -> None:
+        """
+        Stream the body of resp to the file location.
+
+        The body is written in chunks of DOWNLOAD_CHUNK_SIZE bytes to a
+        temporary file in the target directory, which is renamed to location
+        once the download is complete. Thus memory usage does not depend on the
+        statement size and location never contains a partial download.
+
+        Args:
+            resp: Response whose body should be saved. It should be requested
+                with stream=True.
+            location: Absolute file path where to save the body.
+            error_msg: Error message if the download fails.
+
+        Raises:
+            RuntimeError: If the connection fails during the download or the
+                file cannot be written.
+
+        """
+        part = self._open_part_file(location)
+        try:
+            for chunk in resp.iter_content(self.DOWNLOAD_CHUNK_SIZE):
+                self._write_chunk(part, chunk)
+            part.commit()
+        except (requests.exceptions.RequestException, OSError):
+            self._download_failed(part, error_msg)
+        finally:
+            resp.close()
+            part.discard()
+        self._download_finished(part)
+
+    def close_response(self, resp: requests.Response) -> None:
+        """
+        Close a streamed response whose body is not needed.
+
+        Args:
+            resp: Response which was requested with stream=True.
+
+        """
+        resp.close()
 
     @signals.update_progress
     def generate_account_statement(
@@ -173,19 +841,21 @@ class P2PSession:
             data: Dictionary with data for posting request to the URL.
 
         """
-        self.request(url, method, _translate(
-            'P2PPlatform',
-            f'{self.name}: account statement generation failed!'), data)
+        self.request(url, method, self._generation_error_msg(), data)
 
     @signals.watch_errors
     def request(
             self, url: str, method: str, error_msg: str,
             data: Optional[Mapping[str, str]] = None,
-            success_codes: Optional[Tuple[int, ...]] = None) \
-            -> requests.Response:
+            success_codes: Optional[Tuple[int, ...]] = None,
+            stream: bool = False) -> requests.Response:
         """
         Helper method to send post or get request to an URL.
 
+        Connection errors and status codes which indicate a transient error
+        are retried with exponential backoff if the retry policy allows it
+        for method. Status codes in success_codes are never retried.
+
         Args:
             url: URL to which to send the request.
             method: HTTP method to be used to request the statement file; must
@@ -196,62 +866,87 @@ class P2PSession:
                 If none is provided, we assume 200 to be the success status
                 code.
             data: Dictionary with data for posting request to the URL.
+            stream: If True, the response body is not downloaded immediately
+                but can be read in chunks. Default is False.
 
         Returns:
             Response returned by the URL.
 
+        Raises:
+            RuntimeError: If the request still fails after the last attempt.
+
         """
         if success_codes is None:
             success_codes = (200,)
 
-        if method == 'get':
-            resp = self.sess.get(url)
-        elif method == 'post':
-            if self.json:
-                resp = self.sess.post(url, json=data)
+        max_attempts = self._max_attempts(method)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                resp = self._send(url, method, data, stream)
+            except requests.exceptions.RequestException as err:
+                self._check_connection_error(
+                    url, err, attempt, max_attempts, error_msg)
             else:
-                resp = self.sess.post(url, data=data)
-        else:
-            raise RuntimeError(_translate(
-                'P2PPlatform',
-                f'{self.name}: unknown method {method} in download_statement!'))
+                if resp.status_code in success_codes:
+                    return resp
+                resp.close()
+                if not self._is_retryable(
+                        resp.status_code, attempt, max_attempts):
+                    raise RuntimeError(error_msg)
 
-        if resp.status_code in success_codes:
-            return resp
+            time.sleep(self._retry_delay(url, method, attempt, max_attempts))
 
-        self.logger.debug(
-            '%s: returned status code %s', self.name, resp.status_code)
-        self.logger.debug(resp.text)
+        # Not reachable since max_attempts is at least one
         raise RuntimeError(error_msg)
 
+    def _send(
+            self, url: str, method: str,
+            data: Optional[Mapping[str, str]], stream: bool) \
+            -> requests.Response:
+        """
+        Send a single get or post request without any error handling.
+
+        Args:
+            url: URL to which to send the request.
+            method: HTTP method, either 'get' or 'post'.
+            data: Dictionary with data for posting request to the URL.
+            stream: If True, the response body is not downloaded immediately.
+
+        Returns:
+            Response returned by the URL.
+
+        """
+        if method == 'get':
+            return self.sess.get(url, stream=stream, timeout=self.timeout)
+        if self.json:
+            return self.sess.post(
+                url, json=data, stream=stream, timeout=self.timeout)
+        return self.sess.post(
+            url, data=data, stream=stream, timeout=self.timeout)
+
     @signals.update_progress
-    def wait(
-            self, func, time_delta: int = 2, max_wait_time: int = 30) -> None:
+    def wait(self, func) -> None:
         """
         Wait until func returns True and raise an error if that does not happen
-        after at most max_wait_time seconds.
+        before the deadline of the poll policy.
+
+        func is called immediately and afterwards with exponentially growing
+        delays. It should only do a cheap readiness check, e.g. request a small
+        status page, and leave the actual download to the caller.
 
         Args:
             func: Function or method which returns True if the condition to
                 wait for is fulfilled.
-            time_delta: Time in seconds to wait before trying func again.
-            max_wait_time: Maximal waiting time before giving up.
 
         Raises:
-            RuntimeError: If max_waiting_time is reached and func did not
+            RuntimeError: If the deadline is reached and func did not
                 return True.
         """
-        wait_time = 0
-        while wait_time <= max_wait_time:
-            if func():
-                return
-            time.sleep(time_delta)
-            wait_time += time_delta
-
-        raise RuntimeError(_translate(
-            'P2PPlatform',
-            f'{self.name}: generating the account statement page took too '
-            f'long!'))
+        deadline = self._poll_deadline()
+        attempt = 1
+        while not func():
+            time.sleep(self._poll_delay(deadline, attempt))
+            attempt += 1
 
     @signals.watch_errors
     def get_values_from_tag_by_name(
@@ -275,20 +970,8 @@ class P2PSession:
             RuntimeError: If at least one HTML element cannot be found.
         """
         resp = self.request(url, 'get', error_msg)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        data = dict()
-        for name in names:
-            data[name] = soup.find(tag, {'name': name}).get(field, None)
-
-        if None in data.values():
-            # At least one HTML element has not been found
-            self.logger.debug(
-                'Elements not found in get_values_from_tag_by_name!')
-            self.logger.debug('Names: %s', str(names))
-            self.logger.debug('Keys: %s', str(data.keys()))
-            raise RuntimeError(error_msg)
-
-        return data
+        return values_from_tag_by_name(
+            resp.text, tag, names, error_msg, field)
 
     @signals.watch_errors
     def get_value_from_tag(
@@ -310,14 +993,7 @@ class P2PSession:
 
         """
         resp = self.request(url, 'get', error_msg)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        value = soup.find(tag).get(field, None)
-
-        if value is None:
-            self.logger.debug('Element not found in get_value_from_tag!')
-            raise RuntimeError(error_msg)
-
-        return value
+        return value_from_tag(resp.text, tag, field, error_msg)
 
     @signals.watch_errors
     def get_url_from_partial_link(
@@ -340,15 +1016,7 @@ class P2PSession:
 
         """
         resp = self.request(url, 'get', error_msg)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        target = None
-        for link in soup.find_all('a', href=True):
-            if partial_link in link['href']:
-                target = link['href']
-        if target is None:
-            raise RuntimeError(error_msg)
-
-        return target
+        return url_from_partial_link(resp.text, partial_link, error_msg)
 
     @signals.watch_errors
     def get_value_from_script(
@@ -372,11 +1040,211 @@ class P2PSession:
 
         """
         resp = self.request(url, 'get', error_msg)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        script = BeautifulSoup(
-            soup.find('script', script_id).string, 'html.parser')
-        value = script.find(tag, {'name': name}).get('value', None)
-        if value is None:
-            raise RuntimeError(error_msg)
+        return value_from_script(resp.text, script_id, tag, name, error_msg)
+
+
+class AwaitableSession:
+    """
+    Facade of P2PSession whose methods can be awaited.
+
+    Platforms write their download steps once as a coroutine which awaits the
+    session methods. With AsyncP2PSession the coroutine runs on an event
+    loop, with AwaitableSession it is driven by run_sync instead. The wrapped
+    methods block and return immediately, thus the coroutine never suspends.
+
+    """
+
+    def __init__(self, session: P2PSession) -> None:
+        """
+        Constructor of AwaitableSession class.
+
+        Args:
+            session: P2PSession instance whose methods should be wrapped.
+
+        """
+        self.session = session
+
+    def __getattr__(self, name: str):
+        """
+        Get an attribute of the wrapped session.
+
+        Methods are returned as coroutine functions, all other attributes,
+        e.g. sess or name, are returned unchanged.
+
+        Args:
+            name: Name of the attribute.
+
+        Returns:
+            Attribute of the wrapped session.
+
+        """
+        attr = getattr(self.session, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return method
+
+    async def wait(self, func: Callable[[], Awaitable[bool]]) -> None:
+        """
+        Wait until the coroutine function func returns True.
+
+        See P2PSession.wait for details.
+
+        Args:
+            func: Coroutine function which returns True if the condition to
+                wait for is fulfilled.
+
+        """
+        self.session.wait(lambda: run_sync(func()))
+
+
+def run_sync(coro: Coroutine):
+    """
+    Run a coroutine which awaits AwaitableSession methods to completion.
+
+    Args:
+        coro: Coroutine which must not suspend, i.e. it must not await
+            anything which needs an event loop.
+
+    Returns:
+        Return value of the coroutine.
+
+    Raises:
+        RuntimeError: If the coroutine suspends.
+
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError('Coroutine needs an event loop!')
+
+
+# The following functions extract values from HTML pages. They are shared by
+# P2PSession and AsyncP2PSession.
+
+def values_from_tag_by_name(
+        html: str, tag: str, names: Sequence[str], error_msg: str,
+        field: str = 'value') -> Dict[str, str]:
+    """
+    Get the values of HTML tags given in names from html.
+
+    Args:
+        html: HTML source code of the website.
+        tag: Tag of the HTML element.
+        names: List of tag names for which to get the values.
+        error_msg: Error message if extraction of value fails.
+        field: Name of the field for which to return the value.
+
+    Returns:
+        Dictionary with tag names as key and tag values as value.
+
+    Raises:
+        RuntimeError: If at least one HTML element cannot be found.
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    data = dict()
+    for name in names:
+        data[name] = soup.find(tag, {'name': name}).get(field, None)
+
+    if None in data.values():
+        # At least one HTML element has not been found
+        logger = logging.getLogger('easyp2p.p2p_session')
+        logger.debug('Elements not found in get_values_from_tag_by_name!')
+        logger.debug('Names: %s', str(names))
+        logger.debug('Keys: %s', str(data.keys()))
+        raise RuntimeError(error_msg)
+
+    return data
+
+
+def value_from_tag(html: str, tag: str, field: str, error_msg: str) -> str:
+    """
+    Get the string value of a single HTML tag from html.
+
+    Args:
+        html: HTML source code of the website.
+        tag: Tag of the HTML element.
+        field: Name of the tag field for which to return the value.
+        error_msg: Error message if extraction of value fails.
+
+    Returns:
+        Field value of the tag.
+
+    Raises:
+        RuntimeError: If the HTML element cannot be found.
+
+    """
+    # Only parse the relevant tags, this is considerably faster for large pages
+    # which are polled repeatedly
+    element = BeautifulSoup(
+        html, 'html.parser', parse_only=SoupStrainer(tag)).find(tag)
+    value = None if element is None else element.get(field, None)
+
+    if value is None:
+        logging.getLogger('easyp2p.p2p_session').debug(
+            'Element not found in get_value_from_tag!')
+        raise RuntimeError(error_msg)
+
+    return value
+
+
+def url_from_partial_link(html: str, partial_link: str, error_msg: str) -> str:
+    """
+    Find and return the href link in html which contains partial_link.
+
+    Args:
+        html: HTML source code of the website.
+        partial_link: Partial text for identifying the link.
+        error_msg: Error message if the link is not found.
+
+    Returns:
+        URL of the link.
+
+    Raises:
+        RuntimeError: If the link cannot be found.
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    target = None
+    for link in soup.find_all('a', href=True):
+        if partial_link in link['href']:
+            target = link['href']
+    if target is None:
+        raise RuntimeError(error_msg)
+
+    return target
+
+
+def value_from_script(
+        html: str, script_id: Mapping[str, str], tag: str, name: str,
+        error_msg: str) -> str:
+    """
+    Get a value from a tag contained in a script of html.
+
+    Args:
+        html: HTML source code of the website.
+        script_id: Dictionary with identifiers for the script.
+        tag: Tag type of the HTML element contained in the script.
+        name: Tag name.
+        error_msg: Error message if extraction of value fails.
+
+    Returns:
+        Tag value in 'value' field.
+
+    Raises:
+        RuntimeError: If value cannot be found.
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    script = BeautifulSoup(
+        soup.find('script', script_id).string, 'html.parser')
+    value = script.find(tag, {'name': name}).get('value', None)
+    if value is None:
+        raise RuntimeError(error_msg)
 
-        return value
+    return value
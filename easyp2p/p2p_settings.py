@@ -18,3 +18,11 @@ class Settings:
     directory: str = os.path.join(str(Path.home()), '.easyp2p')
     headless: bool = True
     platforms: Optional[Set[str]] = None
+    concurrent: bool = False
+    max_parallel_sessions: int = 4
+    max_parallel_browsers: int = 1
+    parse_in_processes: bool = False
+    max_parse_processes: Optional[int] = None
+    cache_statements: bool = False
+    reuse_sessions: bool = False
+    async_sessions: bool = False
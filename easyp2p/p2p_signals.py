@@ -4,9 +4,11 @@
 """Module implementing Signals for communicating with the GUI."""
 
 from functools import wraps
+import inspect
 import logging
+from typing import List, Optional, Tuple
 
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, Qt, pyqtBoundSignal, pyqtSignal
 
 
 class Signals(QObject):
@@ -15,6 +17,7 @@ class Signals(QObject):
 
     update_progress_bar = pyqtSignal()
     add_progress_text = pyqtSignal(str, bool)
+    download_progress = pyqtSignal(str, int)
     abort_signal = pyqtSignal()
     end_easyp2p = pyqtSignal(str, str)
     get_credentials = pyqtSignal(str)
@@ -24,75 +27,184 @@ class Signals(QObject):
         super().__init__()
         self.abort = False
         self.abort_signal.connect(self.abort_evaluation)
+        self.class_signals: Optional[Signals] = None
+        self._connections: List[Tuple[pyqtBoundSignal, pyqtBoundSignal]] = []
         self.logger = logging.getLogger('easyp2p.p2p_signals.Signals')
         self.logger.debug('Created Signals instance.')
 
+    def instance_signals(self) -> 'Signals':
+        """
+        Create the Signals of a single instance of a class whose methods are
+        decorated by this class level Signals instance.
+
+        The decorators report to the Signals of the instance instead of the
+        class level Signals. Thus parallel instances of the same class do not
+        share their connections.
+
+        Returns:
+            New Signals instance.
+
+        """
+        signals = Signals()
+        signals.class_signals = self
+        return signals
+
+    def _signals_of(self, args: tuple) -> 'Signals':
+        """
+        Get the Signals to which a decorated method reports.
+
+        Args:
+            args: Positional arguments of the decorated method.
+
+        Returns:
+            The Signals of the instance if they were created by
+            instance_signals of this Signals instance, otherwise self.
+
+        """
+        signals = getattr(args[0], 'signals', None) if args else None
+        if isinstance(signals, Signals) and signals.class_signals is self:
+            return signals
+        return self
+
     def update_progress(self, func):
-        """Decorator for updating progress text and progress bar."""
+        """
+        Decorator for updating progress text and progress bar. It can also be
+        applied to coroutine functions.
+        """
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    self._signals_of(args)._check_abort()
+                    result = await func(*args, **kwargs)
+                except (RuntimeError, RuntimeWarning) as err:
+                    result = self._signals_of(args)._handle_progress_error(
+                        err)
+                finally:
+                    self._signals_of(args).update_progress_bar.emit()
+                return result
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                if self.abort:
-                    raise RuntimeError('Abort by user')
-
+                self._signals_of(args)._check_abort()
                 result = func(*args, **kwargs)
-            except RuntimeError as err:
-                self.logger.exception('RuntimeError in update_progress')
-                self.add_progress_text.emit(str(err), True)
-                raise PlatformFailedError from err
-            except RuntimeWarning as err:
-                self.logger.warning(
-                    'RuntimeWarning in update_progress', exc_info=True)
-                self.add_progress_text.emit(str(err), True)
-                result = None
+            except (RuntimeError, RuntimeWarning) as err:
+                result = self._signals_of(args)._handle_progress_error(err)
             finally:
-                self.update_progress_bar.emit()
+                # Resolve again since __init__ sets the Signals of the instance
+                self._signals_of(args).update_progress_bar.emit()
             return result
         return wrapper
 
+    def _check_abort(self) -> None:
+        """
+        Raise an error if the user aborted the evaluation.
+
+        Raises:
+            RuntimeError: If the abort flag is set.
+
+        """
+        if self.abort:
+            raise RuntimeError('Abort by user')
+
+    def _handle_progress_error(self, err: Exception) -> None:
+        """
+        Report an error caught by update_progress to the progress window.
+
+        Args:
+            err: The caught RuntimeError or RuntimeWarning.
+
+        Raises:
+            PlatformFailedError: If err is a RuntimeError.
+
+        """
+        if isinstance(err, RuntimeWarning):
+            self.logger.warning(
+                'RuntimeWarning in update_progress', exc_info=True)
+            self.add_progress_text.emit(str(err), True)
+            return None
+        self.logger.exception('RuntimeError in update_progress')
+        self.add_progress_text.emit(str(err), True)
+        raise PlatformFailedError from err
+
     def watch_errors(self, func):
-        """Decorator for emitting error messages to the progress window."""
+        """
+        Decorator for emitting error messages to the progress window. It can
+        also be applied to coroutine functions.
+        """
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    result = await func(*args, **kwargs)
+                except (RuntimeError, RuntimeWarning) as err:
+                    result = self._signals_of(args)._handle_watched_error(err)
+                return result
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 result = func(*args, **kwargs)
-            except RuntimeError as err:
-                self.logger.exception('RuntimeError in watch_errors.')
-                self.add_progress_text.emit(str(err), True)
-                raise PlatformFailedError from err
-            except RuntimeWarning as err:
-                self.logger.warning(str(err))
-                self.add_progress_text.emit(str(err), True)
-                result = None
+            except (RuntimeError, RuntimeWarning) as err:
+                result = self._signals_of(args)._handle_watched_error(err)
             return result
         return wrapper
 
+    def _handle_watched_error(self, err: Exception) -> None:
+        """
+        Report an error caught by watch_errors to the progress window.
+
+        Args:
+            err: The caught RuntimeError or RuntimeWarning.
+
+        Raises:
+            PlatformFailedError: If err is a RuntimeError.
+
+        """
+        if isinstance(err, RuntimeWarning):
+            self.logger.warning(str(err))
+            self.add_progress_text.emit(str(err), True)
+            return None
+        self.logger.exception('RuntimeError in watch_errors.')
+        self.add_progress_text.emit(str(err), True)
+        raise PlatformFailedError from err
+
     def connect_signals(self, other: 'Signals') -> None:
         """
         Helper method for connecting signals of different classes.
 
+        The signals are forwarded directly in the emitting thread since the
+        Signals of an instance may live in a thread without Qt event loop.
+
         Args:
             other: Signals instance of another class.
 
         """
         self.logger.debug('Connecting signals.')
-        self.update_progress_bar.connect(other.update_progress_bar)
-        self.add_progress_text.connect(other.add_progress_text)
-        self.get_credentials.connect(other.get_credentials)
-        other.send_credentials.connect(self.send_credentials)
+        connections = [
+            (self.update_progress_bar, other.update_progress_bar),
+            (self.add_progress_text, other.add_progress_text),
+            (self.download_progress, other.download_progress),
+            (self.get_credentials, other.get_credentials),
+            (other.send_credentials, self.send_credentials)]
+        for signal, slot in connections:
+            signal.connect(slot, Qt.DirectConnection)
+        self._connections.extend(connections)
         self.logger.debug('Connecting signals successful.')
 
     def disconnect_signals(self) -> None:
         """
-        Disconnect signals. Ignore error if they were not connected or if
-        disconnecting fails.
+        Disconnect all signals which were connected by connect_signals. Other
+        connections are kept. Ignore error if disconnecting fails.
         """
         self.logger.debug('Disconnecting signals.')
-        for signal in [
-                self.add_progress_text, self.get_credentials,
-                self.update_progress_bar]:
+        while self._connections:
+            signal, slot = self._connections.pop()
             try:
-                signal.disconnect()
+                signal.disconnect(slot)
             except TypeError:
                 self.logger.exception(
                     'Disconnecting signal %s failed.', str(signal))
@@ -9,29 +9,42 @@ in, log out, opening the account statement page and generating and downloading
 the account statement. It relies mainly on functionality provided by the
 Selenium webdriver. easyp2p uses Chromedriver as webdriver.
 
+Once logged in, statements can also be downloaded over plain HTTP by a
+P2PSession which uses the cookies of the browser. This avoids waiting for the
+browser download and streams the statement directly to disk.
+
 """
 
 from datetime import date
+import functools
 import glob
 import logging
 import os
 import shutil
 import tempfile
 import time
-from typing import Mapping, Optional, Tuple
+from typing import Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+from urllib.parse import urlsplit
 
 import arrow
+from requests.cookies import RequestsCookieJar, create_cookie
 from selenium.common.exceptions import (
-    NoSuchElementException, StaleElementReferenceException, TimeoutException)
+    NoSuchElementException, StaleElementReferenceException, TimeoutException,
+    WebDriverException)
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_credentials import get_credentials
+from easyp2p.p2p_session import P2PSession
 from easyp2p.p2p_signals import Signals
 from easyp2p.p2p_chrome import P2PChrome
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_browser import BrowserManager
+    from easyp2p.p2p_cleanup import CleanupExecutor
+
 _translate = QCoreApplication.translate
 logger = logging.getLogger('easyp2p.p2p_webdriver')
 
@@ -49,13 +62,20 @@ class P2PWebDriver:
     # Signals for communicating with the GUI
     signals = Signals()
 
+    # Maximal time in seconds until a calendar shows the month which was set
+    CALENDAR_DELAY = 5.
+
     def __init__(
             self, name: str, headless: bool,
             logout_wait_until: EC.element_to_be_clickable,
             logout_url: Optional[str] = None,
             logout_locator: Optional[Tuple[str, str]] = None,
             hover_locator: Optional[Tuple[str, str]] = None,
-            signals: Optional[Signals] = None) -> None:
+            signals: Optional[Signals] = None,
+            browser_manager: Optional['BrowserManager'] = None,
+            blocked_urls: Sequence[str] = (),
+            profile_directory: Optional[str] = None,
+            cleanup: Optional['CleanupExecutor'] = None) -> None:
         """
         Constructor of P2P class.
 
@@ -70,6 +90,15 @@ class P2PWebDriver:
                 mouse needs to hover in order to make logout button visible.
                 Default is None.
             signals: Signals instance for communicating with the calling class.
+            browser_manager: If provided, the browser is taken from and given
+                back to the browser manager instead of starting a new one.
+            blocked_urls: URL patterns which the browser will not load.
+            profile_directory: If provided, a persistent browser profile in
+                this directory is used and the session is kept at the end
+                instead of logging out. The browser manager is not used in
+                this case since a profile can only be used by one browser.
+            cleanup: If provided, logout and closing the browser are done in
+                the background by this executor.
 
        Raises:
             RuntimeError: If no URL for login or statement page or no logout
@@ -78,6 +107,8 @@ class P2PWebDriver:
         """
         self.logger = logging.getLogger('easyp2p.p2p_webdriver.P2PWebDriver')
 
+        # Parallel platforms must not share the connections of their signals
+        self.signals = P2PWebDriver.signals.instance_signals()
         if signals:
             self.signals.connect_signals(signals)
 
@@ -93,6 +124,10 @@ class P2PWebDriver:
         self.logout_locator = logout_locator
         self.hover_locator = hover_locator
         self.download_dir = None
+        self.browser_manager = browser_manager
+        self.blocked_urls = blocked_urls
+        self.profile_directory = profile_directory
+        self.cleanup = cleanup
         self.logged_in = False
 
         self.logger.debug('%s: created P2PWebDriver instance.', self.name)
@@ -107,8 +142,17 @@ class P2PWebDriver:
 
         """
         self.download_dir = tempfile.TemporaryDirectory()
-        self.driver = P2PChrome(
-            self.download_dir.name, self.headless, self.signals)
+        if self.profile_directory is not None:
+            self.browser_manager = None
+        if self.browser_manager is not None:
+            self.driver = self.browser_manager.acquire(
+                self.download_dir.name, self.headless, self.signals)
+        else:
+            self.driver = P2PChrome(
+                self.download_dir.name, self.headless, self.signals,
+                profile_directory=self.profile_directory)
+        if self.blocked_urls:
+            self.driver.block_urls(self.blocked_urls)
         self.logger.debug('%s: created context manager.', self.name)
         return self
 
@@ -119,55 +163,108 @@ class P2PWebDriver:
 
         If the context manager finishes the user will be logged out of the
         P2P platform. This ensures that easyp2p cleanly logs out of the website
-        even in case of errors.
+        even in case of errors. If a persistent profile is used and no error
+        occurred, the session is kept for the next run instead. If a cleanup
+        executor was provided, logout and closing the browser run in the
+        background.
 
         Raises:
             RuntimeError: If no logout method is provided
 
         """
-        try:
-            if self.logged_in:
-                if self.logout_url is not None:
-                    self.logout_by_url(self.logout_wait_until)
-                elif self.logout_locator is not None:
-                    self.logout_by_button(
-                        self.logout_locator,
-                        self.logout_wait_until,
-                        hover_locator=self.hover_locator)
-                else:
-                    # Should never happen since we already check it in __init__
-                    raise RuntimeWarning(_translate(
-                        'P2PPlatform',
-                        f'{self.name}: no method for logout provided!'))
-
-                self.logged_in = False
-        finally:
-            self.driver.close()
-            self.download_dir.cleanup()
+        logout = self.logged_in
+        if self.profile_directory is not None and exc_type is None:
+            self.logger.debug('%s: keeping session.', self.name)
+            logout = False
+
+        if self.cleanup is not None:
+            if logout:
+                # Count the logout now, the signals are disconnected before
+                # it actually happens
+                self.signals.update_progress_bar.emit()
             self.signals.disconnect_signals()
+            self.cleanup.submit(
+                self.name, lambda: self._close(logout, background=True))
+        else:
+            try:
+                self._close(logout)
+            finally:
+                self.signals.disconnect_signals()
 
         if exc_type:
             raise exc_type(exc_value)
 
         self.logger.debug('%s: context manager done.', self.name)
 
+    def _close(self, logout: bool, background: bool = False) -> None:
+        """
+        Log out if needed, then give back or quit the browser.
+
+        Args:
+            logout: If True log out of the P2P platform first.
+            background: If True the logout does not report errors via signals
+                but raises them, since the signals may already be connected
+                to the next platform.
+
+        Raises:
+            RuntimeWarning: If no logout method is provided.
+            PlatformFailedError: If the logout fails in the background.
+
+        """
+        try:
+            if logout:
+                self._logout(background)
+        finally:
+            if self.browser_manager is not None:
+                self.browser_manager.release(self.driver)
+            else:
+                # Quit instead of close to end ChromeDriver, too. Otherwise
+                # the next browser could not use the profile.
+                self.driver.quit()
+            self.download_dir.cleanup()
+
+    def _logout(self, background: bool) -> None:
+        """
+        Log out with the configured logout method.
+
+        Args:
+            background: If True call the logout methods without their
+                update_progress decorator.
+
+        Raises:
+            RuntimeWarning: If no logout method is provided.
+            PlatformFailedError: If the logout fails in the background.
+
+        """
+        if self.logout_url is not None:
+            logout, args = self.logout_by_url, (self.logout_wait_until,)
+        elif self.logout_locator is not None:
+            logout, args = self.logout_by_button, (
+                self.logout_locator, self.logout_wait_until,
+                self.hover_locator)
+        else:
+            # Should never happen since we already check it in __init__
+            raise RuntimeWarning(_translate(
+                'P2PPlatform', f'{self.name}: no method for logout provided!'))
+
+        if background:
+            logout = functools.partial(logout.__wrapped__, self)
+        logout(*args)
+        self.logged_in = False
+
     @signals.update_progress
     def log_into_page(
             self, login_url: str, name_field: str, password_field: str,
             wait_until: Optional[EC.element_to_be_clickable],
-            login_locator: Tuple[str, str] = None,
-            fill_delay: float = 0.2) -> None:
+            login_locator: Tuple[str, str] = None) -> None:
         """
         Log into the P2P platform using the provided credentials.
 
         This method performs the login procedure for the P2P website.
-        It opens the login page and fills in user name and password.
-        Some P2P sites only show the user name and password field after
+        It opens the login page and fills in user name and password in one
+        go. Some P2P sites only show the user name and password field after
         clicking a button whose locator can be provided by the optional
-        login_locator. Some P2P sites (e.g. Swaper) also require a small delay
-        between filling in name and password. Otherwise it can
-        sometimes happen that the password is mistakenly written
-        to the name field, too.
+        login_locator.
 
         Args:
             login_url: URL of login page.
@@ -178,8 +275,6 @@ class P2PWebDriver:
             wait_until: Expected condition in case of successful login
             login_locator: Locator of web element which has to be clicked in
                 order to open login form. Default is None.
-            fill_delay: Delay in seconds between filling in password and user
-                name fields. Default is 0.
 
         Raises:
             RuntimeError: - If login or password fields cannot be found
@@ -215,15 +310,47 @@ class P2PWebDriver:
         error_msg = _translate(
             'P2PPlatform', f'{self.name}: login was not successful. Are the '
             'credentials correct?')
-        self.driver.enter_text((By.NAME, name_field), credentials[0], error_msg)
-        time.sleep(fill_delay)
-        self.driver.enter_text(
-            (By.NAME, password_field), credentials[1], error_msg,
-            hit_return=True, wait_until=wait_until)
+        self.driver.fill_fields(
+            {(By.NAME, name_field): credentials[0],
+             (By.NAME, password_field): credentials[1]},
+            error_msg, submit_locator=(By.NAME, password_field),
+            wait_until=wait_until)
 
         self.logged_in = True
         self.logger.debug('%s: successfully logged in.', self.name)
 
+    def restore_session(
+            self, probe_url: Optional[str],
+            wait_until: Optional[EC.element_to_be_clickable]) -> bool:
+        """
+        Check if the persistent profile contains a valid session.
+
+        Args:
+            probe_url: URL which only logged in users can access.
+            wait_until: Expected condition on probe_url for logged in users.
+
+        Returns:
+            True if the user is logged in, False if not or if no persistent
+            profile is used.
+
+        """
+        if self.logged_in:
+            return True
+        if self.profile_directory is None or probe_url is None \
+                or wait_until is None:
+            return False
+
+        try:
+            self.driver.get(probe_url)
+            self.driver.wait(wait_until, delay=5)
+        except TimeoutException:
+            self.logger.debug('%s: stored session expired.', self.name)
+            return False
+
+        self.logged_in = True
+        self.logger.debug('%s: re-using stored session.', self.name)
+        return True
+
     @signals.watch_errors
     def wait_for_captcha(
             self, login_url: str, locator: Tuple[str, str], text: str) -> None:
@@ -558,6 +685,12 @@ class P2PWebDriver:
         """
             Switch calendar month to the target month.
 
+            The month is first set directly by the API or the month and year
+            selectors of the calendar. If this is not possible, all clicks on
+            the previous month button are performed at once by a script. Only
+            if the calendar does not show the target month afterwards, the
+            remaining clicks are done one by one.
+
             Args:
                 prev_month_locator: Locator of the web element which needs to be
                     clicked to switch the calendar to the previous month.
@@ -574,20 +707,90 @@ class P2PWebDriver:
             prev_month = self.driver.wait(
                 EC.element_to_be_clickable(prev_month_locator))
 
-            screen_date = arrow.get(
-                self.driver.find_element(*month_locator).text,
-                'MMMM YYYY', locale='en_US')
-            while screen_date.month > target_date.month \
-                    or screen_date.year > target_date.year:
+            months = self._count_months(month_locator, target_date)
+            if months > 0:
+                self._jump_to_month(
+                    prev_month, month_locator, target_date, months)
+                months = self._count_months(month_locator, target_date)
+            while months > 0:
                 prev_month.click()
-                screen_date = arrow.get(
-                    self.driver.find_element(*month_locator).text,
-                    'MMMM YYYY', locale='en_US')
+                months = self._count_months(month_locator, target_date)
         except (NoSuchElementException, TimeoutException):
             self.logger.exception(
                 '%s: failed to set month in calendar.', self.name)
             raise RuntimeError()
 
+        if months < 0:
+            self.logger.error(
+                '%s: calendar went past the target month.', self.name)
+            raise RuntimeError()
+
+    def _count_months(self, month_locator, target_date) -> int:
+        """
+            Get the number of months between the calendar and the target date.
+
+            Args:
+                month_locator: Locator of the web element which contains the
+                    name of the currently selected month.
+                target_date: Target date to which the calendar has to be
+                    switched.
+
+            Returns:
+                Number of clicks on the previous month button which are needed
+                to reach the target month.
+
+        """
+        screen_date = arrow.get(
+            self.driver.find_element(*month_locator).text,
+            'MMMM YYYY', locale='en_US')
+        return (screen_date.year - target_date.year) * 12 \
+            + screen_date.month - target_date.month
+
+    def _jump_to_month(
+            self, prev_month, month_locator, target_date, months) -> None:
+        """
+            Set the target month directly or, if the calendar does not
+            support this, click the previous month button several times in
+            one script.
+
+            Errors are only logged since _set_month_in_calendar falls back to
+            single clicks.
+
+            Args:
+                prev_month: Web element of the previous month button.
+                month_locator: Locator of the web element which contains the
+                    name of the currently selected month.
+                target_date: Target date to which the calendar has to be
+                    switched.
+                months: Number of clicks on the previous month button.
+
+        """
+        def rendered(_) -> bool:
+            return self._count_months(month_locator, target_date) <= 0
+
+        try:
+            if self.driver.set_calendar_month(
+                    self.driver.find_element(*month_locator),
+                    target_date.year, target_date.month):
+                try:
+                    # Some calendars are only rendered after the script
+                    # finished
+                    self.driver.wait(rendered, delay=self.CALENDAR_DELAY)
+                    return
+                except TimeoutException:
+                    self.logger.debug(
+                        '%s: setting the month directly failed.', self.name)
+                months = self._count_months(month_locator, target_date)
+            if months > 0:
+                self.driver.execute_script(
+                    'for (let i = 0; i < arguments[1]; i++) '
+                    'arguments[0].click();', prev_month, months)
+                self.driver.wait(rendered, delay=self.CALENDAR_DELAY)
+        except WebDriverException:
+            self.logger.debug(
+                '%s: jumping to the target month failed, clicking instead.',
+                self.name, exc_info=True)
+
     def _set_day_in_calendar(self, day_locator, target_date, day_class_check):
         """
             Find and click day in currently selected calendar month.
@@ -681,10 +884,65 @@ class P2PWebDriver:
         self.logger.debug(
             '%s: account statement generation was successful.', self.name)
 
+    def create_session(self, url: str) -> P2PSession:
+        """
+        Create a P2PSession which is logged in with the cookies of the browser.
+
+        The session never logs out, this is still done by P2PWebDriver.
+        Therefore it must be closed before the browser logs out.
+
+        Args:
+            url: URL which will be requested by the session. All cookies which
+                the browser would send to url are copied to the session.
+
+        Returns:
+            P2PSession instance, which needs to be used as context manager.
+
+        """
+        jar = RequestsCookieJar()
+        for cookie in self.driver.get_cookies_for(url):
+            jar.set_cookie(create_cookie(
+                cookie['name'], cookie['value'], domain=cookie['domain'],
+                path=cookie['path'], secure=cookie['secure'],
+                expires=None if cookie.get('session')
+                else int(cookie['expires'])))
+        headers = {
+            'User-Agent': self.driver.execute_script(
+                'return navigator.userAgent'),
+            'Referer': self.driver.current_url,
+        }
+        return P2PSession(
+            self.name, None, self.signals, cookies=jar, headers=headers)
+
+    @signals.watch_errors
+    def download_statement_by_url(self, statement: str, url: str) -> None:
+        """
+        Download the account statement from url over plain HTTP.
+
+        The request uses the login of the browser, see create_session.
+
+        Args:
+            statement: File name including path where the downloaded
+                statement should be saved.
+            url: Download URL of the account statement.
+
+        Raises:
+            RuntimeError: If the download fails.
+
+        """
+        self.logger.debug('%s: downloading statement from URL.', self.name)
+        error_msg = _translate(
+            'P2PPlatform',
+            f'{self.name}: download of account statement failed!')
+        with self.create_session(url) as sess:
+            resp = sess.request(url, 'get', error_msg, stream=True)
+            sess.save_response(resp, statement, error_msg)
+        self.logger.debug('%s: account statement download finished.', self.name)
+
     @signals.update_progress
     def download_statement(
             self, statement: str, download_locator: Tuple[str, str],
-            actions=None) -> None:
+            actions=None, use_session: bool = False) -> None:
         """
         Download account statement file by clicking the provided button.
 
@@ -702,6 +960,9 @@ class P2PWebDriver:
             actions: 'move to element' or None: some P2P sites require that the
                 mouse hovers over the download button to make it clickable.
                 Default is None.
+            use_session: If True and the download button is a link, the link
+                is downloaded with download_statement_by_url instead of
+                clicking it.
 
         Raises:
             RuntimeError: If the download does not start, takes too long or
@@ -709,11 +970,30 @@ class P2PWebDriver:
 
         """
         self.logger.debug('%s: starting account statement download.', self.name)
+        if use_session:
+            try:
+                href = self.driver.wait(EC.presence_of_element_located(
+                    download_locator)).get_attribute('href')
+            except TimeoutException:
+                href = None
+            if href and urlsplit(href).scheme in ('http', 'https'):
+                self.download_statement_by_url(statement, href)
+                return
+
         if actions == 'move_to_element':
             hover_locator = download_locator
         else:
             hover_locator = None
 
+        try:
+            self.driver.discard_download_events()
+            use_events = True
+        except WebDriverException:
+            self.logger.warning(
+                '%s: download events are not available.', self.name,
+                exc_info=True)
+            use_events = False
+
         self.driver.click_button(
             download_locator,
             _translate(
@@ -722,8 +1002,12 @@ class P2PWebDriver:
                 f'failed!'),
             hover_locator=hover_locator)
 
-        if not download_finished(
-                statement, self.driver.download_directory):
+        if use_events:
+            finished = self.driver.wait_for_download(statement)
+        else:
+            finished = download_finished(
+                statement, self.driver.download_directory)
+        if not finished:
             raise RuntimeError(_translate(
                 'P2PPlatform',
                 f'{self.name}: download of account statement failed!'))
@@ -733,16 +1017,25 @@ class P2PWebDriver:
 
 def download_finished(
         statement: str, download_directory: str,
-        max_wait_time: float = 4.0) -> bool:
+        start_timeout: float = P2PChrome.DOWNLOAD_START_TIMEOUT,
+        stall_timeout: float = P2PChrome.DOWNLOAD_STALL_TIMEOUT,
+        poll_interval: float = P2PChrome.DOWNLOAD_POLL_INTERVAL) -> bool:
     """
     Wait until statement download is done and rename the file to statement.
 
+    This polls the download directory and is only used if the download events
+    of P2PChrome are not available. Like P2PChrome.wait_for_download there is
+    no limit for the total download time as long as the download grows.
+
     Args:
         statement: File name including path where the downloaded file should
             be saved.
         download_directory: Download directory.
-        max_wait_time: Maximum time in seconds to wait for download to
-            start/finish.
+        start_timeout: Maximal time in seconds until the download starts.
+        stall_timeout: Maximal time in seconds in which the size of a running
+            download does not change.
+        poll_interval: Interval in seconds for checking the download
+            directory.
 
     Returns:
         True if download finished successfully, False if not.
@@ -751,19 +1044,22 @@ def download_finished(
         RuntimeError: If there is more than one file in the download directory.
 
     """
-    done = False
-    waiting_time = 0
-    download_time = 0
+    last_change = time.monotonic()
+    download_size = None
 
-    while not done:
+    while True:
         ongoing_downloads = glob.glob(
             os.path.join(download_directory, '*.crdownload'))
         if ongoing_downloads:
-            if download_time > max_wait_time:
-                logger.error('Download time exceeded max_wait_time.')
+            size = sum(
+                os.path.getsize(download) for download in ongoing_downloads
+                if os.path.isfile(download))
+            if size != download_size:
+                download_size = size
+                last_change = time.monotonic()
+            elif time.monotonic() - last_change > stall_timeout:
+                logger.error('Download stalled after %d bytes.', size)
                 return False
-            time.sleep(1)
-            download_time += 1
         else:
             filelist = glob.glob(os.path.join(download_directory, '*'))
             if len(filelist) == 1 and not filelist[0].endswith('crdownload'):
@@ -779,13 +1075,15 @@ def download_finished(
                     'P2PPlatform',
                     f'Download directory {download_directory} is not empty!'))
 
-            if waiting_time > max_wait_time:
-                # If the download didn't start after more than max_wait_time
+            if download_size is None \
+                    and time.monotonic() - last_change > start_timeout:
+                # If the download didn't start after more than start_timeout
                 # something has gone wrong.
-                logger.error('Download did not start within max_wait_time.')
+                logger.error('Download did not start within start_timeout.')
+                return False
+            if download_size is not None \
+                    and time.monotonic() - last_change > stall_timeout:
+                logger.error('Download vanished without a statement.')
                 return False
 
-            time.sleep(1)
-            waiting_time += 1
-
-    return False
+        time.sleep(poll_interval)
@@ -3,18 +3,28 @@
 
 """Module implementing WorkerThread."""
 
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
 import logging
+import multiprocessing
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
 from PyQt5.QtCore import QCoreApplication, QThread
 
 from easyp2p.excel_writer import write_results
+from easyp2p.p2p_browser import BrowserManager
+from easyp2p.p2p_cache import StatementCache
+from easyp2p.p2p_cleanup import CleanupExecutor
 from easyp2p.p2p_credentials import get_credentials_from_user
 from easyp2p.p2p_settings import Settings
 from easyp2p.p2p_signals import Signals, PlatformFailedError
 import easyp2p.platforms as p2p_platforms
+from easyp2p.platforms.base_platform import (
+    BasePlatform, parse_statement_file)
 
 _translate = QCoreApplication.translate
 
@@ -33,12 +43,17 @@ class WorkerThread(QThread):
     # Signals for communicating with ProgressWindow
     signals = Signals()
 
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+            self, settings: Settings,
+            browser_manager: Optional[BrowserManager] = None) -> None:
         """
         Constructor of WorkerThread.
 
         Args:
             settings: Settings for easyp2p.
+            browser_manager: Browser manager, e.g. with a pre-warmed browser,
+                which will be used and closed by the worker. If None, a new
+                one is created when the worker starts. Default is None.
 
         """
         super().__init__()
@@ -47,13 +62,22 @@ class WorkerThread(QThread):
         self.signals.get_credentials.connect(self.get_credentials)
         self.done = False
         self.df_result = pd.DataFrame()
-
-    def get_platform_instance(self, name: str) -> p2p_platforms:
+        self.results_written = False
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        self.browser_manager: Optional[BrowserManager] = browser_manager
+        self.cleanup: Optional[CleanupExecutor] = None
+
+    def get_platform_instance(
+            self, name: str,
+            date_range: Optional[Tuple[date, date]] = None) -> p2p_platforms:
         """
         Helper method to get an instance of the platform class.
 
         Args:
             name: Name of the P2P platform/module.
+            date_range: Date range for which to download the account
+                statement. If None, the date range from the settings will be
+                used. Default is None.
 
         Returns:
             Platform class instance.
@@ -63,12 +87,15 @@ class WorkerThread(QThread):
                 download directory cannot be created.
 
         """
+        if date_range is None:
+            date_range = self.settings.date_range
+
         try:
             platform = getattr(p2p_platforms, name)
-            statement_without_suffix = self.get_statement_location(name)
+            statement_without_suffix = self.get_statement_location(
+                name, date_range)
             instance = platform(
-                self.settings.date_range, statement_without_suffix,
-                signals=self.signals)
+                date_range, statement_without_suffix, signals=self.signals)
         except AttributeError:
             self.logger.exception('Platform not found')
             raise PlatformFailedError(_translate(
@@ -85,6 +112,36 @@ class WorkerThread(QThread):
         Download and parse the account statement for given platform. Warn the
         user if there were unknown cash flow types.
 
+        If the statement cache is enabled in the settings, only the months
+        which are not cached yet will be downloaded.
+
+        Args:
+            name: Name of the P2P platform to evaluate.
+
+        Returns:
+            Parsed account statement as a data frame.
+
+        """
+        cache, download_range = self.get_download_range(name)
+        if download_range is None:
+            self.signals.add_progress_text.emit(_translate(
+                'WorkerThread', f'{name}: using cached results.'), False)
+            return cache.load(self.settings.date_range)
+
+        platform = self.start_evaluation(name, download_range)
+        platform.download_statement(
+            self.settings.headless, self.settings.reuse_sessions,
+            self.browser_manager, self.cleanup)
+        return self.finish_evaluation(name, platform, cache, download_range)
+
+    async def evaluate_platform_async(self, name: str) -> pd.DataFrame:
+        """
+        Coroutine version of evaluate_platform for platforms which use a
+        session.
+
+        The statement is downloaded on the running event loop, parsing is done
+        in the default executor to keep the event loop responsive.
+
         Args:
             name: Name of the P2P platform to evaluate.
 
@@ -92,7 +149,56 @@ class WorkerThread(QThread):
             Parsed account statement as a data frame.
 
         """
-        platform = self.get_platform_instance(name)
+        cache, download_range = self.get_download_range(name)
+        if download_range is None:
+            self.signals.add_progress_text.emit(_translate(
+                'WorkerThread', f'{name}: using cached results.'), False)
+            return cache.load(self.settings.date_range)
+
+        platform = self.start_evaluation(name, download_range)
+        await platform.async_download_statement(self.settings.reuse_sessions)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.finish_evaluation, name, platform, cache,
+            download_range)
+
+    def get_download_range(self, name: str) \
+            -> Tuple[Optional[StatementCache], Optional[Tuple[date, date]]]:
+        """
+        Get the date range for which the statement of platform name needs to
+        be downloaded.
+
+        Args:
+            name: Name of the P2P platform.
+
+        Returns:
+            Tuple with the statement cache, which is None if the cache is
+            disabled, and the date range to download, which is None if all
+            months are cached.
+
+        """
+        if not self.settings.cache_statements:
+            return None, self.settings.date_range
+
+        cache = StatementCache(
+            os.path.join(self.settings.directory, name.lower(), 'cache'), name)
+        return cache, cache.missing_date_range(self.settings.date_range)
+
+    def start_evaluation(
+            self, name: str, download_range: Tuple[date, date]) \
+            -> BasePlatform:
+        """
+        Create the platform instance and inform the user about the start of
+        the evaluation.
+
+        Args:
+            name: Name of the P2P platform.
+            download_range: Date range for which to download the statement.
+
+        Returns:
+            Platform class instance.
+
+        """
+        platform = self.get_platform_instance(name, download_range)
         self.signals.add_progress_text.emit(_translate(
             'WorkerThread', f'Starting evaluation of {name}...'), False)
 
@@ -100,9 +206,31 @@ class WorkerThread(QThread):
             self.signals.add_progress_text.emit(_translate(
                 'WorkerThread',
                 'Please manually solve the captcha on the website!'), True)
+        return platform
+
+    def finish_evaluation(
+            self, name: str, platform: BasePlatform,
+            cache: Optional[StatementCache],
+            download_range: Tuple[date, date]) -> pd.DataFrame:
+        """
+        Parse the downloaded statement, update the cache and inform the user
+        about the result.
 
-        platform.download_statement(self.settings.headless)
-        (df, unknown_cf_types) = platform.parse_statement()
+        Args:
+            name: Name of the P2P platform.
+            platform: Platform class instance whose statement was downloaded.
+            cache: Statement cache or None if the cache is disabled.
+            download_range: Date range of the downloaded statement.
+
+        Returns:
+            Parsed account statement as a data frame.
+
+        """
+        (df, unknown_cf_types) = self.parse_statement(platform)
+
+        if cache is not None:
+            cache.save(df, download_range)
+            df = cache.load(self.settings.date_range, df, download_range)
 
         if unknown_cf_types:
             warning_msg = _translate(
@@ -117,13 +245,55 @@ class WorkerThread(QThread):
 
         return df
 
-    def get_statement_location(self, name: str) -> Optional[str]:
+    def parse_statement(
+            self, platform: BasePlatform) \
+            -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+        """
+        Parse the downloaded account statement of platform.
+
+        If a parse process pool is available the statement will be parsed in
+        a separate process, otherwise directly in the worker thread.
+
+        Args:
+            platform: Platform class instance whose statement was downloaded.
+
+        Returns:
+            Tuple with the parsed account statement and the unknown cash flow
+            types.
+
+        Raises:
+            PlatformFailedError: If parsing fails or the parse process dies.
+
+        """
+        if self.parse_pool is None:
+            return platform.parse_statement()
+
+        future = self.parse_pool.submit(
+            parse_statement_file, type(platform), platform.date_range,
+            platform.statement)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self.logger.exception('Parse process pool is broken.')
+            raise PlatformFailedError(_translate(
+                'WorkerThread',
+                f'{platform.NAME}: parsing the account statement failed!'))
+        finally:
+            # The progress signal of the parser is not connected to the GUI
+            # in the worker process
+            self.signals.update_progress_bar.emit()
+
+    def get_statement_location(
+            self, name: str,
+            date_range: Optional[Tuple[date, date]] = None) -> Optional[str]:
         """
             Create directory for statement download if it does not exist yet and
             return the absolute path of the target file name.
 
             Args:
                 name: Name of the P2P platform.
+                date_range: Date range of the statement. If None, the date
+                    range from the settings will be used. Default is None.
 
             Returns:
                 Absolute path of the downloaded statement file without suffix.
@@ -135,8 +305,10 @@ class WorkerThread(QThread):
         dir_ = os.path.join(self.settings.directory, name.lower())
         if not os.path.isdir(dir_):
             os.makedirs(dir_, exist_ok=True)
-        start_date = self.settings.date_range[0].strftime('%Y%m%d')
-        end_date = self.settings.date_range[1].strftime('%Y%m%d')
+        if date_range is None:
+            date_range = self.settings.date_range
+        start_date = date_range[0].strftime('%Y%m%d')
+        end_date = date_range[1].strftime('%Y%m%d')
 
         return os.path.join(
             dir_, f'{name.lower()}_statement_{start_date}-{end_date}')
@@ -153,31 +325,184 @@ class WorkerThread(QThread):
         username, password = get_credentials_from_user(platform)
         self.signals.send_credentials.emit(username, password)
 
-    def run(self) -> None:
+    def try_evaluate_platform(self, name: str) -> Optional[pd.DataFrame]:
         """
-        Get and output results from all selected P2P platforms.
+        Evaluate platform name and report errors to the user instead of
+        raising them.
 
-        Iterates over all selected P2P platforms, downloads the account
-        statements, parses them and writes the results to an Excel file.
+        Args:
+            name: Name of the P2P platform to evaluate.
+
+        Returns:
+            Parsed account statement as a data frame or None if the evaluation
+            failed or was aborted by the user.
 
         """
-        self.logger.info('%s: starting worker.', self.settings.platforms)
+        if self.signals.abort:
+            return None
+
+        try:
+            return self.evaluate_platform(name)
+        except PlatformFailedError as err:
+            self.logger.exception('Evaluation of platform failed.')
+            self.signals.add_progress_text.emit(str(err).strip(), True)
+            self.signals.add_progress_text.emit(
+                _translate('WorkerThread', f'{name} will be ignored!'),
+                True)
+            return None
+
+    async def try_evaluate_platform_async(
+            self, name: str, semaphore: asyncio.Semaphore) \
+            -> Optional[pd.DataFrame]:
+        """
+        Coroutine version of try_evaluate_platform.
+
+        Args:
+            name: Name of the P2P platform to evaluate.
+            semaphore: Semaphore which limits the number of parallel sessions.
+
+        Returns:
+            Parsed account statement as a data frame or None if the evaluation
+            failed or was aborted by the user.
+
+        """
+        async with semaphore:
+            if self.signals.abort:
+                return None
 
-        for name in self.settings.platforms:
             try:
-                df = self.evaluate_platform(name)
-                self.df_result = self.df_result.append(df, sort=True)
+                return await self.evaluate_platform_async(name)
             except PlatformFailedError as err:
                 self.logger.exception('Evaluation of platform failed.')
                 self.signals.add_progress_text.emit(str(err).strip(), True)
                 self.signals.add_progress_text.emit(
                     _translate('WorkerThread', f'{name} will be ignored!'),
                     True)
-                continue
+                return None
+
+    async def evaluate_platforms_async(
+            self, names: List[str]) -> List[Optional[pd.DataFrame]]:
+        """
+        Evaluate several session platforms as coroutines on one event loop.
+
+        Args:
+            names: Names of the P2P platforms to evaluate.
+
+        Returns:
+            List with the parsed account statement of each platform in the same
+            order as names. Failed platforms are None.
+
+        """
+        semaphore = asyncio.Semaphore(self.settings.max_parallel_sessions)
+        return await asyncio.gather(*[
+            self.try_evaluate_platform_async(name, semaphore)
+            for name in names])
+
+    def evaluate_platforms_concurrently(
+            self, names: List[str]) -> List[Optional[pd.DataFrame]]:
+        """
+        Evaluate several platforms in parallel.
+
+        Platforms which use P2PSession only wait for network responses, so many
+        of them can run at the same time. Platforms which need a browser are
+        limited separately since each of them needs its own browser context.
+        If asynchronous sessions are enabled in the settings, all session
+        platforms run as coroutines on one event loop in a single thread.
+
+        Args:
+            names: Names of the P2P platforms to evaluate.
+
+        Returns:
+            List with the parsed account statement of each platform in the same
+            order as names. Failed platforms are None.
+
+        """
+        self.logger.info(
+            'Evaluating platforms concurrently: %d session slots, %d browser '
+            'slots.', self.settings.max_parallel_sessions,
+            self.settings.max_parallel_browsers)
+
+        with ThreadPoolExecutor(
+                max_workers=self.settings.max_parallel_sessions,
+                thread_name_prefix='easyp2p-session') as session_pool, \
+                ThreadPoolExecutor(
+                    max_workers=self.settings.max_parallel_browsers,
+                    thread_name_prefix='easyp2p-browser') as browser_pool:
+            futures = {}
+            async_names = []
+            for name in names:
+                platform = getattr(p2p_platforms, name, None)
+                if platform is not None \
+                        and platform.DOWNLOAD_METHOD in (
+                            'webdriver', 'recaptcha'):
+                    futures[name] = browser_pool.submit(
+                        self.try_evaluate_platform, name)
+                elif self.settings.async_sessions and platform is not None \
+                        and platform.DOWNLOAD_METHOD == 'session':
+                    async_names.append(name)
+                else:
+                    futures[name] = session_pool.submit(
+                        self.try_evaluate_platform, name)
+
+            async_results = {}
+            if async_names:
+                async_results = dict(zip(async_names, session_pool.submit(
+                    asyncio.run,
+                    self.evaluate_platforms_async(async_names)).result()))
+
+            return [
+                async_results[name] if name in async_results
+                else futures[name].result() for name in names]
+
+    def run(self) -> None:
+        """
+        Get and output results from all selected P2P platforms.
+
+        Iterates over all selected P2P platforms, downloads the account
+        statements, parses them and writes the results to an Excel file. If
+        concurrent evaluation is enabled in the settings, the platforms will
+        be evaluated in parallel.
+
+        """
+        self.logger.info('%s: starting worker.', self.settings.platforms)
+
+        names = list(self.settings.platforms)
+        if self.settings.parse_in_processes:
+            # Do not fork the process with running Qt threads
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.settings.max_parse_processes,
+                mp_context=multiprocessing.get_context('spawn'))
+        # Start each browser only once and give each platform its own context
+        if self.browser_manager is None:
+            self.browser_manager = BrowserManager(
+                self.settings.max_parallel_browsers)
+        # Log out in the background, only the end of the run waits for it
+        self.cleanup = CleanupExecutor()
+
+        try:
+            if self.settings.concurrent:
+                results = self.evaluate_platforms_concurrently(names)
+            else:
+                results = [self.try_evaluate_platform(name) for name in names]
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+            # Browsers must not be closed before the logouts are finished
+            for error in self.cleanup.wait():
+                self.signals.add_progress_text.emit(error, True)
+            self.cleanup = None
+            self.browser_manager.close()
+            self.browser_manager = None
+
+        for df in results:
+            if df is not None:
+                self.df_result = self.df_result.append(df, sort=True)
 
-        if not write_results(
-                self.df_result, self.settings.output_file,
-                self.settings.date_range):
+        self.results_written = write_results(
+            self.df_result, self.settings.output_file,
+            self.settings.date_range)
+        if not self.results_written:
             self.signals.add_progress_text.emit(
                 _translate('WorkerThread', 'No results available!'), True)
 
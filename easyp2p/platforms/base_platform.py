@@ -2,26 +2,40 @@
 
 """
 Implements BasePlatform, the parent class for all P2P platforms. It contains
-two public methods:
+three public methods:
 
 * download_statement: For downloading the account statement for a given date
     range. This needs to be implemented by each child class separately.
+* async_download_statement: Coroutine version of download_statement. It is
+    only available for platforms which use a session.
 * parse_statement: For parsing the downloaded account statement file.
     BasePlatform includes an implementation of this method which can be re-used
     by child classes.
 
+The module level function parse_statement_file wraps parse_statement so that
+it can be run in a separate process.
+
 """
 
 from datetime import date
-from typing import Optional, Tuple
+import os
+from typing import Optional, Tuple, Type, TYPE_CHECKING, Union
 
 import pandas as pd
 
+from easyp2p.p2p_browser import BrowserManager
+from easyp2p.p2p_chrome import MEDIA_URLS, TRACKER_URLS
+from easyp2p.p2p_cleanup import CleanupExecutor
+from easyp2p.p2p_cookies import CookieStore
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import (
+    AwaitableSession, P2PSession, PollPolicy, RetryPolicy, run_sync)
 from easyp2p.p2p_signals import Signals, PlatformFailedError
 from easyp2p.p2p_webdriver import P2PWebDriver
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 
 class BasePlatform:
 
@@ -40,6 +54,18 @@ class BasePlatform:
     LOGOUT_WAIT_UNTIL = None
     LOGOUT_LOCATOR = None
     HOVER_LOCATOR = None
+    # URL patterns which the browser does not load, only used by P2PWebDriver
+    BLOCKED_URLS = TRACKER_URLS + MEDIA_URLS
+    RETRY_POLICY = RetryPolicy()
+    POLL_POLICY = PollPolicy()
+    TIMEOUT = None  # (connect, read) timeouts, None means P2PSession default
+    POOL_MAXSIZE = None  # None means P2PSession default
+    # URL which only logged in users can access, needed for re-using sessions
+    SESSION_PROBE_URL = None
+    # Expected condition on SESSION_PROBE_URL for logged in users, needed for
+    # re-using sessions with P2PWebDriver
+    SESSION_PROBE_WAIT_UNTIL = None
+    HTTP2 = False  # Only used by AsyncP2PSession
 
     # Parser settings
     DATE_FORMAT = None
@@ -50,6 +76,10 @@ class BasePlatform:
     BALANCE_COLUMN = None
     HEADER = 0
     SKIP_FOOTER = 0
+    # Statement columns which the parser needs and their dtypes. None as dtype
+    # means that the type is inferred, None instead of a dictionary means that
+    # all columns are read.
+    STATEMENT_COLUMNS = None
 
     def __init__(
             self, date_range: Tuple[date, date],
@@ -71,7 +101,10 @@ class BasePlatform:
         self.statement = '.'.join([statement_without_suffix, self.SUFFIX])
         self.signals = signals
 
-    def download_statement(self, headless: bool = True) -> None:
+    def download_statement(
+            self, headless: bool = True, reuse_session: bool = False,
+            browser_manager: Optional[BrowserManager] = None,
+            cleanup: Optional[CleanupExecutor] = None) -> None:
         """
         Common download method for all platforms. Depending on the chosen
         DOWNLOAD_METHOD it calls the correct download method.
@@ -79,29 +112,142 @@ class BasePlatform:
         Args:
             headless: If True use Chromedriver in headless mode. Only relevant
                 for platforms that use P2PWebDriver.
+            reuse_session: If True the session is re-used in the next run
+                instead of logging out. Platforms that use P2PSession and
+                define SESSION_PROBE_URL store their cookies encrypted,
+                platforms that use P2PWebDriver and define
+                SESSION_PROBE_WAIT_UNTIL use a persistent browser profile.
+            browser_manager: If provided, the browser is re-used from previous
+                platforms. Only relevant for platforms that use P2PWebDriver.
+            cleanup: If provided, logout and closing the browser are done in
+                the background by this executor.
 
         """
         if self.DOWNLOAD_METHOD in ('webdriver', 'recaptcha'):
+            profile_directory = self._get_profile_directory(reuse_session)
             if self.DOWNLOAD_METHOD == 'recaptcha':
+                if profile_directory is not None:
+                    # The captcha only needs to be solved if the session in
+                    # the profile expired, otherwise the browser can stay
+                    # invisible. The probe browser is quit synchronously,
+                    # otherwise it could still lock the profile.
+                    with self._create_webdriver(
+                            True, browser_manager,
+                            profile_directory) as webdriver:
+                        if webdriver.restore_session(
+                                self.SESSION_PROBE_URL,
+                                self.SESSION_PROBE_WAIT_UNTIL):
+                            self._webdriver_download(webdriver)
+                            return
                 headless = False
 
-            with P2PWebDriver(
-                    self.NAME, headless, self.LOGOUT_WAIT_UNTIL,
-                    logout_url=self.LOGOUT_URL,
-                    logout_locator=self.LOGOUT_LOCATOR,
-                    hover_locator=self.HOVER_LOCATOR,
-                    signals=self.signals) as webdriver:
+            with self._create_webdriver(
+                    headless, browser_manager, profile_directory,
+                    cleanup) as webdriver:
                 self._webdriver_download(webdriver)
         elif self.DOWNLOAD_METHOD == 'session':
             with P2PSession(
                     self.NAME, self.LOGOUT_URL, self.signals,
-                    json=self.JSON) as sess:
-                self._session_download(sess)
+                    json=self.JSON, retry_policy=self.RETRY_POLICY,
+                    timeout=self.TIMEOUT, pool_maxsize=self.POOL_MAXSIZE,
+                    cookie_store=self._get_cookie_store(reuse_session),
+                    poll_policy=self.POLL_POLICY, cleanup=cleanup) as sess:
+                run_sync(self._session_download(AwaitableSession(sess)))
         else:
             raise PlatformFailedError(
                 f'{self.NAME}: invalid download method provided: '
                 f'{self.DOWNLOAD_METHOD}!')
 
+    async def async_download_statement(
+            self, reuse_session: bool = False) -> None:
+        """
+        Download the account statement with AsyncP2PSession.
+
+        Only platforms with DOWNLOAD_METHOD 'session' are supported.
+
+        Args:
+            reuse_session: If True the session cookies are stored encrypted
+                and re-used in the next run instead of logging out.
+
+        Raises:
+            PlatformFailedError: If the platform does not use a session.
+
+        """
+        if self.DOWNLOAD_METHOD != 'session':
+            raise PlatformFailedError(
+                f'{self.NAME}: asynchronous download is only supported for '
+                f'sessions!')
+
+        # httpx is an optional dependency, thus import it only when needed
+        from easyp2p.p2p_async_session import AsyncP2PSession
+
+        async with AsyncP2PSession(
+                self.NAME, self.LOGOUT_URL, self.signals, json=self.JSON,
+                retry_policy=self.RETRY_POLICY, timeout=self.TIMEOUT,
+                pool_maxsize=self.POOL_MAXSIZE,
+                cookie_store=self._get_cookie_store(reuse_session),
+                http2=self.HTTP2, poll_policy=self.POLL_POLICY) as sess:
+            await self._session_download(sess)
+
+    def _get_cookie_store(self, reuse_session: bool) -> Optional[CookieStore]:
+        """
+        Get the cookie store for re-using sessions.
+
+        Args:
+            reuse_session: True if the session should be re-used.
+
+        Returns:
+            Cookie store or None if the session cannot be re-used.
+
+        """
+        if not reuse_session or not self.SESSION_PROBE_URL:
+            return None
+        return CookieStore(self.NAME, os.path.join(
+            os.path.dirname(self.statement), 'session.cookies'))
+
+    def _get_profile_directory(self, reuse_session: bool) -> Optional[str]:
+        """
+        Get the directory of the persistent browser profile.
+
+        Args:
+            reuse_session: True if the session should be re-used.
+
+        Returns:
+            Profile directory or None if the session cannot be re-used.
+
+        """
+        if not reuse_session or self.SESSION_PROBE_WAIT_UNTIL is None:
+            return None
+        return os.path.join(os.path.dirname(self.statement), 'chrome-profile')
+
+    def _create_webdriver(
+            self, headless: bool, browser_manager: Optional[BrowserManager],
+            profile_directory: Optional[str],
+            cleanup: Optional[CleanupExecutor] = None) -> P2PWebDriver:
+        """
+        Create a P2PWebDriver instance for the platform.
+
+        Args:
+            headless: If True use Chromedriver in headless mode.
+            browser_manager: Browser manager for re-using browsers.
+            profile_directory: Directory of the persistent browser profile or
+                None for a temporary profile.
+            cleanup: Executor for logging out in the background.
+
+        Returns:
+            P2PWebDriver instance, which needs to be used as context manager.
+
+        """
+        return P2PWebDriver(
+            self.NAME, headless, self.LOGOUT_WAIT_UNTIL,
+            logout_url=self.LOGOUT_URL,
+            logout_locator=self.LOGOUT_LOCATOR,
+            hover_locator=self.HOVER_LOCATOR,
+            signals=self.signals,
+            browser_manager=browser_manager,
+            blocked_urls=self.BLOCKED_URLS,
+            profile_directory=profile_directory, cleanup=cleanup)
+
     def _webdriver_download(self, webdriver: P2PWebDriver) -> None:
         """
         Every child class using P2PWebdriver needs to override this method for
@@ -114,13 +260,18 @@ class BasePlatform:
         raise PlatformFailedError(
             f'{self.NAME}: no override of _webdriver_download!')
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Every child class using P2PSession needs to override this method for
         downloading the account statement.
 
+        The download steps are written once as a coroutine. It is run with
+        AsyncP2PSession by async_download_statement and with P2PSession, made
+        awaitable by AwaitableSession, by download_statement.
+
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
 
         """
         raise PlatformFailedError(
@@ -145,9 +296,17 @@ class BasePlatform:
         if statement:
             self.statement = statement
 
+        usecols, dtype = None, None
+        if self.STATEMENT_COLUMNS is not None:
+            usecols = self.STATEMENT_COLUMNS.keys()
+            dtype = {
+                column: dtype_ for column, dtype_
+                in self.STATEMENT_COLUMNS.items() if dtype_ is not None}
+
         parser = P2PParser(
             self.NAME, self.date_range, self.statement, header=self.HEADER,
-            skipfooter=self.SKIP_FOOTER, signals=self.signals)
+            skipfooter=self.SKIP_FOOTER, signals=self.signals,
+            usecols=usecols, dtype=dtype)
 
         self._transform_df(parser)
 
@@ -167,3 +326,36 @@ class BasePlatform:
             parser: P2PParser instance.
 
         """
+
+
+def parse_statement_file(
+        platform_class: Type[BasePlatform], date_range: Tuple[date, date],
+        statement: str) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    """
+    Parse an already downloaded account statement.
+
+    This function is meant to be submitted to a process pool. It only needs
+    picklable arguments and only the aggregated results are sent back to the
+    calling process.
+
+    Args:
+        platform_class: Class of the P2P platform, e.g. Mintos.
+        date_range: Date range (start_date, end_date) for which the account
+            statement was generated.
+        statement: File name including path of the account statement.
+
+    Returns:
+        Tuple with the data frame containing the parsed results and a tuple
+        with all unknown cash flow types.
+
+    Raises:
+        PlatformFailedError: If parsing the statement fails. The original
+            error message is preserved since the signals of the worker
+            process are not connected to the GUI.
+
+    """
+    platform = platform_class(date_range, os.path.splitext(statement)[0])
+    try:
+        return platform.parse_statement(statement)
+    except PlatformFailedError as err:
+        raise PlatformFailedError(str(err.__cause__ or err)) from None
@@ -6,12 +6,17 @@ Download and parse Bondora statement.
 
 """
 
+from typing import TYPE_CHECKING, Union
+
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 _translate = QCoreApplication.translate
 
 
@@ -26,6 +31,8 @@ class Bondora(BasePlatform):
     DOWNLOAD_METHOD = 'session'
     LOGIN_URL = 'https://www.bondora.com/en/login/'
     LOGOUT_URL = 'https://www.bondora.com/en/authorize/logout/'
+    SESSION_PROBE_URL = 'https://www.bondora.com/en/cashflow'
+    TOKEN_FIELD = '__RequestVerificationToken'
 
     # Parser settings
     DATE_FORMAT = '%d.%m.%Y'
@@ -38,24 +45,57 @@ class Bondora(BasePlatform):
         'Principal received - total': P2PParser.REDEMPTION_PAYMENT,
         'Opening balance': P2PParser.START_BALANCE_NAME,
     }
+    STATEMENT_COLUMNS = {
+        'Period': None,
+        'Opening balance': 'float64',
+        'Closing balance': 'float64',
+        'Net capital deployed': None,
+        'Net loan investments': None,
+        'Principal received - total': 'float64',
+        'Interest received - total': 'float64',
+        'Principal planned - total': 'float64',
+    }
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the Bondora account statement for given date
         range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
+
+        """
+        if not await sess.restore_session(self.SESSION_PROBE_URL):
+            data = await sess.get_values_from_tag_by_name(
+                self.LOGIN_URL, 'input', [self.TOKEN_FIELD],
+                self._login_error_msg())
+            await sess.log_into_page(
+                self.LOGIN_URL, 'Email', 'Password', data)
+
+        await sess.download_statement(
+            self._get_statement_url(), self.statement, 'get')
 
+    def _login_error_msg(self) -> str:
         """
-        token_field = '__RequestVerificationToken'
-        data = sess.get_values_from_tag_by_name(
-            self.LOGIN_URL, 'input', [token_field], _translate(
-                'P2PPlatform',
-                f'{self.NAME}: loading login page was not successful!'))
+        Get the error message if the login page cannot be loaded.
 
-        sess.log_into_page(self.LOGIN_URL, 'Email', 'Password', data)
+        Returns:
+            Translated error message.
 
+        """
+        return _translate(
+            'P2PPlatform',
+            f'{self.NAME}: loading login page was not successful!')
+
+    def _get_statement_url(self) -> str:
+        """
+        Get the download URL of the account statement.
+
+        Returns:
+            URL of the statement for the date range.
+
+        """
         dates = {
             'StartYear': self.date_range[0].strftime('%Y'),
             'StartMonth': self.date_range[0].strftime('%-m'),
@@ -66,7 +106,7 @@ class Bondora(BasePlatform):
         for key, value in dates.items():
             url += str(key) + '=' + str(value) + '&'
         url += 'downloadExcel=true'
-        sess.download_statement(url, self.statement, 'get')
+        return url
 
     def _transform_df(self, parser: P2PParser) -> None:
         """
@@ -6,12 +6,17 @@ Download and parse DoFinance statement.
 
 """
 
+from typing import Dict, TYPE_CHECKING, Union
+
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 _translate = QCoreApplication.translate
 
 
@@ -29,6 +34,8 @@ class DoFinance(BasePlatform):
     LOGIN_URL = 'https://www.dofinance.eu/en/users/login'
     LOGOUT_URL = 'https://www.dofinance.eu/en/users/logout'
     STATEMENT_URL = 'https://www.dofinance.eu/en/users/statement'
+    SESSION_PROBE_URL = STATEMENT_URL
+    TOKEN_NAMES = ['_Token[fields]', '_Token[unlocked]']
 
     # Parser settings
     DATE_FORMAT = '%d.%m.%Y'
@@ -36,36 +43,74 @@ class DoFinance(BasePlatform):
     ORIG_CF_COLUMN = 'Transaction Type'
     VALUE_COLUMN = 'Amount, €'
     SKIP_FOOTER = 2
-
-    def _session_download(self, sess: P2PSession) -> None:
+    STATEMENT_COLUMNS = {
+        'Processing Date': None,
+        'Transaction Type': 'str',
+        'Amount, €': 'float64',
+    }
+
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the DoFinance account statement for given date
         range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
 
         """
-        token_names = ['_Token[fields]', '_Token[unlocked]']
-        data = sess.get_values_from_tag_by_name(
-            self.LOGIN_URL, 'input', token_names, _translate(
-                'P2PPlatform',
-                f'{self.NAME}: loading login page was not successful!'))
-        data['_method'] = 'POST'
-        sess.log_into_page(self.LOGIN_URL, 'email', 'password', data)
+        if not await sess.restore_session(self.SESSION_PROBE_URL):
+            data = await sess.get_values_from_tag_by_name(
+                self.LOGIN_URL, 'input', self.TOKEN_NAMES,
+                self._error_msg('login'))
+            data['_method'] = 'POST'
+            await sess.log_into_page(
+                self.LOGIN_URL, 'email', 'password', data)
+
+        data = await sess.get_values_from_tag_by_name(
+            self.STATEMENT_URL, 'input', self.TOKEN_NAMES,
+            self._error_msg('account statement'))
+        await sess.download_statement(
+            self.STATEMENT_URL, self.statement, 'post',
+            self._get_statement_data(data))
+
+    def _error_msg(self, page: str) -> str:
+        """
+        Get the error message if a page cannot be loaded.
+
+        Args:
+            page: Name of the page, either 'login' or 'account statement'.
+
+        Returns:
+            Translated error message.
 
-        data = sess.get_values_from_tag_by_name(
-            self.STATEMENT_URL, 'input', token_names, _translate(
+        """
+        if page == 'login':
+            return _translate(
                 'P2PPlatform',
-                f'{self.NAME}: loading account statement page was not '
-                f'successful!'))
+                f'{self.NAME}: loading login page was not successful!')
+        return _translate(
+            'P2PPlatform',
+            f'{self.NAME}: loading account statement page was not '
+            f'successful!')
+
+    def _get_statement_data(self, data: Dict[str, str]) -> Dict[str, str]:
+        """
+        Add the date range and format to the statement request data.
+
+        Args:
+            data: Token values of the account statement page.
+
+        Returns:
+            Data for posting the statement request.
+
+        """
         data['_method'] = 'PUT'
         data['date_from'] = self.date_range[0].strftime('%d.%m.%Y')
         data['date_to'] = self.date_range[1].strftime('%d.%m.%Y')
         data['trans_type'] = ''
         data['xls'] = 'Download+XLS'
-        sess.download_statement(
-            self.STATEMENT_URL, self.statement, 'post', data)
+        return data
 
     def _transform_df(self, parser: P2PParser) -> None:
         """
@@ -5,12 +5,17 @@ Download and parse Estateguru statement.
 
 """
 
+from typing import Dict, TYPE_CHECKING, Union
+
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 _translate = QCoreApplication.translate
 
 
@@ -28,6 +33,7 @@ class Estateguru(BasePlatform):
     LOGIN_URL = 'https://estateguru.co/portal/login/authenticate'
     LOGOUT_URL = 'https://estateguru.co/portal/logoff'
     STATEMENT_URL = 'https://estateguru.co/portal/portfolio/account'
+    SESSION_PROBE_URL = STATEMENT_URL
     GEN_STATEMENT_URL = \
         'https://estateguru.co/portal/portfolio/ajaxFilterTransactions'
 
@@ -51,25 +57,55 @@ class Estateguru(BasePlatform):
     VALUE_COLUMN = 'Amount'
     BALANCE_COLUMN = 'Available to invest'
     SKIP_FOOTER = 1
+    STATEMENT_COLUMNS = {
+        'Confirmation Date': None,
+        'Cash Flow Type': 'str',
+        'Cash Flow Status': 'str',
+        'Currency': 'str',
+        'Amount': 'float64',
+        'Available to invest': 'float64',
+    }
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the Estateguru account statement for given date
         range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
 
         """
-        sess.log_into_page(self.LOGIN_URL, 'username', 'password')
+        if not await sess.restore_session(self.SESSION_PROBE_URL):
+            await sess.log_into_page(self.LOGIN_URL, 'username', 'password')
 
-        download_url = sess.get_url_from_partial_link(
+        download_url = await sess.get_url_from_partial_link(
             self.STATEMENT_URL, 'downloadOrderReport.csv', _translate(
                 'P2PPlatform',
                 f'{self.NAME}: loading account statement page failed!'))
+
+        await sess.generate_account_statement(
+            self.GEN_STATEMENT_URL, 'post',
+            self._get_statement_data(download_url))
+
+        await sess.download_statement(
+            f'https://estateguru.co{download_url}', self.statement, 'get')
+
+    def _get_statement_data(self, download_url: str) -> Dict[str, str]:
+        """
+        Get the data for generating the account statement.
+
+        Args:
+            download_url: Download link of the statement which contains the
+                user id.
+
+        Returns:
+            Data for posting the statement generation request.
+
+        """
         user_id = download_url.split('&')[1].split('=')[1]
 
-        data = {
+        return {
             'currentUserId': user_id,
             'currentCurrency': "EUR",
             'filter_isFilter': "[true]",
@@ -81,11 +117,6 @@ class Estateguru(BasePlatform):
             'controller': "portfolio",
             'action': "ajaxFilterTransactions",
         }
-        sess.generate_account_statement(
-            self.GEN_STATEMENT_URL, 'post', data)
-
-        sess.download_statement(
-            f'https://estateguru.co{download_url}', self.statement, 'get')
 
     def _transform_df(self, parser: P2PParser) -> None:
         """
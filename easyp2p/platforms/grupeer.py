@@ -8,6 +8,7 @@ Download and parse Grupeer statement.
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
+from easyp2p.p2p_chrome import TRACKER_URLS
 from easyp2p.p2p_parser import P2PParser
 from easyp2p.p2p_webdriver import P2PWebDriver
 from easyp2p.platforms.base_platform import BasePlatform
@@ -31,6 +32,10 @@ class Grupeer(BasePlatform):
     LOGOUT_WAIT_UNTIL = EC.element_to_be_clickable((By.LINK_TEXT, 'Sign In'))
     LOGOUT_LOCATOR = (By.LINK_TEXT, 'Logout')
     HOVER_LOCATOR = (By.CLASS_NAME, 'header-auth-menu-name')
+    # The captcha needs images, thus only block trackers
+    BLOCKED_URLS = TRACKER_URLS
+    SESSION_PROBE_URL = STATEMENT_URL
+    SESSION_PROBE_WAIT_UNTIL = EC.presence_of_element_located((By.ID, 'from'))
 
     # Parser settings
     DATE_FORMAT = '%d.%m.%Y'
@@ -50,6 +55,14 @@ class Grupeer(BasePlatform):
     ORIG_CF_COLUMN = 'Type'
     VALUE_COLUMN = 'Amount'
     BALANCE_COLUMN = 'Balance'
+    # Amounts use a decimal comma, _transform_df converts them to floats
+    STATEMENT_COLUMNS = {
+        'Date': None,
+        'Type': 'str',
+        'Amount': 'str',
+        'Balance': 'str',
+        'Currency': 'str',
+    }
 
     def _webdriver_download(self, webdriver: P2PWebDriver) -> None:
         """
@@ -60,10 +73,13 @@ class Grupeer(BasePlatform):
             webdriver: P2PWebDriver instance.
 
         """
-        webdriver.log_into_page(self.LOGIN_URL, 'email', 'password', None)
-        webdriver.wait_for_captcha(
-            self.LOGIN_URL, (By.CLASS_NAME, 'text-danger'),
-            'These credentials do not match our records.')
+        if not webdriver.restore_session(
+                self.SESSION_PROBE_URL, self.SESSION_PROBE_WAIT_UNTIL):
+            webdriver.log_into_page(
+                self.LOGIN_URL, 'email', 'password', None)
+            webdriver.wait_for_captcha(
+                self.LOGIN_URL, (By.CLASS_NAME, 'text-danger'),
+                'These credentials do not match our records.')
 
         webdriver.open_account_statement_page(
             self.STATEMENT_URL, (By.ID, 'from'))
@@ -76,7 +92,8 @@ class Grupeer(BasePlatform):
                 + str(self.date_range[0].strftime('%d.%m.%Y'))),
             submit_btn_locator=(By.NAME, 'submit'))
 
-        webdriver.download_statement(self.statement, (By.NAME, 'excel'))
+        webdriver.download_statement(
+            self.statement, (By.NAME, 'excel'), use_session=True)
 
     def _transform_df(self, parser: P2PParser) -> None:
         """
@@ -5,13 +5,12 @@ Download and parse Iuvo statement.
 
 """
 
-from bs4 import BeautifulSoup
 from PyQt5.QtCore import QCoreApplication
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_webdriver import P2PWebDriver, download_finished
+from easyp2p.p2p_webdriver import P2PWebDriver
 from easyp2p.platforms.base_platform import BasePlatform
 
 _translate = QCoreApplication.translate
@@ -51,6 +50,12 @@ class Iuvo(BasePlatform):
     BALANCE_COLUMN = 'Balance'
     HEADER = 3
     SKIP_FOOTER = 3
+    STATEMENT_COLUMNS = {
+        'Date': None,
+        'Transaction Type': 'str',
+        'Turnover': 'float64',
+        'Balance': 'float64',
+    }
 
     def _webdriver_download(self, webdriver: P2PWebDriver) -> None:
         """
@@ -71,9 +76,12 @@ class Iuvo(BasePlatform):
 
         webdriver.open_account_statement_page(
             self.STATEMENT_URL, (By.ID, 'date_from'))
-        soup = BeautifulSoup(webdriver.driver.page_source, 'html.parser')
+        # The account id is the value of the first input on the page
+        account_id = webdriver.driver.get_values(
+            {'account_id': (By.TAG_NAME, 'input')})['account_id']
         try:
-            account_id = soup.input["value"]
+            if not account_id:
+                raise KeyError('account_id')
             p2_var = webdriver.driver.current_url.split(';')[1]
         except (KeyError, IndexError):
             raise RuntimeError(_translate(
@@ -81,7 +89,8 @@ class Iuvo(BasePlatform):
                 f'{self.NAME}: loading account statement page was not '
                 'successful!'))
 
-        webdriver.driver.get(
+        webdriver.download_statement_by_url(
+            self.statement,
             f'https://tbp2p.iuvo-group.com/p2p-ui/app?p0=export_file;'
             f'{p2_var};;display_as=export;'
             f'export_as=xlsx;sid=rep_account_statement_full_list;sr=1;'
@@ -90,9 +99,3 @@ class Iuvo(BasePlatform):
             f'date_from={self.date_range[0].strftime("%Y-%m-%d")}&'
             f'date_to={self.date_range[1].strftime("%Y-%m-%d")};'
             f'lang=en_US&screen_width=1920&screen_height=780')
-
-        if not download_finished(
-                self.statement, webdriver.driver.download_directory):
-            raise RuntimeError(_translate(
-                'P2PPlatform',
-                f'{self.NAME}: download of account statement failed!'))
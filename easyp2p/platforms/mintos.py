@@ -6,16 +6,18 @@ Download and parse Mintos statement.
 
 """
 
+from typing import List
+
 import pandas as pd
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_parser import P2PParser
 from easyp2p.p2p_webdriver import P2PWebDriver
 from easyp2p.p2p_signals import Signals
-from easyp2p.p2p_chrome import P2PChrome
+from easyp2p.p2p_chrome import P2PChrome, TRACKER_URLS
 from easyp2p.platforms.base_platform import BasePlatform
 
 _translate = QCoreApplication.translate
@@ -36,6 +38,11 @@ class Mintos(BasePlatform):
     LOGOUT_WAIT_UNTIL = EC.element_to_be_clickable(
         (By.ID, 'header-login-button'))
     LOGOUT_LOCATOR = (By.XPATH, "//a[contains(@href,'logout')]")
+    # The captcha needs images, thus only block trackers
+    BLOCKED_URLS = TRACKER_URLS
+    SESSION_PROBE_URL = STATEMENT_URL
+    SESSION_PROBE_WAIT_UNTIL = EC.presence_of_element_located(
+        (By.ID, 'period-from'))
 
     # Parser settings
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
@@ -83,6 +90,13 @@ class Mintos(BasePlatform):
     ORIG_CF_COLUMN = 'Cash Flow Type'
     VALUE_COLUMN = 'Turnover'
     BALANCE_COLUMN = 'Balance'
+    STATEMENT_COLUMNS = {
+        'Date': None,
+        'Details': 'str',
+        'Turnover': 'float64',
+        'Balance': 'float64',
+        'Currency': 'str',
+    }
 
     signals = Signals()
 
@@ -94,10 +108,13 @@ class Mintos(BasePlatform):
             webdriver: P2PWebDriver instance.
 
         """
-        webdriver.log_into_page(self.LOGIN_URL, '_username', '_password', None)
-        webdriver.wait_for_captcha(
-            self.LOGIN_URL, (By.CLASS_NAME, 'account-login-error'),
-            'Invalid username or password')
+        if not webdriver.restore_session(
+                self.SESSION_PROBE_URL, self.SESSION_PROBE_WAIT_UNTIL):
+            webdriver.log_into_page(
+                self.LOGIN_URL, '_username', '_password', None)
+            webdriver.wait_for_captcha(
+                self.LOGIN_URL, (By.CLASS_NAME, 'account-login-error'),
+                'Invalid username or password')
 
         webdriver.open_account_statement_page(
             self.STATEMENT_URL, (By.ID, 'period-from'))
@@ -117,25 +134,18 @@ class Mintos(BasePlatform):
             self._create_empty_statement(webdriver.driver)
         else:
             webdriver.download_statement(
-                self.statement, (By.ID, 'export-button'))
+                self.statement, (By.ID, 'export-button'), use_session=True)
 
     @signals.update_progress
     def _create_empty_statement(self, driver: P2PChrome):
-        try:
-            cashflow_table = driver.find_element(By.ID, 'overview-results')
-            df = pd.read_html(cashflow_table.get_attribute("innerHTML"))[0]
-
-            if self._no_cashflows(df):
-                df = pd.DataFrame()
-                df.to_excel(self.statement)
-            else:
-                raise ValueError
-        except (NoSuchElementException, ValueError):
+        rows = driver.get_table_rows((By.ID, 'overview-results'))
+        if rows is None or not self._no_cashflows(rows):
             raise RuntimeError(_translate(
                 'P2PPlatform',
                 f'{self.NAME}: account statement generation failed!'))
+        pd.DataFrame().to_excel(self.statement)
 
-    def _no_cashflows(self, df: pd.DataFrame) -> bool:
+    def _no_cashflows(self, rows: List[List[str]]) -> bool:
         """
         Helper method to determine if there were any cash flows in date_range.
 
@@ -143,21 +153,21 @@ class Mintos(BasePlatform):
         two lines with start and end balance.
 
         Args:
-            df: DataFrame containing the Mintos cash flow table.
+            rows: Cell texts of the rows of the Mintos cash flow table.
 
         Returns:
             True if there were no cash flows, False otherwise.
 
         """
-        if len(df) != 2:
+        if len(rows) != 2:
             return False
 
-        if df.iloc[0][0] != (
-                'Opening balance ' + self.date_range[0].strftime('%d.%m.%Y')):
+        if rows[0][:1] != [
+                'Opening balance ' + self.date_range[0].strftime('%d.%m.%Y')]:
             return False
 
-        if df.iloc[1][0] != (
-                'Closing balance ' + self.date_range[1].strftime('%d.%m.%Y')):
+        if rows[1][:1] != [
+                'Closing balance ' + self.date_range[1].strftime('%d.%m.%Y')]:
             return False
 
         return True
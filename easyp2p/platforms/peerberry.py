@@ -6,11 +6,15 @@ Download and parse PeerBerry statement.
 """
 
 import json
+from typing import Dict, TYPE_CHECKING, Union
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 
 class PeerBerry(BasePlatform):
 
@@ -41,23 +45,53 @@ class PeerBerry(BasePlatform):
     }
     ORIG_CF_COLUMN = 'Type'
     VALUE_COLUMN = 'Amount'
+    STATEMENT_COLUMNS = {
+        'Date': None,
+        'Type': 'str',
+        'Amount': 'float64',
+        'Currency': 'str',
+    }
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the PeerBerry account statement for given date
         range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
+
+        """
+        resp = await sess.log_into_page(self.LOGIN_URL, 'email', 'password')
+        sess.sess.headers.update(self._get_auth_header(resp.text))
+        await sess.download_statement(
+            self._get_statement_url(), self.statement, 'get')
+
+    @staticmethod
+    def _get_auth_header(login_response: str) -> Dict[str, str]:
+        """
+        Get the authorization header from the login response.
+
+        Args:
+            login_response: Body of the login response.
+
+        Returns:
+            Authorization header with the access token.
+
+        """
+        access_token = json.loads(login_response)['access_token']
+        return {'Authorization': f'Bearer {access_token}'}
+
+    def _get_statement_url(self) -> str:
+        """
+        Get the download URL of the account statement.
+
+        Returns:
+            URL of the statement for the date range.
 
         """
-        resp = sess.log_into_page(self.LOGIN_URL, 'email', 'password')
-        access_token = json.loads(resp.text)['access_token']
-        sess.sess.headers.update(
-            {'Authorization': f'Bearer {access_token}'})
-        statement_url = (
+        return (
             f'https://api.peerberry.com/v1/investor/transactions/import?'
             f'startDate={self.date_range[0].strftime("%Y-%m-%d")}&'
             f'endDate={self.date_range[1].strftime("%Y-%m-%d")}&'
             f'transactionType=0&lang=en')
-        sess.download_statement(statement_url, self.statement, 'get')
@@ -7,13 +7,17 @@ Download and parse Robocash statement.
 """
 
 import json
+from typing import Dict, Mapping, TYPE_CHECKING, Union
 
 from PyQt5.QtCore import QCoreApplication
 
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 _translate = QCoreApplication.translate
 
 
@@ -32,6 +36,7 @@ class Robocash(BasePlatform):
     LOGOUT_URL = 'https://robo.cash/logout'
     GEN_STATEMENT_URL = 'https://robo.cash/cabinet/statement/generate'
     STATEMENT_URL = 'https://robo.cash/cabinet/statement'
+    SESSION_PROBE_URL = STATEMENT_URL
 
     # Parser settings
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
@@ -50,48 +55,90 @@ class Robocash(BasePlatform):
     ORIG_CF_COLUMN = 'Operation'
     VALUE_COLUMN = 'Amount'
     BALANCE_COLUMN = "Portfolio's balance"
+    STATEMENT_COLUMNS = {
+        'Date and time': None,
+        'Operation': 'str',
+        'Amount': 'float64',
+        "Portfolio's balance": 'float64',
+    }
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the Robocash account statement for given date
         range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
 
         """
-        data = sess.get_values_from_tag_by_name(
-            self.LOGIN_URL, 'input', ['_token'], _translate(
-                'P2PPlatform',
-                f'{self.NAME}: loading website was not successful!'))
-        sess.log_into_page(self.LOGIN_URL, 'email', 'password', data=data)
+        if not await sess.restore_session(self.SESSION_PROBE_URL):
+            data = await sess.get_values_from_tag_by_name(
+                self.LOGIN_URL, 'input', ['_token'], _translate(
+                    'P2PPlatform',
+                    f'{self.NAME}: loading website was not successful!'))
+            await sess.log_into_page(
+                self.LOGIN_URL, 'email', 'password', data=data)
+
+        token = await sess.get_value_from_script(
+            self.STATEMENT_URL, {'id': 'report-template'}, 'input',
+            '_token', self._statement_error_msg())
+        await sess.generate_account_statement(
+            self.GEN_STATEMENT_URL, 'post', self._get_statement_data(token))
+
+        report = {}
+
+        async def download_ready():
+            report.update(json.loads(await sess.get_value_from_tag(
+                self.STATEMENT_URL, 'report-component', ':initial_report',
+                self._statement_error_msg())))
+            return report['filename'] is not None
+
+        await sess.wait(download_ready)
+        await sess.download_statement(
+            self._get_download_url(report), self.statement, 'get')
 
-        statement_err_msg = _translate(
+    def _statement_error_msg(self) -> str:
+        """
+        Get the error message if the account statement page cannot be loaded.
+
+        Returns:
+            Translated error message.
+
+        """
+        return _translate(
             'P2PPlatform',
             f'{self.NAME}: loading the account statement page failed!')
-        token = sess.get_value_from_script(
-            self.STATEMENT_URL, {'id': 'report-template'}, 'input',
-            '_token', statement_err_msg)
 
-        data = {
+    def _get_statement_data(self, token: str) -> Dict[str, str]:
+        """
+        Get the data for generating the account statement.
+
+        Args:
+            token: Token of the account statement page.
+
+        Returns:
+            Data for posting the statement generation request.
+
+        """
+        return {
             '_token': token,
             'currency_id': '1',
             'start_date': self.date_range[0].strftime("%Y-%m-%d"),
             'end_date': self.date_range[1].strftime("%Y-%m-%d"),
             'statement_type': '1'
         }
-        sess.generate_account_statement(
-            self.GEN_STATEMENT_URL, 'post', data)
 
-        def download_ready():
-            report = json.loads(sess.get_value_from_tag(
-                self.STATEMENT_URL, 'report-component', ':initial_report',
-                statement_err_msg))
-            if report['filename'] is not None:
-                sess.download_statement(
-                    f'https://robo.cash/cabinet/statement/{report["id"]}'
-                    f'/download', self.statement, 'get')
-                return True
-            return False
-
-        sess.wait(download_ready)
+    @staticmethod
+    def _get_download_url(report: Mapping[str, str]) -> str:
+        """
+        Get the download URL of a generated report.
+
+        Args:
+            report: Report description of the account statement page.
+
+        Returns:
+            Download URL of the report.
+
+        """
+        return f'https://robo.cash/cabinet/statement/{report["id"]}/download'
@@ -45,6 +45,11 @@ class Swaper(BasePlatform):
     }
     ORIG_CF_COLUMN = 'Transaction type'
     VALUE_COLUMN = 'Amount'
+    STATEMENT_COLUMNS = {
+        'Booking date': None,
+        'Transaction type': 'str',
+        'Amount': 'float64',
+    }
 
     def _webdriver_download(self, webdriver: P2PWebDriver) -> None:
         """
@@ -6,14 +6,18 @@ Download and parse Twino statement.
 
 """
 
+from typing import Dict, List, TYPE_CHECKING, Union
+
 from PyQt5.QtCore import QCoreApplication
 
-from easyp2p.p2p_credentials import get_credentials
 from easyp2p.p2p_parser import P2PParser
-from easyp2p.p2p_session import P2PSession
+from easyp2p.p2p_session import AwaitableSession
 from easyp2p.p2p_signals import PlatformFailedError
 from easyp2p.platforms.base_platform import BasePlatform
 
+if TYPE_CHECKING:
+    from easyp2p.p2p_async_session import AsyncP2PSession
+
 _translate = QCoreApplication.translate
 
 
@@ -34,6 +38,8 @@ class Twino(BasePlatform):
     GEN_STATEMENT_URL = \
         'https://www.twino.eu/ws/web/investor/account-entries/' \
         'init-export-to-excel'
+    SESSION_PROBE_URL = \
+        'https://www.twino.eu/ws/web/investor/my-account-summary'
 
     # Parser settings
     DATE_FORMAT = '%d.%m.%Y %H:%M'
@@ -54,13 +60,20 @@ class Twino(BasePlatform):
     ORIG_CF_COLUMN = 'Cash Flow Type'
     VALUE_COLUMN = 'Amount, EUR'
     HEADER = 2
+    STATEMENT_COLUMNS = {
+        'Processing Date': None,
+        'Type': 'str',
+        'Description': 'str',
+        'Amount, EUR': 'float64',
+    }
 
-    def _session_download(self, sess: P2PSession) -> None:
+    async def _session_download(
+            self, sess: Union[AwaitableSession, 'AsyncP2PSession']) -> None:
         """
         Generate and download the Twino account statement for given date range.
 
         Args:
-            sess: P2PSession instance.
+            sess: AwaitableSession or AsyncP2PSession instance.
 
         Raises:
             PlatformFailedError: If two factor authorization is enabled.
@@ -68,56 +81,114 @@ class Twino(BasePlatform):
         """
         # FIXME: do not ask user twice for credentials if they are not in the
         # keyring
-        username = get_credentials(self.NAME, self.signals)[0]
-        check2fa_url = (
-            f'https://www.twino.eu/ws/public/check2fa?email={username}')
-        resp = sess.request(
-            check2fa_url, 'get', _translate(
-                'P2PPlatform', f'{self.NAME}: loading login page failed!'))
-
-        if resp.json():
+        username = (await sess.get_credentials())[0]
+        if not await sess.restore_session(self.SESSION_PROBE_URL):
+            resp = await sess.request(
+                self._get_check2fa_url(username), 'get', _translate(
+                    'P2PPlatform', f'{self.NAME}: loading login page failed!'))
+            self._check_2fa(resp.json())
+            await sess.log_into_page(self.LOGIN_URL, 'name', 'password')
+
+        await sess.generate_account_statement(
+            self.GEN_STATEMENT_URL, 'post', self._get_statement_data())
+
+        # Twino answers with status 500 until the statement is ready. The
+        # response is streamed, thus only the status is read while polling and
+        # the body is only downloaded once it is the finished statement.
+        async def download_ready():
+            error_msg = self._download_error_msg()
+            res = await sess.request(
+                self._get_download_url(username), 'get', error_msg,
+                success_codes=(200, 500), stream=True)
+            if res.status_code == 200:
+                await sess.save_response(res, self.statement, error_msg)
+                return True
+
+            if res.status_code == 500:
+                await sess.close_response(res)
+                return False
+
+            raise RuntimeError(error_msg)
+
+        await sess.wait(download_ready)
+
+    @staticmethod
+    def _get_check2fa_url(username: str) -> str:
+        """
+        Get the URL for checking if two factor authorization is enabled.
+
+        Args:
+            username: Username for Twino.
+
+        Returns:
+            URL of the two factor authorization check.
+
+        """
+        return f'https://www.twino.eu/ws/public/check2fa?email={username}'
+
+    def _check_2fa(self, enabled: bool) -> None:
+        """
+        Abort if two factor authorization is enabled.
+
+        Args:
+            enabled: Result of the two factor authorization check.
+
+        Raises:
+            PlatformFailedError: If two factor authorization is enabled.
+
+        """
+        if enabled:
             raise PlatformFailedError(_translate(
                 'P2PPlatform',
                 f'{self.NAME}: two factor authorization is not yet '
                 f'supported in easyp2p!'))
 
-        sess.log_into_page(self.LOGIN_URL, 'name', 'password')
+    def _get_statement_data(self) -> Dict[str, List[int]]:
+        """
+        Get the data for generating the account statement.
+
+        Returns:
+            Data for posting the statement generation request.
 
+        """
         start_date = [
             self.date_range[0].year, self.date_range[0].month,
             self.date_range[0].day]
         end_date = [
             self.date_range[1].year, self.date_range[1].month,
             self.date_range[1].day]
-        data = {
+        return {
             'processingDateFrom': start_date,
             'processingDateTo': end_date,
         }
-        sess.generate_account_statement(
-            self.GEN_STATEMENT_URL, 'post', data)
-
-        def download_ready():
-            download_url = (
-                f'https://www.twino.eu/ws/web/export-to-excel/{username}/'
-                f'download')
-            res = sess.request(
-                download_url, 'get', _translate(
-                    'P2PPlatform',
-                    f'{self.NAME}: download of account statement failed!'),
-                success_codes=(200, 500))
-            if res.status_code == 200:
-                with open(self.statement, 'wb') as file:
-                    file.write(res.content)
-                return True
 
-            if res.status_code == 500:
-                return False
+    @staticmethod
+    def _get_download_url(username: str) -> str:
+        """
+        Get the download URL of the generated account statement.
 
-            raise RuntimeError(_translate(
-                'P2PPlatform',
-                f'{self.NAME}: download of account statement failed!'))
+        Args:
+            username: Username for Twino.
+
+        Returns:
+            Download URL of the statement.
+
+        """
+        return (
+            f'https://www.twino.eu/ws/web/export-to-excel/{username}/'
+            f'download')
+
+    def _download_error_msg(self) -> str:
+        """
+        Get the error message if the download fails.
 
-        sess.wait(download_ready)
+        Returns:
+            Translated error message.
+
+        """
+        return _translate(
+            'P2PPlatform',
+            f'{self.NAME}: download of account statement failed!')
 
     def _transform_df(self, parser: P2PParser) -> None:
         """
@@ -44,6 +44,15 @@ class Ui_SettingsWindow(object):
         self.check_box_headless = QtWidgets.QCheckBox(SettingsWindow)
         self.check_box_headless.setObjectName("check_box_headless")
         self.verticalLayout.addWidget(self.check_box_headless)
+        self.check_box_concurrent = QtWidgets.QCheckBox(SettingsWindow)
+        self.check_box_concurrent.setObjectName("check_box_concurrent")
+        self.verticalLayout.addWidget(self.check_box_concurrent)
+        self.check_box_cache = QtWidgets.QCheckBox(SettingsWindow)
+        self.check_box_cache.setObjectName("check_box_cache")
+        self.verticalLayout.addWidget(self.check_box_cache)
+        self.check_box_reuse_sessions = QtWidgets.QCheckBox(SettingsWindow)
+        self.check_box_reuse_sessions.setObjectName("check_box_reuse_sessions")
+        self.verticalLayout.addWidget(self.check_box_reuse_sessions)
         self.button_box = QtWidgets.QDialogButtonBox(SettingsWindow)
         self.button_box.setOrientation(QtCore.Qt.Horizontal)
         self.button_box.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
@@ -63,5 +72,8 @@ class Ui_SettingsWindow(object):
         self.push_button_change.setText(_translate("SettingsWindow", "Change"))
         self.push_button_delete.setText(_translate("SettingsWindow", "Delete"))
         self.check_box_headless.setText(_translate("SettingsWindow", "ChromeDriver window invisible"))
+        self.check_box_concurrent.setText(_translate("SettingsWindow", "Evaluate platforms in parallel"))
+        self.check_box_cache.setText(_translate("SettingsWindow", "Reuse results of previously downloaded months"))
+        self.check_box_reuse_sessions.setText(_translate("SettingsWindow", "Stay logged in between evaluations (requires keyring)"))
 
 
@@ -13,14 +13,17 @@ import logging
 import os
 from pathlib import Path
 import sys
-from typing import Set
+from typing import Optional, Set
 
 from PyQt5.QtCore import (
     pyqtSlot, QCoreApplication, QLocale, QTranslator, QLibraryInfo)
+from PyQt5.QtGui import QCloseEvent
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QLineEdit, QCheckBox, QMessageBox)
 
 import easyp2p
+import easyp2p.platforms as p2p_platforms
+from easyp2p.p2p_browser import BrowserManager
 from easyp2p.p2p_settings import Settings
 from easyp2p.p2p_signals import Signals
 from easyp2p.ui.progress_window import ProgressWindow
@@ -51,6 +54,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.set_output_file()
         self.settings = Settings(
             self.date_range, self.line_edit_output_file.text())
+        # Browser which is started while the user still configures the run
+        self.browser_manager: Optional[BrowserManager] = None
+        for check_box in self.group_box_platforms.findChildren(QCheckBox):
+            check_box.toggled.connect(self.prewarm_browser)
 
     def init_date_combo_boxes(self) -> None:
         """Set the items for all date combo boxes."""
@@ -130,6 +137,30 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 platforms.add(check_box.text().replace('&', ''))
         return platforms
 
+    @pyqtSlot(bool)
+    def prewarm_browser(self, checked: bool) -> None:
+        """
+        Start the browser in the background if a platform which needs it is
+        selected.
+
+        Starting ChromeDriver takes several seconds, which are hidden this way.
+        The browser is quit again if the evaluation is not started in time.
+        Platforms which need to solve a captcha are ignored since their
+        browser is visible.
+
+        Args:
+            checked: True if a platform check box was checked.
+
+        """
+        if not checked or not any(
+                getattr(p2p_platforms, name).DOWNLOAD_METHOD == 'webdriver'
+                for name in self.get_platforms()):
+            return
+        if self.browser_manager is None:
+            self.browser_manager = BrowserManager(
+                self.settings.max_parallel_browsers)
+        self.browser_manager.prewarm(self.settings.headless)
+
     def set_output_file(self) -> None:
         """Helper method to set the name of the output file."""
         start_date = self.date_range[0].strftime('%d%m%Y')
@@ -245,8 +276,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.settings.platforms = platforms
         self.settings.output_file = self.line_edit_output_file.text()
 
+        # Hand the pre-warmed browser over to the worker, unless the settings
+        # changed in the meantime
+        browser_manager, self.browser_manager = self.browser_manager, None
+        if browser_manager is not None and browser_manager.max_contexts \
+                != self.settings.max_parallel_browsers:
+            browser_manager.close()
+            browser_manager = None
+
         # Open progress window
-        progress_window = ProgressWindow(self.settings)
+        progress_window = ProgressWindow(self.settings, browser_manager)
         progress_window.exec_()
 
     @pyqtSlot()
@@ -256,6 +295,20 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.get_platforms(False), self.settings)
         settings_window.exec_()
 
+    def closeEvent(  # pylint: disable=invalid-name
+            self, event: QCloseEvent) -> None:
+        """
+        Quit the pre-warmed browser before closing the main window.
+
+        Args:
+            event: Close event.
+
+        """
+        if self.browser_manager is not None:
+            self.browser_manager.close()
+            self.browser_manager = None
+        super().closeEvent(event)
+
 
 def main():
     """Open the main window of easyp2p."""
@@ -4,11 +4,13 @@
 """Module implementing ProgressWindow."""
 
 import sys
+from typing import Optional
 
 from PyQt5.QtCore import pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QMessageBox
 
+from easyp2p.p2p_browser import BrowserManager
 from easyp2p.p2p_settings import Settings
 from easyp2p.p2p_worker import WorkerThread
 from easyp2p.ui.Ui_progress_window import Ui_ProgressWindow
@@ -20,12 +22,16 @@ class ProgressWindow(QDialog, Ui_ProgressWindow):
 
     abort = pyqtSignal()
 
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+            self, settings: Settings,
+            browser_manager: Optional[BrowserManager] = None) -> None:
         """
         Constructor of ProgressWindow class.
 
         Args:
             settings: Settings for easyp2p
+            browser_manager: Browser manager which is handed over to the
+                worker thread. Default is None.
 
         """
         super().__init__()
@@ -42,7 +48,7 @@ class ProgressWindow(QDialog, Ui_ProgressWindow):
         self.button_box.button(QDialogButtonBox.Ok).setEnabled(False)
 
         # Initialize and start worker thread
-        self.worker = WorkerThread(settings)
+        self.worker = WorkerThread(settings, browser_manager)
         self.worker.signals.end_easyp2p.connect(self.end_easyp2p)
         self.worker.signals.update_progress_bar.connect(
             self.update_progress_bar)
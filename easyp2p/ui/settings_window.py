@@ -47,6 +47,9 @@ class SettingsWindow(QDialog, Ui_SettingsWindow):
             self.push_button_change.setEnabled(False)
             self.push_button_delete.setEnabled(False)
         self.check_box_headless.setChecked(self.settings.headless)
+        self.check_box_concurrent.setChecked(self.settings.concurrent)
+        self.check_box_cache.setChecked(self.settings.cache_statements)
+        self.check_box_reuse_sessions.setChecked(self.settings.reuse_sessions)
 
     @pyqtSlot()
     def on_push_button_add_clicked(self) -> None:
@@ -111,4 +114,8 @@ class SettingsWindow(QDialog, Ui_SettingsWindow):
     def on_button_box_accepted(self):
         """Update settings if user clicked OK."""
         self.settings.headless = self.check_box_headless.isChecked()
+        self.settings.concurrent = self.check_box_concurrent.isChecked()
+        self.settings.cache_statements = self.check_box_cache.isChecked()
+        self.settings.reuse_sessions = \
+            self.check_box_reuse_sessions.isChecked()
         self.accept()
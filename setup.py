@@ -45,5 +45,13 @@ setuptools.setup(
     install_requires=[
         'arrow', 'bs4', 'keyring', 'lxml', 'pandas', 'PyQt5', 'requests',
         'selenium', 'xlrd', 'xlsxwriter'],
-    entry_points={'gui_scripts': ['easyp2p=easyp2p.ui.main_window:main']},
+    extras_require={
+        'sessions': ['cryptography'],
+        'async': ['httpx'],
+        'http2': ['httpx[http2]'],
+    },
+    entry_points={
+        'gui_scripts': ['easyp2p=easyp2p.ui.main_window:main'],
+        'console_scripts': ['easyp2p-cli=easyp2p.p2p_cli:main'],
+    },
 )
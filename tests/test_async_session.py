@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_async_session."""
+
+import asyncio
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from easyp2p.p2p_async_session import AsyncP2PSession
+from easyp2p.p2p_session import RetryPolicy
+from easyp2p.p2p_signals import PlatformFailedError, Signals
+
+STATEMENT = os.urandom(200 * 1024)
+
+LOGIN_PAGE = b'<html><input name="token" value="abc"></html>'
+
+
+class PlatformHandler(BaseHTTPRequestHandler):
+
+    """
+    Simulate a P2P platform.
+
+    /login returns a token on get and accepts the credentials on post.
+    /report is ready after two requests, /statement returns the statement and
+    /flaky/<n>/<id> fails with status 503 for the first n requests.
+
+    """
+
+    requests = Counter()
+    posted = {}
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer get requests."""
+        self.requests[self.path] += 1
+        if self.path == '/login':
+            self.send_body(LOGIN_PAGE)
+        elif self.path == '/report':
+            ready = self.requests[self.path] > 2
+            self.send_body(json.dumps({'ready': ready}).encode())
+        elif self.path == '/statement':
+            self.send_body(STATEMENT)
+        elif self.path.startswith('/flaky/') \
+                and self.requests[self.path] > int(self.path.split('/')[2]):
+            self.send_body(b'')
+        elif self.path.startswith('/flaky/'):
+            self.send_error(503)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer post requests."""
+        self.requests[self.path] += 1
+        length = int(self.headers.get('Content-Length', 0))
+        self.posted[self.path] = self.rfile.read(length).decode()
+        if self.path == '/login':
+            self.send_body(b'')
+        else:
+            self.send_error(503)
+
+    def send_body(self, body: bytes) -> None:
+        """Send a successful response with body."""
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output clean."""
+
+
+SERVER = ThreadingHTTPServer(('127.0.0.1', 0), PlatformHandler)
+URL = f'http://127.0.0.1:{SERVER.server_port}'
+
+
+def setUpModule():  # pylint: disable=invalid-name
+    """Start the local HTTP server."""
+    threading.Thread(target=SERVER.serve_forever, daemon=True).start()
+
+
+def tearDownModule():  # pylint: disable=invalid-name
+    """Stop the local HTTP server."""
+    SERVER.shutdown()
+    SERVER.server_close()
+
+
+class AsyncP2PSessionTests(unittest.TestCase):
+
+    """Contains all tests for AsyncP2PSession."""
+
+    def setUp(self) -> None:
+        """Create a temporary download directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.temp_dir.name, 'statement.xlsx')
+
+    def tearDown(self) -> None:
+        """Delete the download directory."""
+        self.temp_dir.cleanup()
+
+    @patch('easyp2p.p2p_async_session.get_credentials')
+    def test_log_into_page(self, mock_credentials):
+        """Test login with a token from the login page."""
+        mock_credentials.return_value = ('TestUser', 'TestPass')
+
+        async def log_in():
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                data = await sess.get_values_from_tag_by_name(
+                    URL + '/login', 'input', ['token'], 'Test error')
+                await sess.log_into_page(
+                    URL + '/login', 'user', 'password', data)
+                sess.logged_in = False
+        asyncio.run(log_in())
+        self.assertEqual(
+            PlatformHandler.posted['/login'],
+            'token=abc&user=TestUser&password=TestPass')
+
+    def test_download_statement(self):
+        """Test that the statement is streamed to the target location."""
+        async def download():
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                await sess.download_statement(
+                    URL + '/statement', self.location, 'get')
+        asyncio.run(download())
+        with open(self.location, 'rb') as file:
+            self.assertEqual(file.read(), STATEMENT)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['statement.xlsx'])
+
+    def test_disconnect_signals(self):
+        """Test that the signals are disconnected after the logout."""
+        signals = Signals()
+        messages = []
+        signals.add_progress_text.connect(lambda txt, _: messages.append(txt))
+
+        async def log_out():
+            async with AsyncP2PSession(
+                    'Test', URL + '/logout', signals) as sess:
+                sess.logged_in = True
+            return sess
+        sess = asyncio.run(log_out())
+        self.assertEqual(messages, ['Test: logout was not successful!'])
+        sess.signals.add_progress_text.emit('Test', True)
+        self.assertEqual(len(messages), 1)
+
+    def test_download_statement_error(self):
+        """Test that nothing is written if the download fails."""
+        async def download():
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                await sess.download_statement(
+                    URL + '/missing', self.location, 'get')
+        self.assertRaises(PlatformFailedError, asyncio.run, download())
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_wait(self):
+        """Test waiting for a generated report."""
+        async def wait():
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                async def ready():
+                    resp = await sess.request(URL + '/report', 'get', 'Error')
+                    return resp.json()['ready']
+                await sess.wait(ready)
+        asyncio.run(wait())
+        self.assertEqual(PlatformHandler.requests['/report'], 3)
+
+    @patch('easyp2p.p2p_async_session.asyncio.sleep')
+    def test_retry_transient_error(self, mock_sleep):
+        """Test that transient errors are retried."""
+        mock_sleep.return_value = None
+
+        async def request():
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                await sess.request(URL + '/flaky/2/a', 'get', 'Test error')
+                return sess.retries
+        self.assertEqual(asyncio.run(request()), 2)
+        self.assertEqual(PlatformHandler.requests['/flaky/2/a'], 3)
+
+    def test_no_retry_for_post(self):
+        """Test that post requests are not retried."""
+        async def request():
+            async with AsyncP2PSession(
+                    'Test', URL + '/logout', None,
+                    retry_policy=RetryPolicy(backoff_factor=0.)) as sess:
+                await sess.request(URL + '/post', 'post', 'Test error')
+        self.assertRaises(PlatformFailedError, asyncio.run, request())
+        self.assertEqual(PlatformHandler.requests['/post'], 1)
+
+    def test_parallel_sessions(self):
+        """Test that several sessions can run on one event loop."""
+        async def download(location):
+            async with AsyncP2PSession('Test', URL + '/logout', None) as sess:
+                await sess.download_statement(
+                    URL + '/statement', location, 'get')
+
+        async def download_all():
+            await asyncio.gather(*[
+                download(os.path.join(self.temp_dir.name, f'{i}.xlsx'))
+                for i in range(3)])
+        asyncio.run(download_all())
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_browser."""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import WebDriverException
+
+from easyp2p.p2p_browser import BrowserManager
+
+
+def create_driver(download_directory, headless, _=None, **kwargs):
+    """Create a fake P2PChrome instance."""
+    driver = MagicMock()
+    driver.download_directory = download_directory
+    driver.headless = headless
+    driver.attached_to = kwargs.get('debugger_address')
+    return driver
+
+
+def wait_for(condition, timeout=5.):
+    """Wait until condition is fulfilled, return False on timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@patch('easyp2p.p2p_browser.P2PChrome', side_effect=create_driver)
+class BrowserManagerTests(unittest.TestCase):
+
+    """Contains all tests for BrowserManager."""
+
+    def test_reuse_session(self, mock_chrome):
+        """Test that a released session is re-used for the next platform."""
+        with BrowserManager() as manager:
+            driver = manager.acquire('dir1', True)
+            driver.open_context.assert_called_once_with()
+            manager.release(driver)
+            driver.close_context.assert_called_once_with()
+            self.assertIs(manager.acquire('dir2', True), driver)
+        self.assertEqual(mock_chrome.call_count, 1)
+        self.assertEqual(driver.download_directory, 'dir2')
+        self.assertEqual(driver.open_context.call_count, 2)
+
+    def test_headless_mode(self, mock_chrome):
+        """Test that each headless mode gets its own browser."""
+        with BrowserManager() as manager:
+            driver = manager.acquire('dir1', True)
+            manager.release(driver)
+            driver2 = manager.acquire('dir2', False)
+        self.assertIsNot(driver2, driver)
+        self.assertIsNone(driver2.attached_to)
+        self.assertEqual(mock_chrome.call_count, 2)
+
+    def test_parallel_contexts(self, mock_chrome):
+        """Test that parallel platforms attach to the running browser."""
+        with BrowserManager() as manager:
+            driver1 = manager.acquire('dir1', True)
+            driver2 = manager.acquire('dir2', True)
+        self.assertIsNot(driver1, driver2)
+        self.assertIsNone(driver1.attached_to)
+        self.assertIs(driver2.attached_to, driver1.debugger_address)
+        self.assertEqual(mock_chrome.call_count, 2)
+
+    def test_max_contexts(self, _):
+        """Test that acquire blocks if all contexts are in use."""
+        manager = BrowserManager(max_contexts=1)
+        driver1 = manager.acquire('dir1', True)
+        acquired = threading.Event()
+
+        def acquire():
+            manager.acquire('dir2', True)
+            acquired.set()
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.2))
+        manager.release(driver1)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+        manager.close()
+
+    def test_close_context_fails(self, mock_chrome):
+        """Test that a session whose context cannot be closed is quit."""
+        with BrowserManager() as manager:
+            driver = manager.acquire('dir1', True)
+            driver.close_context.side_effect = WebDriverException()
+            manager.release(driver)
+            driver.quit.assert_called_once_with()
+            self.assertIsNot(manager.acquire('dir2', True), driver)
+        self.assertEqual(mock_chrome.call_count, 2)
+
+    def test_prewarm(self, mock_chrome):
+        """Test that the pre-warmed browser is used by the first platform."""
+        with BrowserManager() as manager:
+            manager.prewarm(True)
+            self.assertTrue(wait_for(lambda: manager._hosts))
+            manager.prewarm(True)
+            driver = manager.acquire('dir1', True)
+            self.assertIsNone(driver.attached_to)
+            self.assertEqual(driver.download_directory, 'dir1')
+            driver.open_context.assert_called_once_with()
+            self.assertFalse(manager._prewarmed)
+        self.assertEqual(mock_chrome.call_count, 1)
+        driver.quit.assert_called_once_with()
+
+    def test_prewarm_timeout(self, mock_chrome):
+        """Test that an unused pre-warmed browser is quit."""
+        drivers = []
+
+        def create(*args, **kwargs):
+            drivers.append(create_driver(*args, **kwargs))
+            return drivers[-1]
+        mock_chrome.side_effect = create
+        with BrowserManager() as manager:
+            manager.prewarm(True, timeout=0.1)
+            self.assertTrue(wait_for(lambda: drivers and not manager._hosts))
+            drivers[0].quit.assert_called_once_with()
+            self.assertFalse(manager._idle[True])
+            self.assertIsNot(manager.acquire('dir1', True), drivers[0])
+
+    def test_prewarm_fails(self, mock_chrome):
+        """Test that errors while pre-warming are only logged."""
+        mock_chrome.side_effect = WebDriverException()
+        with BrowserManager() as manager:
+            manager.prewarm(True)
+            self.assertTrue(wait_for(lambda: mock_chrome.called))
+            self.assertFalse(manager._hosts)
+
+    def test_close_while_prewarming(self, mock_chrome):
+        """Test that close does not wait for a starting browser."""
+        drivers = []
+        release = threading.Event()
+
+        def create(*args, **kwargs):
+            release.wait(5)
+            drivers.append(create_driver(*args, **kwargs))
+            return drivers[-1]
+        mock_chrome.side_effect = create
+        manager = BrowserManager()
+        manager.prewarm(True)
+        self.assertTrue(wait_for(lambda: mock_chrome.called))
+        manager.close()
+        self.assertFalse(release.is_set())
+        release.set()
+        self.assertTrue(wait_for(lambda: drivers and drivers[0].quit.called))
+        self.assertFalse(manager._hosts)
+
+    def test_attach_to_starting_browser(self, mock_chrome):
+        """Test that platforms wait for a starting browser and attach to it."""
+        release = threading.Event()
+
+        def create(*args, **kwargs):
+            if not kwargs:
+                release.wait(5)
+            return create_driver(*args, **kwargs)
+        mock_chrome.side_effect = create
+        drivers = {}
+
+        def acquire(directory):
+            drivers[directory] = manager.acquire(directory, True)
+        with BrowserManager() as manager:
+            thread1 = threading.Thread(target=acquire, args=('dir1',))
+            thread1.start()
+            self.assertTrue(wait_for(lambda: mock_chrome.called))
+            thread2 = threading.Thread(target=acquire, args=('dir2',))
+            thread2.start()
+            thread2.join(0.1)
+            self.assertEqual(mock_chrome.call_count, 1)
+            release.set()
+            thread1.join(5)
+            thread2.join(5)
+        self.assertEqual(mock_chrome.call_count, 2)
+        self.assertIs(
+            drivers['dir2'].attached_to, drivers['dir1'].debugger_address)
+
+    def test_close(self, _):
+        """Test that closing the manager quits all sessions."""
+        manager = BrowserManager()
+        driver1 = manager.acquire('dir1', True)
+        driver2 = manager.acquire('dir2', True)
+        manager.release(driver2)
+        manager.close()
+        driver1.quit.assert_called_once_with()
+        driver2.quit.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_cache."""
+
+from datetime import date
+import tempfile
+import unittest
+
+import pandas as pd
+
+from easyp2p.p2p_cache import StatementCache
+from easyp2p.p2p_parser import P2PParser
+import easyp2p.platforms as p2p_platforms
+
+from tests import INPUT_PREFIX
+
+DATE_RANGE = (date(2018, 8, 1), date(2019, 1, 31))
+
+
+class StatementCacheTests(unittest.TestCase):
+
+    """Contains all tests for StatementCache."""
+
+    def setUp(self) -> None:
+        """Create a temporary cache directory and parse a statement."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = StatementCache(self.temp_dir.name, 'Iuvo')
+        platform = p2p_platforms.Iuvo(
+            DATE_RANGE, INPUT_PREFIX + 'iuvo_parser_missing_month')
+        (self.df, _) = platform.parse_statement()
+
+    def tearDown(self) -> None:
+        """Delete the cache directory."""
+        self.temp_dir.cleanup()
+
+    def test_missing_date_range_empty_cache(self):
+        """Test that the whole range is missing if the cache is empty."""
+        self.assertEqual(
+            self.cache.missing_date_range((date(2018, 8, 3), date(2018, 9, 5))),
+            (date(2018, 8, 1), date(2018, 9, 5)))
+
+    def test_missing_date_range_current_month(self):
+        """Test that the missing date range does not end in the future."""
+        month = date.today().replace(day=1)
+        self.assertEqual(
+            self.cache.missing_date_range((month, date.today())),
+            (month, date.today()))
+
+    def test_partial_month_is_not_cached(self):
+        """Test that partially downloaded months are not cached."""
+        self.cache.save(self.df, (date(2018, 8, 1), date(2018, 9, 5)))
+        self.assertEqual(
+            self.cache.missing_date_range(DATE_RANGE),
+            (date(2018, 9, 1), date(2019, 1, 31)))
+
+    def test_missing_date_range_after_save(self):
+        """Test that only months which were not saved are missing."""
+        self.cache.save(self.df, DATE_RANGE)
+        self.assertIsNone(self.cache.missing_date_range(DATE_RANGE))
+        self.assertEqual(
+            self.cache.missing_date_range((date(2018, 8, 1), date(2019, 3, 31))),
+            (date(2019, 2, 1), date(2019, 3, 31)))
+
+    def test_current_month_is_not_cached(self):
+        """Test that the still open current month is never cached."""
+        month = date.today().replace(day=1)
+        date_range = (month, date.today())
+        self.cache.save(self.df.iloc[0:0], date_range)
+        self.assertEqual(
+            self.cache.missing_date_range(date_range)[0], month)
+
+    def test_load_equals_parser_result(self):
+        """Test that cached results are identical to the parser results."""
+        self.cache.save(self.df, DATE_RANGE)
+        df = self.cache.load(DATE_RANGE)
+        pd.testing.assert_frame_equal(df, self.df)
+
+    def test_load_combines_cache_and_download(self):
+        """Test combining cached months with freshly parsed months."""
+        dates = self.df.index.get_level_values(P2PParser.DATE)
+        first_part = self.df[dates < pd.Timestamp(2018, 11, 1)]
+        second_part = self.df[dates >= pd.Timestamp(2018, 11, 1)]
+        self.cache.save(first_part, (date(2018, 8, 1), date(2018, 10, 31)))
+        df = self.cache.load(
+            DATE_RANGE, second_part, (date(2018, 11, 1), date(2019, 1, 31)))
+        pd.testing.assert_frame_equal(df, self.df)
+
+    def test_load_no_cash_flows(self):
+        """Test that a zero line is returned if there were no cash flows."""
+        date_range = (date(2016, 9, 1), date(2016, 12, 31))
+        self.cache.save(self.df.iloc[0:0], date_range)
+        df = self.cache.load(date_range)
+        self.assertEqual(len(df), 1)
+        self.assertEqual(
+            df.index[0], ('Iuvo', 'EUR', pd.Timestamp(2016, 9, 1)))
+        self.assertFalse(df.any(axis=None))
+
+    def test_load_old_partition(self):
+        """Test loading partitions which contain date objects."""
+        df = self.df.copy()
+        df.index = df.index.set_levels(
+            df.index.levels[2].date, level=P2PParser.DATE)
+        self.cache.save(df, DATE_RANGE)
+        df = self.cache.load(DATE_RANGE)
+        pd.testing.assert_frame_equal(df, self.df)
+
+
+if __name__ == "__main__":
+    unittest.main()
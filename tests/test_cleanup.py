@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_cleanup."""
+
+import threading
+import unittest
+
+from easyp2p.p2p_cleanup import CleanupExecutor
+from easyp2p.p2p_signals import PlatformFailedError
+
+
+class CleanupExecutorTests(unittest.TestCase):
+
+    """Contains all tests for CleanupExecutor."""
+
+    def test_background(self):
+        """Test that submit does not wait for the cleanup."""
+        cleanup = CleanupExecutor()
+        release = threading.Event()
+        done = []
+
+        def logout():
+            release.wait(5)
+            done.append(True)
+        cleanup.submit('Test', logout)
+        self.assertEqual(done, [])
+        release.set()
+        self.assertEqual(cleanup.wait(), [])
+        self.assertEqual(done, [True])
+
+    def test_errors(self):
+        """Test that failed cleanups are reported."""
+        def warn():
+            raise RuntimeWarning('Test: logout was not successful!')
+
+        def fail():
+            try:
+                raise RuntimeError('Test2: logout was not successful!')
+            except RuntimeError as err:
+                raise PlatformFailedError from err
+        cleanup = CleanupExecutor()
+        cleanup.submit('Test', warn)
+        cleanup.submit('Test2', fail)
+        cleanup.submit('Test3', lambda: None)
+        self.assertEqual(cleanup.wait(), [
+            'Test: logout was not successful!',
+            'Test2: logout was not successful!'])
+
+    def test_timeout(self):
+        """Test that the run does not wait forever for a cleanup."""
+        cleanup = CleanupExecutor(timeout=0.1)
+        release = threading.Event()
+        cleanup.submit('Test', lambda: release.wait(5))
+        self.assertEqual(cleanup.wait(), ['Test: logout took too long!'])
+        release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_cli."""
+
+from datetime import date
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from easyp2p.p2p_cli import (
+    get_parser, get_platform_names, get_settings, run_evaluation)
+from easyp2p.p2p_signals import PlatformFailedError
+
+
+class CliTests(unittest.TestCase):
+
+    """Contains all tests for the command line interface."""
+
+    def test_no_widgets_imported(self):
+        """Test that the command line interface does not import Qt widgets."""
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys; import easyp2p.p2p_cli; '
+             'print("PyQt5.QtWidgets" in sys.modules)'],
+            capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_get_settings(self):
+        """Test converting command line arguments to settings."""
+        args = get_parser().parse_args([
+            '--start', '2018-09-01', '--end', '2018-12-31', '-p', 'Bondora',
+            '-p', 'Mintos', '-o', 'test.xlsx', '--concurrent', '--cache'])
+        settings = get_settings(args)
+        self.assertEqual(
+            settings.date_range, (date(2018, 9, 1), date(2018, 12, 31)))
+        self.assertEqual(settings.platforms, {'Bondora', 'Mintos'})
+        self.assertEqual(settings.output_file, os.path.abspath('test.xlsx'))
+        self.assertTrue(settings.headless)
+        self.assertTrue(settings.concurrent)
+        self.assertTrue(settings.cache_statements)
+        self.assertFalse(settings.parse_in_processes)
+
+    def test_get_settings_all_platforms(self):
+        """Test that all platforms are evaluated if none are given."""
+        args = get_parser().parse_args([
+            '--start', '2018-09-01', '--end', '2018-12-31', '-o', 'test.xlsx'])
+        self.assertEqual(
+            get_settings(args).platforms, set(get_platform_names()))
+
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_evaluation(self, mock_eval, mock_writer):
+        """Test that progress events are reported to the caller."""
+        def evaluate(name):
+            if name == 'Mintos':
+                raise PlatformFailedError('Test error')
+            return pd.DataFrame([name])
+        mock_eval.side_effect = evaluate
+        mock_writer.return_value = True
+        args = get_parser().parse_args([
+            '--start', '2018-09-01', '--end', '2018-12-31', '-p', 'Bondora',
+            '-p', 'Mintos', '-o', 'test.xlsx'])
+        events = []
+        self.assertTrue(run_evaluation(get_settings(args), events.append))
+        self.assertIn(
+            ('message', 'Test error', True),
+            [(event.kind, event.message, event.error) for event in events])
+        self.assertEqual(events[-1].kind, 'done')
+        self.assertFalse(events[-1].error)
+
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_evaluation_twice(self, mock_eval, mock_writer):
+        """Test that the library can run several evaluations."""
+        mock_eval.side_effect = lambda name: pd.DataFrame([name])
+        mock_writer.return_value = True
+        args = get_parser().parse_args([
+            '--start', '2018-09-01', '--end', '2018-12-31', '-p', 'Bondora',
+            '-o', 'test.xlsx'])
+        for _ in range(2):
+            events = []
+            self.assertTrue(run_evaluation(get_settings(args), events.append))
+            self.assertEqual(
+                [event.kind for event in events], ['progress', 'done'])
+            self.assertFalse(events[-1].error)
+
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_evaluation_write_fails(self, mock_eval, mock_writer):
+        """Test that the evaluation fails if no results were written."""
+        mock_eval.side_effect = lambda name: pd.DataFrame([name])
+        mock_writer.return_value = False
+        args = get_parser().parse_args([
+            '--start', '2018-09-01', '--end', '2018-12-31', '-p', 'Bondora',
+            '-o', 'test.xlsx'])
+        events = []
+        self.assertFalse(run_evaluation(get_settings(args), events.append))
+        self.assertEqual(events[-1].kind, 'done')
+        self.assertTrue(events[-1].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_cookies."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from requests.cookies import RequestsCookieJar
+
+from easyp2p.p2p_cookies import COOKIE_KEY_NAME, CookieStore, delete_cookie_key
+
+
+class FakeKeyring:
+
+    """Keyring replacement which keeps passwords in a dictionary."""
+
+    def __init__(self):
+        self.passwords = {}
+
+    def get_password(self, service, username):
+        """Get a password."""
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        """Set a password."""
+        self.passwords[(service, username)] = password
+
+    def delete_password(self, service, username):
+        """Delete a password."""
+        del self.passwords[(service, username)]
+
+
+class CookieStoreTests(unittest.TestCase):
+
+    """Contains all tests for CookieStore."""
+
+    def setUp(self) -> None:
+        """Create a temporary directory and a fake keyring."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.temp_dir.name, 'session.cookies')
+        self.keyring = FakeKeyring()
+        self.keyring.set_password('TestPlatform', 'username', 'TestUser')
+        patcher = patch('easyp2p.p2p_cookies.keyring', self.keyring)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = CookieStore('TestPlatform', self.file_name)
+        self.jar = RequestsCookieJar()
+        self.jar.set('session', 'secret', domain='example.com', path='/')
+
+    def tearDown(self) -> None:
+        """Delete the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_save_and_load(self):
+        """Test that saved cookies can be loaded again."""
+        self.assertTrue(self.store.save(self.jar))
+        jar = self.store.load()
+        self.assertEqual(jar.get('session', domain='example.com'), 'secret')
+
+    def test_cookies_are_encrypted(self):
+        """Test that the cookie values are not stored in plain text."""
+        self.store.save(self.jar)
+        with open(self.file_name, 'rb') as file:
+            self.assertNotIn(b'secret', file.read())
+        self.assertEqual(os.stat(self.file_name).st_mode & 0o777, 0o600)
+
+    def test_no_keyring_entry(self):
+        """Test that nothing is stored without credentials in the keyring."""
+        self.keyring.delete_password('TestPlatform', 'username')
+        self.assertFalse(self.store.save(self.jar))
+        self.assertFalse(os.path.isfile(self.file_name))
+
+    def test_deleted_key(self):
+        """Test that cookies cannot be used after deleting the key."""
+        self.store.save(self.jar)
+        delete_cookie_key('TestPlatform')
+        self.assertIsNone(
+            self.keyring.get_password('TestPlatform', COOKIE_KEY_NAME))
+        self.assertIsNone(self.store.load())
+
+    def test_other_user(self):
+        """Test that cookies of another user are not used."""
+        self.store.save(self.jar)
+        self.keyring.set_password('TestPlatform', 'username', 'OtherUser')
+        self.assertIsNone(self.store.load())
+        self.assertFalse(os.path.isfile(self.file_name))
+
+    def test_corrupt_file(self):
+        """Test that a corrupt cookie file is ignored and deleted."""
+        self.store.save(self.jar)
+        with open(self.file_name, 'wb') as file:
+            file.write(b'corrupt')
+        self.assertIsNone(self.store.load())
+        self.assertFalse(os.path.isfile(self.file_name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -86,7 +86,7 @@ class CredentialsTests(unittest.TestCase):
             side_effect=PasswordDeleteError)
         self.assertFalse(delete_platform_from_keyring('TestPlatform'))
 
-    @unittest.mock.patch('easyp2p.p2p_credentials.CredentialsWindow')
+    @unittest.mock.patch('easyp2p.ui.credentials_window.CredentialsWindow')
     def test_get_credentials_from_user_no_save_in_keyring(
             self, mock_cred_window, _):
         """Test getting credentials from the user without saving in keyring."""
@@ -98,7 +98,7 @@ class CredentialsTests(unittest.TestCase):
         self.assertEqual(username, 'TestUser')
         self.assertEqual(password, 'TestPass')
 
-    @unittest.mock.patch('easyp2p.p2p_credentials.CredentialsWindow')
+    @unittest.mock.patch('easyp2p.ui.credentials_window.CredentialsWindow')
     @unittest.mock.patch('easyp2p.p2p_credentials.save_platform_in_keyring')
     def test_get_credentials_from_user_save_in_keyring(
             self, mock_save_in_keyring, mock_cred_window, _):
@@ -113,7 +113,7 @@ class CredentialsTests(unittest.TestCase):
         mock_save_in_keyring.assert_called_once_with(
             'TestPlatform', 'TestUser', 'TestPass')
 
-    @unittest.mock.patch('easyp2p.p2p_credentials.CredentialsWindow')
+    @unittest.mock.patch('easyp2p.ui.credentials_window.CredentialsWindow')
     @unittest.mock.patch('easyp2p.p2p_credentials.save_platform_in_keyring')
     def test_get_credentials_from_user_save_in_keyring_fails(
             self, mock_save_in_keyring, mock_cred_window, _):
@@ -25,8 +25,13 @@ class MainWindowTests(unittest.TestCase):
     PLATFORMS = {pl for pl in dir(easyp2p.platforms) if pl[0].isupper()}
 
     def setUp(self) -> None:
-        """Create the GUI."""
+        """Create the GUI without starting real browsers."""
+        patcher = unittest.mock.patch('easyp2p.ui.main_window.BrowserManager')
+        self.mock_manager = patcher.start()
+        self.addCleanup(patcher.stop)
         self.form = MainWindow(APP)
+        self.mock_manager.return_value.max_contexts = \
+            self.form.settings.max_parallel_browsers
 
     def set_date_combo_boxes(
             self, start_month: int, start_year: int, end_month: int,
@@ -201,7 +206,7 @@ class MainWindowTests(unittest.TestCase):
         self.form.push_button_start.click()
 
         # Check that ProgressWindow opened
-        mock_dialog.assert_called_once_with(self.form.settings)
+        mock_dialog.assert_called_once_with(self.form.settings, None)
 
         # Check that all settings are correct
         self.assertEqual(self.form.settings.platforms, {'Bondora'})
@@ -227,7 +232,8 @@ class MainWindowTests(unittest.TestCase):
             self.form.push_button_start.click()
 
             # Check that ProgressWindow opened
-            mock_dialog.assert_called_once_with(self.form.settings)
+            mock_dialog.assert_called_once_with(
+                self.form.settings, unittest.mock.ANY)
             mock_dialog.reset_mock()
 
             # Check that all settings are correct
@@ -237,6 +243,33 @@ class MainWindowTests(unittest.TestCase):
                 (date(2018, 9, 1), date(2019, 2, 28)))
             self.assertEqual(self.form.settings.output_file, 'Test.xlsx')
 
+    def test_prewarm_browser(self) -> None:
+        """Test that selecting a webdriver platform pre-warms the browser."""
+        self.form.check_box_bondora.setChecked(True)
+        self.form.check_box_mintos.setChecked(True)
+        self.mock_manager.assert_not_called()
+        self.form.check_box_iuvo.setChecked(True)
+        self.mock_manager.assert_called_once_with(
+            self.form.settings.max_parallel_browsers)
+        self.mock_manager.return_value.prewarm.assert_called_once_with(
+            self.form.settings.headless)
+
+    @unittest.mock.patch('easyp2p.ui.main_window.ProgressWindow')
+    def test_hand_over_prewarmed_browser(self, mock_dialog) -> None:
+        """Test that the pre-warmed browser is handed to the worker."""
+        self.form.check_box_swaper.setChecked(True)
+        self.form.push_button_start.click()
+        mock_dialog.assert_called_once_with(
+            self.form.settings, self.mock_manager.return_value)
+        self.assertIsNone(self.form.browser_manager)
+        self.mock_manager.return_value.close.assert_not_called()
+
+    def test_close_prewarmed_browser(self) -> None:
+        """Test that closing the window quits the pre-warmed browser."""
+        self.form.check_box_swaper.setChecked(True)
+        self.form.close()
+        self.mock_manager.return_value.close.assert_called_once_with()
+
     @unittest.mock.patch('easyp2p.ui.main_window.SettingsWindow')
     def test_push_tool_button_settings(self, mock_dialog) -> None:
         """Test pushing settings button."""
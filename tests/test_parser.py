@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_parser."""
+
+from datetime import date
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from easyp2p.p2p_parser import P2PParser, get_df_from_file, parse_dates
+from easyp2p.p2p_signals import PlatformFailedError, Signals
+
+DATE_RANGE = (date(2018, 9, 1), date(2018, 9, 30))
+
+STATEMENT = pd.DataFrame({
+    'Date': ['03.09.2018', '03.09.2018', '05.09.2018', '07.09.2018',
+             '07.09.2018', '10.09.2018'],
+    'Type': [' Interest', 'Investment ', 'Interest', 'TestCF2',
+             'Principal', 'TestCF1'],
+    'Amount': [1.5, 20., 2., 3., 10., 4.],
+    'Balance': [101.5, 81.5, 83.5, 86.5, 96.5, 100.5]})
+
+CASH_FLOW_TYPES = {
+    'Interest': P2PParser.INTEREST_PAYMENT,
+    'Investment': P2PParser.INVESTMENT_PAYMENT,
+    'Principal': P2PParser.REDEMPTION_PAYMENT}
+
+
+class P2PParserTests(unittest.TestCase):
+
+    """Contains all tests for P2PParser."""
+
+    def setUp(self) -> None:
+        """Write the test statement to a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.statement = os.path.join(self.temp_dir.name, 'statement.csv')
+        STATEMENT.to_csv(self.statement, index=False)
+        self.parser = P2PParser('Test', DATE_RANGE, self.statement)
+
+    def tearDown(self) -> None:
+        """Delete the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_map_cashflow_types(self):
+        """Test mapping the stripped cash flow types."""
+        unknown_cf_types = self.parser._map_cashflow_types(
+            CASH_FLOW_TYPES, 'Type')
+        self.assertEqual(unknown_cf_types, ('TestCF1', 'TestCF2'))
+        cf_types = self.parser.df[P2PParser.CF_TYPE]
+        self.assertEqual(cf_types.dtype, 'category')
+        self.assertEqual(cf_types.tolist()[:3], [
+            P2PParser.INTEREST_PAYMENT, P2PParser.INVESTMENT_PAYMENT,
+            P2PParser.INTEREST_PAYMENT])
+        self.assertTrue(cf_types.iloc[[3, 5]].isna().all())
+        self.assertEqual(len(cf_types.cat.categories), 3)
+
+    def test_map_cashflow_types_missing_values(self):
+        """Test that missing cash flow types are not reported as unknown."""
+        self.parser.df.loc[5, 'Type'] = None
+        unknown_cf_types = self.parser._map_cashflow_types(
+            CASH_FLOW_TYPES, 'Type')
+        self.assertEqual(unknown_cf_types, ('TestCF2',))
+        self.assertTrue(pd.isna(self.parser.df[P2PParser.CF_TYPE].iloc[5]))
+
+    def test_parse(self):
+        """Test that unknown cash flow types are ignored in the results."""
+        unknown_cf_types = self.parser.parse(
+            '%d.%m.%Y', {'Date': P2PParser.DATE}, CASH_FLOW_TYPES, 'Type',
+            'Amount', 'Balance')
+        self.assertEqual(unknown_cf_types, ('TestCF1', 'TestCF2'))
+        df = self.parser.df
+        self.assertEqual(
+            df[P2PParser.INTEREST_PAYMENT].tolist(), [1.5, 2., 0.])
+        self.assertEqual(
+            df[P2PParser.INVESTMENT_PAYMENT].tolist(), [-20., 0., 0.])
+        self.assertEqual(
+            df[P2PParser.REDEMPTION_PAYMENT].tolist(), [0., 0., 10.])
+        self.assertEqual(
+            df[P2PParser.START_BALANCE_NAME].tolist(), [100., 81.5, 83.5])
+        self.assertEqual(
+            df[P2PParser.END_BALANCE_NAME].tolist(), [81.5, 83.5, 96.5])
+        self.assertEqual(
+            df.index.get_level_values(P2PParser.DATE).tolist(),
+            [pd.Timestamp(2018, 9, 3), pd.Timestamp(2018, 9, 5),
+             pd.Timestamp(2018, 9, 7)])
+
+    def test_parse_overlapping_platforms(self):
+        """Test that a finished parser does not disconnect other parsers."""
+        events = {'Test1': [], 'Test2': []}
+        callers = {name: Signals() for name in events}
+        parsers = []
+        for name, signals in callers.items():
+            signals.update_progress_bar.connect(
+                lambda evts=events[name]: evts.append('progress'))
+            signals.add_progress_text.connect(
+                lambda txt, _, evts=events[name]: evts.append(txt))
+            parsers.append(P2PParser(
+                name, DATE_RANGE, self.statement, signals=signals))
+        parsers[0].parse(
+            '%d.%m.%Y', {'Date': P2PParser.DATE}, CASH_FLOW_TYPES, 'Type',
+            'Amount', 'Balance')
+        self.assertRaises(
+            PlatformFailedError, parsers[1].parse, '%d.%m.%Y',
+            {'Date': P2PParser.DATE}, CASH_FLOW_TYPES, 'Type', 'Missing',
+            'Balance')
+        self.assertEqual(events['Test2'], [
+            "Test2: columns ['Missing'] missing in account statement!",
+            'progress'])
+
+    def test_aggregate_results_currencies(self):
+        """Test that results are aggregated per date and currency."""
+        self.parser.df = pd.DataFrame({
+            P2PParser.DATE: pd.to_datetime([
+                '2018-09-03', '2018-09-03', '2018-09-03', '2018-09-04']),
+            P2PParser.CURRENCY: ['GBP', 'EUR', 'EUR', 'EUR'],
+            P2PParser.CF_TYPE: pd.Categorical([
+                P2PParser.INTEREST_PAYMENT, P2PParser.INTEREST_PAYMENT,
+                P2PParser.REDEMPTION_PAYMENT, None]),
+            'Amount': [1., 2., 3., 4.]})
+        self.parser._aggregate_results('Amount', None)
+        df = self.parser.df
+        self.assertEqual(
+            df[[P2PParser.DATE, P2PParser.CURRENCY]].values.tolist(),
+            [[pd.Timestamp(2018, 9, 3), 'EUR'],
+             [pd.Timestamp(2018, 9, 3), 'GBP']])
+        self.assertEqual(
+            df[P2PParser.INTEREST_PAYMENT].tolist(), [2., 1.])
+        self.assertEqual(
+            df[P2PParser.REDEMPTION_PAYMENT].tolist(), [3., 0.])
+
+
+class GetDfFromFileTests(unittest.TestCase):
+
+    """Contains all tests for get_df_from_file."""
+
+    def setUp(self) -> None:
+        """Create a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        """Delete the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_usecols_and_dtype(self):
+        """Test reading only the required columns with the given dtypes."""
+        for suffix in ['csv', 'xlsx']:
+            with self.subTest(suffix=suffix):
+                statement = os.path.join(
+                    self.temp_dir.name, f'statement.{suffix}')
+                if suffix == 'csv':
+                    STATEMENT.to_csv(statement, index=False)
+                else:
+                    STATEMENT.to_excel(statement, index=False)
+                df = get_df_from_file(
+                    statement, usecols=['Type', 'Balance', 'Missing'],
+                    dtype={'Balance': 'float32', 'Missing': 'str'})
+                self.assertEqual(df.columns.tolist(), ['Type', 'Balance'])
+                self.assertEqual(df['Balance'].dtype, 'float32')
+                self.assertEqual(len(df), len(STATEMENT))
+
+
+class ParseDatesTests(unittest.TestCase):
+
+    """Contains all tests for parse_dates."""
+
+    def test_fixed_width(self):
+        """Test parsing fixed width formats by slicing."""
+        for date_format in [
+                '%d.%m.%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M']:
+            with self.subTest(date_format=date_format):
+                timestamps = pd.Series(pd.to_datetime([
+                    '2018-09-03 08:54', '2020-02-29 23:59', '2019-12-31']))
+                dates = parse_dates(
+                    timestamps.dt.strftime(date_format), date_format)
+                self.assertTrue(dates.equals(timestamps.dt.normalize()))
+
+    def test_other_formats(self):
+        """Test that other formats and invalid dates are parsed by pandas."""
+        dates = parse_dates(
+            pd.Series(['3 Sep 2018', '29 Feb 2020']), '%d %b %Y')
+        self.assertEqual(dates.tolist(), [
+            pd.Timestamp(2018, 9, 3), pd.Timestamp(2020, 2, 29)])
+        dates = parse_dates(pd.Series(['03.09.2018', None]), '%d.%m.%Y')
+        self.assertEqual(dates[0], pd.Timestamp(2018, 9, 3))
+        self.assertTrue(pd.isna(dates[1]))
+        self.assertRaises(
+            ValueError, parse_dates, pd.Series(['29.02.2019']), '%d.%m.%Y')
+
+    def test_datetime(self):
+        """Test that datetime64 values are not parsed again."""
+        timestamps = pd.Series(pd.to_datetime(['2018-09-03 08:54']))
+        dates = parse_dates(timestamps, '%d.%m.%Y')
+        self.assertEqual(dates.tolist(), [pd.Timestamp(2018, 9, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+#  Copyright (c) 2018-2020 Niko Sandschneider
+
+"""Module containing all tests for p2p_session."""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from requests.cookies import RequestsCookieJar
+
+from easyp2p.p2p_cleanup import CleanupExecutor
+from easyp2p.p2p_session import (
+    AwaitableSession, P2PSession, PollPolicy, RetryPolicy, run_sync)
+from easyp2p.p2p_signals import PlatformFailedError, Signals
+
+STATEMENT = os.urandom(300 * 1024)
+
+
+class StatementHandler(BaseHTTPRequestHandler):
+
+    """
+    Serve a statement file at /statement and errors everywhere else.
+
+    Requests to /flaky/<n>/<id> fail with status 503 for the first n requests
+    and succeed afterwards.
+
+    """
+
+    requests = Counter()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Send the statement or an error."""
+        self.requests[self.path] += 1
+        if self.path == '/slow':
+            # Never answer, the client gives up before
+            time.sleep(1)
+            return
+        if self.path == '/account':
+            if 'session=valid' in self.headers.get('Cookie', ''):
+                self.send_response(200)
+            else:
+                self.send_response(302)
+                self.send_header('Location', '/login')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.startswith('/flaky/'):
+            if self.requests[self.path] <= int(self.path.split('/')[2]):
+                self.send_error(503)
+                return
+        elif self.path != '/statement':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(STATEMENT)))
+        self.end_headers()
+        self.wfile.write(STATEMENT)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Always fail with a transient error."""
+        self.requests[self.path] += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_error(503)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output clean."""
+
+
+SERVER = HTTPServer(('127.0.0.1', 0), StatementHandler)
+
+
+def setUpModule():  # pylint: disable=invalid-name
+    """Start the local HTTP server."""
+    threading.Thread(target=SERVER.serve_forever, daemon=True).start()
+
+
+def tearDownModule():  # pylint: disable=invalid-name
+    """Stop the local HTTP server."""
+    SERVER.shutdown()
+    SERVER.server_close()
+
+
+class P2PSessionTests(unittest.TestCase):
+
+    """Contains all tests for P2PSession."""
+
+    url = f'http://127.0.0.1:{SERVER.server_port}'
+
+    def setUp(self) -> None:
+        """Create a temporary download directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.temp_dir.name, 'statement.xlsx')
+        self.progress = []
+        self.signals = Signals()
+        self.signals.download_progress.connect(self.on_progress)
+
+    def tearDown(self) -> None:
+        """Delete the download directory."""
+        self.temp_dir.cleanup()
+
+    def on_progress(self, name: str, downloaded: int) -> None:
+        """Record download progress."""
+        self.progress.append((name, downloaded))
+
+    def test_download_statement(self):
+        """Test that the statement is streamed to the target location."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            sess.download_statement(
+                self.url + '/statement', self.location, 'get')
+        with open(self.location, 'rb') as file:
+            self.assertEqual(file.read(), STATEMENT)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['statement.xlsx'])
+
+    def test_download_statement_progress(self):
+        """Test that the downloaded bytes are reported in chunks."""
+        with P2PSession('Test', self.url + '/logout', self.signals) as sess:
+            sess.download_statement(
+                self.url + '/statement', self.location, 'get')
+        self.assertGreater(len(self.progress), 1)
+        self.assertEqual(self.progress[-1], ('Test', len(STATEMENT)))
+        self.assertTrue(all(
+            downloaded <= P2PSession.DOWNLOAD_CHUNK_SIZE * (i + 1)
+            for i, (_, downloaded) in enumerate(self.progress)))
+
+    def test_disconnect_signals(self):
+        """Test that the signals are disconnected after the logout."""
+        messages = []
+        self.signals.add_progress_text.connect(
+            lambda txt, _: messages.append(txt))
+        with P2PSession(
+                'Test', self.url + '/missing', self.signals) as sess:
+            sess.logged_in = True
+        self.assertEqual(messages, ['Test: logout was not successful!'])
+        sess.signals.download_progress.emit('Test', 1)
+        self.assertEqual(self.progress, [])
+
+    def test_download_statement_error(self):
+        """Test that nothing is written if the download fails."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.download_statement,
+                self.url + '/missing', self.location, 'get')
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_shared_connection_pool(self):
+        """Test that sessions with the same pool size share the adapter."""
+        with P2PSession('Test1', self.url + '/logout', None) as sess1, \
+                P2PSession('Test2', self.url + '/logout', None) as sess2, \
+                P2PSession(
+                    'Test3', self.url + '/logout', None,
+                    pool_maxsize=1) as sess3:
+            self.assertIs(
+                sess1.sess.get_adapter(self.url),
+                sess2.sess.get_adapter(self.url))
+            self.assertIsNot(
+                sess1.sess.get_adapter(self.url),
+                sess3.sess.get_adapter(self.url))
+
+    def test_background_logout(self):
+        """Test that a failed logout in the background is reported."""
+        cleanup = CleanupExecutor()
+        with P2PSession(
+                'Test', self.url + '/background-logout', None,
+                cleanup=cleanup) as sess:
+            sess.logged_in = True
+        self.assertEqual(cleanup.wait(), ['Test: logout was not successful!'])
+        self.assertEqual(StatementHandler.requests['/background-logout'], 1)
+
+    def test_read_timeout(self):
+        """Test that a hanging server fails the request after the timeout."""
+        with P2PSession(
+                'Test', self.url + '/logout', None,
+                retry_policy=RetryPolicy(max_attempts=1),
+                timeout=(1., 0.1)) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.request, self.url + '/slow', 'get',
+                'Test error')
+
+
+class RestoreSessionTests(unittest.TestCase):
+
+    """Contains all tests for re-using sessions of previous runs."""
+
+    url = P2PSessionTests.url
+
+    def setUp(self) -> None:
+        """Create a cookie store mock."""
+        self.store = MagicMock()
+
+    def get_jar(self, value: str) -> RequestsCookieJar:
+        """Create a cookie jar for the local server."""
+        jar = RequestsCookieJar()
+        jar.set('session', value, domain='127.0.0.1', path='/')
+        return jar
+
+    def test_restore_valid_session(self):
+        """Test that a valid session is re-used and not logged out."""
+        self.store.load.return_value = self.get_jar('valid')
+        with P2PSession(
+                'Test', self.url + '/logout', None,
+                cookie_store=self.store) as sess:
+            self.assertTrue(sess.restore_session(self.url + '/account'))
+            self.assertTrue(sess.logged_in)
+        self.store.save.assert_called_once_with(sess.sess.cookies)
+        self.assertEqual(StatementHandler.requests['/logout'], 0)
+
+    def test_restore_expired_session(self):
+        """Test that expired cookies are deleted."""
+        self.store.load.return_value = self.get_jar('expired')
+        with P2PSession(
+                'Test', self.url + '/logout', None,
+                cookie_store=self.store) as sess:
+            self.assertFalse(sess.restore_session(self.url + '/account'))
+            self.assertFalse(sess.logged_in)
+            self.assertEqual(len(sess.sess.cookies), 0)
+        self.store.delete.assert_called()
+
+    def test_restore_without_store(self):
+        """Test that sessions are not restored without a cookie store."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertFalse(sess.restore_session(self.url + '/account'))
+        self.assertFalse(self.store.load.called)
+
+    def test_error_deletes_cookies(self):
+        """Test that cookies are not stored if the download failed."""
+        self.store.load.return_value = self.get_jar('valid')
+        with self.assertRaises(PlatformFailedError):
+            with P2PSession(
+                    'Test', self.url + '/logout2', None,
+                    cookie_store=self.store) as sess:
+                sess.restore_session(self.url + '/account')
+                sess.request(self.url + '/missing3', 'get', 'Test error')
+        self.assertFalse(self.store.save.called)
+        self.store.delete.assert_called_once()
+        self.assertEqual(StatementHandler.requests['/logout2'], 1)
+
+
+@patch('easyp2p.p2p_session.time.sleep')
+class RetryTests(unittest.TestCase):
+
+    """Contains all tests for retrying requests in P2PSession."""
+
+    url = P2PSessionTests.url
+
+    def test_retry_transient_error(self, mock_sleep):
+        """Test that transient errors are retried until the request works."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            resp = sess.request(self.url + '/flaky/2/a', 'get', 'Test error')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(StatementHandler.requests['/flaky/2/a'], 3)
+        self.assertEqual(sess.retries, 2)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_retry_max_attempts(self, mock_sleep):
+        """Test that the request fails after the last attempt."""
+        policy = RetryPolicy(max_attempts=2)
+        with P2PSession(
+                'Test', self.url + '/logout', None,
+                retry_policy=policy) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.request, self.url + '/flaky/5/b',
+                'get', 'Test error')
+        self.assertEqual(StatementHandler.requests['/flaky/5/b'], 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    def test_no_retry_for_post(self, mock_sleep):
+        """Test that non-idempotent methods are not retried."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.request, self.url + '/post', 'post',
+                'Test error', {'key': 'value'})
+        self.assertEqual(StatementHandler.requests['/post'], 1)
+        self.assertFalse(mock_sleep.called)
+
+    def test_no_retry_for_client_error(self, mock_sleep):
+        """Test that status codes which are not transient are not retried."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.request, self.url + '/missing2',
+                'get', 'Test error')
+        self.assertEqual(StatementHandler.requests['/missing2'], 1)
+        self.assertFalse(mock_sleep.called)
+
+    def test_no_retry_for_success_code(self, mock_sleep):
+        """Test that status codes in success_codes are never retried."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            resp = sess.request(
+                self.url + '/flaky/1/c', 'get', 'Test error',
+                success_codes=(200, 503))
+        self.assertEqual(resp.status_code, 503)
+        self.assertFalse(mock_sleep.called)
+
+    def test_retry_connection_error(self, mock_sleep):
+        """Test that connection errors are retried and then fail."""
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertRaises(
+                PlatformFailedError, sess.request, 'http://127.0.0.1:1/',
+                'get', 'Test error')
+        self.assertEqual(sess.retries, 2)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_get_delay(self, _):
+        """Test that the delay grows exponentially and is capped."""
+        policy = RetryPolicy(backoff_factor=2., max_backoff=10.)
+        with patch('easyp2p.p2p_session.random.uniform') as mock_uniform:
+            mock_uniform.side_effect = lambda low, high: high
+            self.assertEqual(
+                [policy.get_delay(attempt) for attempt in range(1, 5)],
+                [2., 4., 8., 10.])
+
+
+class WaitTests(unittest.TestCase):
+
+    """Contains all tests for P2PSession.wait."""
+
+    def setUp(self) -> None:
+        """Create a session and a simulated clock."""
+        self.sess = P2PSession('Test', 'http://127.0.0.1:1/logout', None)
+        self.clock = 0.
+        patcher = patch('easyp2p.p2p_session.time')
+        mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_time.monotonic.side_effect = lambda: self.clock
+        mock_time.sleep.side_effect = self.sleep
+        self.delays = []
+
+    def sleep(self, delay: float) -> None:
+        """Advance the simulated clock."""
+        self.delays.append(delay)
+        self.clock += delay
+
+    def test_ready_immediately(self):
+        """Test that there is no delay if func is True at the first call."""
+        self.sess.wait(lambda: True)
+        self.assertEqual(self.delays, [])
+
+    def test_backoff(self):
+        """Test that the delays start short and grow exponentially."""
+        results = iter([False, False, False, True])
+        self.sess.wait(lambda: next(results))
+        self.assertEqual(self.delays, [0.3, 0.6, 1.2])
+
+    def test_deadline(self):
+        """Test that waiting fails at the deadline."""
+        self.sess.poll_policy = PollPolicy(deadline=10.)
+        self.assertRaises(
+            PlatformFailedError, self.sess.wait, lambda: False)
+        self.assertEqual(self.delays[:-1], [0.3, 0.6, 1.2, 2.4, 4.8])
+        self.assertAlmostEqual(self.delays[-1], 0.7)
+        self.assertAlmostEqual(self.clock, 10.)
+
+    def test_get_delay(self):
+        """Test that the delay is capped."""
+        policy = PollPolicy(first_delay=1., max_delay=5.)
+        self.assertEqual(
+            [policy.get_delay(attempt) for attempt in range(1, 5)],
+            [1., 2., 4., 5.])
+
+
+class AwaitableSessionTests(unittest.TestCase):
+
+    """Contains all tests for AwaitableSession and run_sync."""
+
+    url = P2PSessionTests.url
+
+    def setUp(self) -> None:
+        """Create a temporary download directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.temp_dir.name, 'statement.xlsx')
+
+    def tearDown(self) -> None:
+        """Delete the download directory."""
+        self.temp_dir.cleanup()
+
+    def test_download_steps(self):
+        """Test running download steps written as coroutine."""
+        async def download(sess):
+            async def ready():
+                resp = await sess.request(
+                    self.url + '/flaky/1/d', 'get', 'Error',
+                    success_codes=(200, 503))
+                return resp.status_code == 200
+            await sess.wait(ready)
+            await sess.download_statement(
+                self.url + '/statement', self.location, 'get')
+            return sess.name
+
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertEqual(
+                run_sync(download(AwaitableSession(sess))), 'Test')
+        self.assertEqual(StatementHandler.requests['/flaky/1/d'], 2)
+        with open(self.location, 'rb') as file:
+            self.assertEqual(file.read(), STATEMENT)
+
+    def test_errors(self):
+        """Test that errors of the session are raised by run_sync."""
+        async def download(sess):
+            await sess.download_statement(
+                self.url + '/missing', self.location, 'get')
+
+        with P2PSession('Test', self.url + '/logout', None) as sess:
+            self.assertRaises(
+                PlatformFailedError, run_sync,
+                download(AwaitableSession(sess)))
+
+    def test_suspending_coroutine(self):
+        """Test that coroutines which need an event loop are rejected."""
+        self.assertRaises(RuntimeError, run_sync, asyncio.sleep(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
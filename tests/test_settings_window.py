@@ -230,6 +230,16 @@ class SettingsWindowTests(unittest.TestCase):
         self.form.button_box.button(QDialogButtonBox.Cancel).click()
         self.assertTrue(self.form.settings.headless)
 
+    def test_accept_with_concurrent_true(self, mock_cred):
+        """Enable parallel evaluation and click OK. Must be True afterwards."""
+        mock_cred.get_password_from_keyring.return_value = None
+        mock_cred.keyring_exists.return_value = True
+        self.form = SettingsWindow(self.platforms, self.settings)
+        self.assertFalse(self.form.check_box_concurrent.isChecked())
+        self.form.check_box_concurrent.setChecked(True)
+        self.form.button_box.button(QDialogButtonBox.Ok).click()
+        self.assertTrue(self.form.settings.concurrent)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,10 +9,23 @@ difficult to test individually. They are tested in test_download instead.
 
 """
 
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
 import os
 import shutil
+import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import MagicMock, patch
 
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, TimeoutException)
+
+from easyp2p.p2p_chrome import P2PChrome
+from easyp2p.p2p_cleanup import CleanupExecutor
+from easyp2p.p2p_signals import PlatformFailedError, Signals
 import easyp2p.p2p_webdriver as p2p_webdriver
 
 
@@ -46,7 +59,7 @@ class DownloadFinishedTests(unittest.TestCase):
     def test_no_crdownload_file(self):
         """Test return value if download does not start."""
         self.assertFalse(p2p_webdriver.download_finished(
-            self.statement, self.download_directory))
+            self.statement, self.download_directory, start_timeout=0.5))
         self.assertFalse(os.path.isfile(self.statement))
 
     def test_success(self):
@@ -65,9 +78,28 @@ class DownloadFinishedTests(unittest.TestCase):
             os.path.join(self.download_directory, 'test.crdownload'), 'w+')
         file.close()
         self.assertFalse(p2p_webdriver.download_finished(
-            self.statement, self.download_directory))
+            self.statement, self.download_directory, stall_timeout=0.5))
         self.assertFalse(os.path.isfile(self.statement))
 
+    def test_slow_download(self):
+        """Test that a growing download may take longer than the timeouts."""
+        download = os.path.join(self.download_directory, 'test.crdownload')
+
+        def download_slowly():
+            with open(download, 'wb') as file:
+                for _ in range(10):
+                    file.write(b'x')
+                    file.flush()
+                    time.sleep(0.1)
+            os.rename(download, download.replace('.crdownload', '.xlsx'))
+        thread = threading.Thread(target=download_slowly)
+        thread.start()
+        self.assertTrue(p2p_webdriver.download_finished(
+            self.statement, self.download_directory, start_timeout=0.5,
+            stall_timeout=0.5, poll_interval=0.05))
+        thread.join()
+        self.assertTrue(os.path.isfile(self.statement))
+
     def test_non_empty_download_directory(self):
         """Test that error is raised when download directory is not empty."""
         # Create two files in the download directory
@@ -83,10 +115,610 @@ class DownloadFinishedTests(unittest.TestCase):
         self.assertFalse(os.path.isfile(self.statement))
 
 
+def download_event(method, webview='tab', **params):
+    """Create a performance log entry for a download event."""
+    return {'message': json.dumps({
+        'message': {'method': method, 'params': params},
+        'webview': webview})}
+
+
+class WaitForDownloadTests(unittest.TestCase):
+
+    """Test P2PChrome.wait_for_download with simulated download events."""
+
+    def setUp(self) -> None:
+        """Create a P2PChrome instance without starting Chrome."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.statement = os.path.join(self.temp_dir.name, 'statement.xlsx')
+        self.chrome = P2PChrome.__new__(P2PChrome)
+        self.chrome.download_directory = self.temp_dir.name
+        self.chrome.target_id = None
+        self.chrome.logger = p2p_webdriver.logger
+        self.logs = []
+        self.chrome.get_log = lambda _: self.logs.pop(0) if self.logs else []
+        self.clock = 0.
+        patcher = patch('easyp2p.p2p_chrome.time')
+        mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_time.monotonic.side_effect = lambda: self.clock
+        mock_time.sleep.side_effect = self.sleep
+
+    def tearDown(self) -> None:
+        """Delete the download directory."""
+        self.temp_dir.cleanup()
+
+    def sleep(self, delay: float) -> None:
+        """Advance the simulated clock."""
+        self.clock += delay
+
+    def test_completed(self):
+        """Test that a completed download is moved to statement."""
+        with open(os.path.join(self.temp_dir.name, 'abc'), 'w') as file:
+            file.write('statement')
+        self.logs = [
+            [download_event(
+                'Browser.downloadWillBegin', guid='abc',
+                suggestedFilename='statement.xlsx')],
+            [download_event(
+                'Browser.downloadProgress', guid='abc', receivedBytes=9,
+                state='completed')]]
+        self.assertTrue(self.chrome.wait_for_download(self.statement))
+        self.assertTrue(os.path.isfile(self.statement))
+        self.assertLess(self.clock, 1.)
+
+    def test_no_download(self):
+        """Test that waiting fails if the download does not start."""
+        self.assertFalse(self.chrome.wait_for_download(self.statement))
+        self.assertGreater(self.clock, P2PChrome.DOWNLOAD_START_TIMEOUT)
+
+    def test_slow_download(self):
+        """Test that slow downloads succeed as long as bytes arrive."""
+        with open(os.path.join(self.temp_dir.name, 'abc'), 'w'):
+            pass
+        self.logs = [[download_event('Page.downloadWillBegin', guid='abc')]]
+        for i in range(10):
+            self.logs += [[download_event(
+                'Page.downloadProgress', guid='abc', receivedBytes=i,
+                state='inProgress')]] + [[]] * 200
+        self.logs.append([download_event(
+            'Page.downloadProgress', guid='abc', receivedBytes=10,
+            state='completed')])
+        self.assertTrue(self.chrome.wait_for_download(self.statement))
+        self.assertGreater(self.clock, P2PChrome.DOWNLOAD_STALL_TIMEOUT)
+
+    def test_stalled_download(self):
+        """Test that waiting fails if no bytes arrive anymore."""
+        self.logs = [[
+            download_event('Browser.downloadWillBegin', guid='abc'),
+            download_event(
+                'Browser.downloadProgress', guid='abc', receivedBytes=5,
+                state='inProgress')]]
+        self.assertFalse(self.chrome.wait_for_download(self.statement))
+        self.assertFalse(os.path.isfile(self.statement))
+
+    def test_other_context(self):
+        """Test that downloads in tabs of other sessions are ignored."""
+        self.chrome.target_id = 'tab'
+        with open(os.path.join(self.temp_dir.name, 'abc'), 'w'):
+            pass
+        self.logs = [[
+            download_event('Page.downloadWillBegin', 'other', guid='xyz'),
+            download_event('Page.downloadWillBegin', guid='abc'),
+            download_event(
+                'Page.downloadProgress', 'other', guid='xyz', receivedBytes=1,
+                state='completed'),
+            download_event(
+                'Page.downloadProgress', guid='abc', receivedBytes=1,
+                state='completed')]]
+        self.assertTrue(self.chrome.wait_for_download(self.statement))
+        self.assertTrue(os.path.isfile(self.statement))
+
+    def test_canceled_download(self):
+        """Test that a canceled download fails immediately."""
+        self.logs = [[
+            download_event('Browser.downloadWillBegin', guid='abc'),
+            download_event(
+                'Browser.downloadProgress', guid='abc', receivedBytes=0,
+                state='canceled')]]
+        self.assertFalse(self.chrome.wait_for_download(self.statement))
+        self.assertEqual(self.clock, 0.)
+
+
+class WaitTests(unittest.TestCase):
+
+    """Test waiting for expected conditions in P2PChrome."""
+
+    def setUp(self) -> None:
+        """Create a P2PChrome instance with a simulated page and clock."""
+        self.chrome = P2PChrome.__new__(P2PChrome)
+        self.mutations = 0
+        self.clock = 0.
+        self.chrome.execute_async_script = MagicMock(
+            side_effect=self.wait_for_mutation)
+        patcher = patch('easyp2p.p2p_chrome.time')
+        mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_time.monotonic.side_effect = lambda: self.clock
+        mock_time.sleep.side_effect = self.sleep
+
+    def wait_for_mutation(self, _, timeout: int) -> bool:
+        """Simulate a page which changes every 100 ms."""
+        self.clock += min(timeout / 1000, 0.1)
+        self.mutations += 1
+        return True
+
+    def sleep(self, delay: float) -> None:
+        """Advance the simulated clock."""
+        self.clock += delay
+
+    def test_condition_after_mutation(self):
+        """Test that the condition is checked after each page change."""
+        def condition(_):
+            if self.mutations < 3:
+                raise NoSuchElementException()
+            return 'element'
+        self.assertEqual(self.chrome.wait(condition), 'element')
+        self.assertEqual(self.chrome.execute_async_script.call_count, 3)
+        self.assertAlmostEqual(self.clock, 0.3)
+
+    def test_animated_page(self):
+        """Test that constant page changes do not cause a tight loop."""
+        self.chrome.execute_async_script.side_effect = \
+            lambda *_: self.sleep(0.001)
+        condition = MagicMock(return_value=False)
+        self.assertRaises(
+            TimeoutException, self.chrome.wait, condition, delay=1.)
+        self.assertLessEqual(
+            condition.call_count, 1. / P2PChrome.MUTATION_MIN_INTERVAL + 2)
+        self.assertAlmostEqual(self.clock, 1., places=2)
+
+    def test_immediate_condition(self):
+        """Test that a fulfilled condition does not wait at all."""
+        self.assertTrue(self.chrome.wait(lambda _: True))
+        self.chrome.execute_async_script.assert_not_called()
+
+    def test_timeout(self):
+        """Test that the wait ends after delay."""
+        self.assertRaises(
+            TimeoutException, self.chrome.wait, lambda _: False, delay=1.)
+        self.assertAlmostEqual(self.clock, 1., places=2)
+
+    def test_page_unloaded(self):
+        """Test that waiting continues if the page is unloaded."""
+        self.chrome.execute_async_script.side_effect = JavascriptException()
+        self.assertRaises(
+            TimeoutException, self.chrome.wait, lambda _: False, delay=1.)
+        self.assertGreaterEqual(
+            self.chrome.execute_async_script.call_count, 10)
+        self.assertAlmostEqual(self.clock, 1.)
+
+
+@patch('easyp2p.p2p_chrome.time')
+class WaitAndReloadTests(unittest.TestCase):
+
+    """Test waiting for a page which needs to be reloaded."""
+
+    def setUp(self) -> None:
+        """Create a P2PChrome instance with a mocked browser."""
+        self.chrome = P2PChrome.__new__(P2PChrome)
+        self.chrome.logger = MagicMock()
+        self.chrome.get = MagicMock()
+        self.chrome.wait = MagicMock()
+        self.chrome.execute_async_script = MagicMock()
+
+    def test_fetch(self, mock_time):
+        """Test that the page is only loaded once the marker appears."""
+        self.chrome.execute_async_script.side_effect = [False, False, True]
+        self.chrome.wait_and_reload(
+            'https://test/status', 'condition', 5, 60, 'Error',
+            marker='Download')
+        self.assertEqual(mock_time.sleep.call_count, 2)
+        self.chrome.get.assert_called_once_with('https://test/status')
+        self.chrome.wait.assert_called_once_with('condition', delay=5)
+
+    def test_fetch_timeout(self, _):
+        """Test that an error is raised if the marker never appears."""
+        self.chrome.execute_async_script.return_value = False
+        self.assertRaises(
+            RuntimeError, self.chrome.wait_and_reload,
+            'https://test/status', 'condition', 5, 60, 'Error',
+            marker='Download')
+        self.chrome.get.assert_not_called()
+
+    def test_fetch_fails(self, mock_time):
+        """Test that the page is reloaded if fetching is not possible."""
+        self.chrome.execute_async_script.side_effect = JavascriptException()
+        self.chrome.wait.side_effect = [TimeoutException(), 'element']
+        self.chrome.wait_and_reload(
+            'https://test/status', 'condition', 5, 60, 'Error',
+            marker='Download')
+        self.chrome.execute_async_script.assert_called_once()
+        self.assertEqual(self.chrome.get.call_count, 2)
+        mock_time.sleep.assert_not_called()
+
+
+class BlockUrlsTests(unittest.TestCase):
+
+    """Test blocking of URLs in P2PWebDriver."""
+
+    @patch('easyp2p.p2p_webdriver.P2PChrome')
+    def test_blocked_urls(self, mock_chrome):
+        """Test that the blocked URLs are applied to the browser."""
+        with p2p_webdriver.P2PWebDriver(
+                'Test', True, None, logout_url='https://test/logout',
+                blocked_urls=('*.png',)):
+            pass
+        mock_chrome.return_value.block_urls.assert_called_once_with(
+            ('*.png',))
+
+    def test_block_urls(self):
+        """Test the CDP commands for blocking URLs."""
+        chrome = P2PChrome.__new__(P2PChrome)
+        chrome.logger = p2p_webdriver.logger
+        chrome.execute_cdp_cmd = MagicMock()
+        chrome.block_urls(('*.png', '*.woff'))
+        chrome.execute_cdp_cmd.assert_called_with(
+            'Network.setBlockedURLs', {'urls': ['*.png', '*.woff']})
+
+
+class FakeCalendar:
+
+    """
+    Browser replacement which shows a calendar with a month button. The
+    month can only be set directly if direct is True.
+    """
+
+    def __init__(self, year: int, month: int, direct: bool = False) -> None:
+        self.months = year * 12 + month - 1
+        self.prev_month = MagicMock()
+        self.prev_month.is_displayed.return_value = True
+        self.prev_month.click.side_effect = self.click
+        self.execute_script = MagicMock(side_effect=self.run_script)
+        self.set_calendar_month = MagicMock(side_effect=self.set_month)
+        self.direct = direct
+
+    def set_month(self, _, year, month) -> bool:
+        """Simulate setting the month by the API of the calendar."""
+        if self.direct:
+            self.months = year * 12 + month - 1
+        return self.direct
+
+    def click(self) -> None:
+        """Switch to the previous month."""
+        self.months -= 1
+
+    def run_script(self, _, element, clicks) -> None:
+        """Simulate the script which clicks element several times."""
+        for _ in range(clicks):
+            element.click()
+
+    def find_element(self, _, value) -> MagicMock:
+        """Return the month button or the month element."""
+        if value == 'prev':
+            return self.prev_month
+        return MagicMock(text=date(
+            self.months // 12, self.months % 12 + 1, 1).strftime('%B %Y'))
+
+    def wait(self, wait_until, delay=15.0):  # pylint: disable=unused-argument
+        """Check the condition once instead of waiting."""
+        result = wait_until(self)
+        if not result:
+            raise TimeoutException()
+        return result
+
+
+class CalendarTests(unittest.TestCase):
+    # pylint: disable=protected-access
+
+    """Test switching the calendar to the target month."""
+
+    def setUp(self) -> None:
+        """Create a P2PWebDriver with a fake calendar."""
+        self.webdriver = p2p_webdriver.P2PWebDriver(
+            'Test', True, None, logout_url='https://test/logout')
+        self.webdriver.driver = FakeCalendar(2020, 6)
+
+    def set_month(self) -> None:
+        """Switch the calendar to February 2017."""
+        self.webdriver._set_month_in_calendar(
+            ('css', 'prev'), ('css', 'month'), date(2017, 2, 14))
+        self.assertEqual(
+            self.webdriver.driver.find_element('css', 'month').text,
+            'February 2017')
+
+    def test_direct(self):
+        """Test that the month is set directly if the calendar supports it."""
+        self.webdriver.driver = FakeCalendar(2020, 6, direct=True)
+        self.set_month()
+        self.webdriver.driver.set_calendar_month.assert_called_once()
+        self.assertEqual(
+            self.webdriver.driver.set_calendar_month.call_args[0][1:],
+            (2017, 2))
+        self.webdriver.driver.execute_script.assert_not_called()
+        self.webdriver.driver.prev_month.click.assert_not_called()
+
+    def test_direct_not_shown(self):
+        """Test that the months are clicked if setting them has no effect."""
+        self.webdriver.driver.set_calendar_month.side_effect = None
+        self.webdriver.driver.set_calendar_month.return_value = True
+        self.set_month()
+        self.assertEqual(
+            self.webdriver.driver.execute_script.call_args[0][2], 40)
+
+    def test_jump(self):
+        """Test that all months are switched by a single script."""
+        self.set_month()
+        self.webdriver.driver.execute_script.assert_called_once()
+        self.assertEqual(
+            self.webdriver.driver.execute_script.call_args[0][2], 40)
+
+    def test_fallback(self):
+        """Test that the months are clicked if the script fails."""
+        self.webdriver.driver.execute_script.side_effect = \
+            JavascriptException()
+        self.set_month()
+        self.assertEqual(
+            self.webdriver.driver.prev_month.click.call_count, 40)
+
+    def test_current_month(self):
+        """Test that nothing is clicked if the month is already shown."""
+        self.webdriver.driver = FakeCalendar(2017, 2)
+        self.set_month()
+        self.webdriver.driver.execute_script.assert_not_called()
+        self.webdriver.driver.prev_month.click.assert_not_called()
+
+    def test_past_target_month(self):
+        """Test that a calendar which went too far is detected."""
+        self.webdriver.driver.execute_script.side_effect = \
+            lambda _, element, clicks: [
+                element.click() for _ in range(clicks + 1)]
+        self.assertRaises(
+            RuntimeError, self.webdriver._set_month_in_calendar,
+            ('css', 'prev'), ('css', 'month'), date(2017, 2, 14))
+
+
+class ScriptHelperTests(unittest.TestCase):
+
+    """Test the P2PChrome helpers which run in a single script."""
+
+    def setUp(self) -> None:
+        """Create a P2PChrome instance without starting Chrome."""
+        self.chrome = P2PChrome.__new__(P2PChrome)
+        self.chrome.logger = p2p_webdriver.logger
+        self.chrome.execute_script = MagicMock(return_value=[])
+        self.chrome.find_element = MagicMock()
+
+    def test_set_calendar_month(self):
+        """Test that the calendar month is set in one round trip."""
+        self.chrome.execute_script.return_value = True
+        element = MagicMock()
+        self.assertTrue(self.chrome.set_calendar_month(element, 2017, 2))
+        self.assertEqual(
+            self.chrome.execute_script.call_args[0][1:], (element, 2017, 2))
+
+    def test_fill_fields(self):
+        """Test that all fields are filled in one round trip."""
+        self.chrome.fill_fields(
+            {('name', 'user'): 'TestUser', ('id', 'pass'): 'TestPass'},
+            'Error', submit_locator=('id', 'pass'))
+        self.chrome.execute_script.assert_called_once()
+        self.assertEqual(
+            self.chrome.execute_script.call_args[0][1],
+            [['name', 'user', 'TestUser'], ['id', 'pass', 'TestPass']])
+        self.chrome.find_element.assert_called_once_with('id', 'pass')
+        self.chrome.find_element.return_value.send_keys.assert_called_once()
+
+    def test_fill_missing_field(self):
+        """Test that a missing field is reported without submitting."""
+        self.chrome.execute_script.return_value = ['pass']
+        self.assertRaises(
+            PlatformFailedError, self.chrome.fill_fields,
+            {('id', 'pass'): 'TestPass'}, 'Error',
+            submit_locator=('id', 'pass'))
+        self.chrome.find_element.assert_not_called()
+
+    def test_get_values(self):
+        """Test that all values are read in one round trip."""
+        self.chrome.execute_script.return_value = {'account': '123'}
+        self.assertEqual(
+            self.chrome.get_values({'account': ('tag name', 'input')}),
+            {'account': '123'})
+        self.assertEqual(
+            self.chrome.execute_script.call_args[0][1:],
+            ([['account', 'tag name', 'input']], 'value'))
+
+    def test_unsupported_locator(self):
+        """Test that locators which scripts cannot resolve are rejected."""
+        self.assertRaises(
+            ValueError, self.chrome.get_table_rows,
+            ('link text', 'Statement'))
+        self.chrome.execute_script.assert_not_called()
+
+
+@patch('easyp2p.p2p_webdriver.P2PChrome')
+class PersistentProfileTests(unittest.TestCase):
+
+    """Test re-using sessions with a persistent browser profile."""
+
+    def create_webdriver(self, profile_directory):
+        """Create a P2PWebDriver instance which logs out by URL."""
+        webdriver = p2p_webdriver.P2PWebDriver(
+            'Test', True, None, logout_url='https://test/logout',
+            profile_directory=profile_directory)
+        webdriver.logout_url = 'https://test/logout'
+        webdriver.logout_by_url = MagicMock()
+        return webdriver
+
+    def test_valid_session(self, mock_chrome):
+        """Test that a valid session is re-used and kept."""
+        webdriver = self.create_webdriver('profile')
+        with webdriver:
+            self.assertTrue(webdriver.restore_session(
+                'https://test/statement', 'condition'))
+        mock_chrome.return_value.get.assert_called_once_with(
+            'https://test/statement')
+        self.assertEqual(
+            mock_chrome.call_args[1]['profile_directory'], 'profile')
+        webdriver.logout_by_url.assert_not_called()
+
+    def test_expired_session(self, mock_chrome):
+        """Test that an expired session is detected."""
+        mock_chrome.return_value.wait.side_effect = TimeoutException()
+        webdriver = self.create_webdriver('profile')
+        with webdriver:
+            self.assertFalse(webdriver.restore_session(
+                'https://test/statement', 'condition'))
+        self.assertFalse(webdriver.logged_in)
+
+    def test_no_profile(self, mock_chrome):
+        """Test that sessions are not re-used without a profile."""
+        webdriver = self.create_webdriver(None)
+        with webdriver:
+            self.assertFalse(webdriver.restore_session(
+                'https://test/statement', 'condition'))
+            webdriver.logged_in = True
+        mock_chrome.return_value.get.assert_not_called()
+        webdriver.logout_by_url.assert_called_once()
+
+    def test_background_logout(self, mock_chrome):
+        """Test that logout and quitting run in the cleanup executor."""
+        cleanup = CleanupExecutor()
+        release = threading.Event()
+        webdriver = self.create_webdriver(None)
+        webdriver.cleanup = cleanup
+        webdriver.logout_by_url = MagicMock()
+        webdriver.logout_by_url.__wrapped__ = MagicMock(
+            side_effect=lambda *_: release.wait(5))
+        with webdriver:
+            webdriver.logged_in = True
+        mock_chrome.return_value.quit.assert_not_called()
+        release.set()
+        self.assertEqual(cleanup.wait(), [])
+        webdriver.logout_by_url.__wrapped__.assert_called_once_with(
+            webdriver, None)
+        webdriver.logout_by_url.assert_not_called()
+        mock_chrome.return_value.quit.assert_called_once_with()
+
+    def test_logout_after_error(self, _):
+        """Test that the stored session is logged out after an error."""
+        webdriver = self.create_webdriver('profile')
+
+        def fail():
+            with webdriver:
+                webdriver.restore_session(
+                    'https://test/statement', 'condition')
+                raise ValueError('Test error')
+        self.assertRaises(ValueError, fail)
+        webdriver.logout_by_url.assert_called_once()
+
+
+@patch('easyp2p.p2p_webdriver.P2PChrome')
+class ParallelSignalsTests(unittest.TestCase):
+
+    """Test the signals of webdriver platforms which run in parallel."""
+
+    def test_finished_platform_keeps_other_signals(self, _):
+        """Test that a finished platform does not disconnect the others."""
+        callers = [Signals(), Signals()]
+        messages = [[], []]
+        webdrivers = []
+        for caller, caller_messages in zip(callers, messages):
+            caller.add_progress_text.connect(
+                lambda txt, _, msgs=caller_messages: msgs.append(txt))
+            webdriver = p2p_webdriver.P2PWebDriver(
+                'Test', True, None, logout_url='https://test/logout',
+                signals=caller)
+            webdriver.__enter__()
+            webdrivers.append(webdriver)
+        webdrivers[0].__exit__(None, None, None)
+
+        webdrivers[1].driver.current_url = 'https://test/login'
+        self.assertRaises(
+            PlatformFailedError, webdrivers[1].wait_for_captcha,
+            'https://test/login', ('id', 'error'), 'Invalid')
+        self.assertEqual(
+            messages, [[], ['Test: invalid username or password!']])
+        self.assertIsNot(webdrivers[0].signals, webdrivers[1].signals)
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+
+    """Return the statement only to requests with the session cookie."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer get requests."""
+        if self.headers.get('Cookie') == 'session=abc' \
+                and self.headers.get('User-Agent') == 'TestAgent':
+            self.send_response(200)
+            self.send_header('Content-Length', '9')
+            self.end_headers()
+            self.wfile.write(b'statement')
+        else:
+            self.send_error(403)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output clean."""
+
+
+class DownloadStatementByUrlTests(unittest.TestCase):
+
+    """Test downloading statements with the cookies of the browser."""
+
+    def setUp(self) -> None:
+        """Start a local HTTP server and create a fake browser."""
+        self.server = HTTPServer(('127.0.0.1', 0), CookieHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/statement'
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.statement = os.path.join(self.temp_dir.name, 'statement.xlsx')
+        self.webdriver = p2p_webdriver.P2PWebDriver(
+            'Test', True, None, logout_url='https://test/logout')
+        self.webdriver.driver = MagicMock()
+        self.webdriver.driver.execute_script.return_value = 'TestAgent'
+        self.webdriver.driver.current_url = 'http://127.0.0.1/page'
+
+    def tearDown(self) -> None:
+        """Stop the server and delete the download directory."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def set_cookie(self, value: str) -> None:
+        """Set the session cookie of the fake browser."""
+        self.webdriver.driver.get_cookies_for.return_value = [{
+            'name': 'session', 'value': value, 'domain': '127.0.0.1',
+            'path': '/', 'secure': False, 'expires': -1, 'session': True}]
+
+    def test_download(self):
+        """Test that the browser cookies are used for the download."""
+        self.set_cookie('abc')
+        self.webdriver.download_statement_by_url(self.statement, self.url)
+        with open(self.statement, 'rb') as file:
+            self.assertEqual(file.read(), b'statement')
+        self.webdriver.driver.get_cookies_for.assert_called_once_with(
+            self.url)
+
+    def test_download_fails(self):
+        """Test that the download fails without a valid cookie."""
+        self.set_cookie('expired')
+        self.assertRaises(
+            PlatformFailedError, self.webdriver.download_statement_by_url,
+            self.statement, self.url)
+        self.assertFalse(os.path.isfile(self.statement))
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=3)
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
 
     suite.addTests(loader.loadTestsFromTestCase(DownloadFinishedTests))
+    suite.addTests(loader.loadTestsFromTestCase(WaitForDownloadTests))
+    suite.addTests(loader.loadTestsFromTestCase(WaitTests))
+    suite.addTests(loader.loadTestsFromTestCase(BlockUrlsTests))
+    suite.addTests(loader.loadTestsFromTestCase(CalendarTests))
+    suite.addTests(loader.loadTestsFromTestCase(ScriptHelperTests))
+    suite.addTests(loader.loadTestsFromTestCase(PersistentProfileTests))
+    suite.addTests(
+        loader.loadTestsFromTestCase(DownloadStatementByUrlTests))
     result = runner.run(suite)
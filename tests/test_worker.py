@@ -3,7 +3,10 @@
 
 """Module containing all tests for p2p_worker."""
 
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+import multiprocessing
 import os
 import unittest
 from unittest.mock import patch
@@ -15,6 +18,8 @@ from easyp2p.p2p_signals import PlatformFailedError
 from easyp2p.p2p_worker import WorkerThread
 import easyp2p.platforms
 
+from tests import INPUT_PREFIX
+
 
 class WorkerTests(unittest.TestCase):
 
@@ -122,6 +127,60 @@ class WorkerTests(unittest.TestCase):
                 pd.DataFrame(
                     data=[1, 2, 3, 4, 5, 6], index=[0, 1, 2, 0, 1, 2])))
 
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_concurrent(self, mock_eval, mock_writer):
+        """Test that concurrent evaluation collects results of all platforms."""
+        mock_eval.side_effect = lambda name: pd.DataFrame([name])
+        mock_writer.return_value = True
+        self.worker.settings.concurrent = True
+        self.worker.settings.platforms = {'Bondora', 'Mintos', 'Twino'}
+        self.worker.run()
+        self.assertEqual(mock_eval.call_count, 3)
+        self.assertEqual(
+            sorted(self.worker.df_result[0].tolist()),
+            ['Bondora', 'Mintos', 'Twino'])
+        mock_writer.assert_called_once()
+
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_concurrent_platform_fails(self, mock_eval, mock_writer):
+        """Test that a failing platform does not stop concurrent evaluation."""
+        def evaluate(name):
+            if name == 'Mintos':
+                raise PlatformFailedError('Test error')
+            return pd.DataFrame([name])
+        mock_eval.side_effect = evaluate
+        mock_writer.return_value = True
+        self.worker.settings.concurrent = True
+        self.worker.settings.platforms = {'Bondora', 'Mintos'}
+        self.worker.run()
+        self.assertEqual(self.worker.df_result[0].tolist(), ['Bondora'])
+
+    @patch('easyp2p.p2p_worker.write_results')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform_async')
+    @patch('easyp2p.p2p_worker.WorkerThread.evaluate_platform')
+    def test_run_concurrent_async_sessions(
+            self, mock_eval, mock_eval_async, mock_writer):
+        """Test that session platforms are evaluated as coroutines."""
+        async def evaluate_async(name):
+            if name == 'Twino':
+                raise PlatformFailedError('Test error')
+            return pd.DataFrame([name])
+        mock_eval.side_effect = lambda name: pd.DataFrame([name])
+        mock_eval_async.side_effect = evaluate_async
+        mock_writer.return_value = True
+        self.worker.settings.concurrent = True
+        self.worker.settings.async_sessions = True
+        self.worker.settings.platforms = {'Bondora', 'Mintos', 'Twino'}
+        self.worker.run()
+        self.assertEqual(
+            sorted(call[0][0] for call in mock_eval_async.call_args_list),
+            ['Bondora', 'Twino'])
+        mock_eval.assert_called_once_with('Mintos')
+        self.assertEqual(
+            sorted(self.worker.df_result[0].tolist()), ['Bondora', 'Mintos'])
+
     @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.parse_statement')
     @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.download_statement')
     def test_parse_statements_parser_error(self, mock_download, mock_parse):
@@ -149,6 +208,74 @@ class WorkerTests(unittest.TestCase):
             "Bondora: unknown cash flow type will be ignored in result: "
             "('TestCF1', 'TestCF2')", True)
 
+    def test_parse_statement_in_process_pool(self):
+        """Test that parsing in a process pool gives the same results."""
+        platform = easyp2p.platforms.Iuvo(
+            (date(2018, 8, 1), date(2019, 1, 31)),
+            INPUT_PREFIX + 'iuvo_parser_missing_month')
+        (df_exp, unknown_exp) = platform.parse_statement()
+        with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn')) as pool:
+            self.worker.parse_pool = pool
+            (df, unknown_cf_types) = self.worker.parse_statement(platform)
+        self.assertTrue(df.equals(df_exp))
+        self.assertEqual(unknown_cf_types, unknown_exp)
+
+    def test_parse_statement_in_process_pool_error(self):
+        """Test that parser errors from the process pool keep their message."""
+        platform = easyp2p.platforms.Iuvo(
+            (date(2018, 8, 1), date(2019, 1, 31)),
+            INPUT_PREFIX + 'does_not_exist')
+        with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn')) as pool:
+            self.worker.parse_pool = pool
+            self.assertRaisesRegex(
+                PlatformFailedError, 'could not be found',
+                self.worker.parse_statement, platform)
+
+    @patch('easyp2p.p2p_worker.StatementCache')
+    @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.download_statement')
+    def test_evaluate_platform_all_months_cached(
+            self, mock_download, mock_cache):
+        """Test that nothing is downloaded if all months are cached."""
+        df_cached = pd.DataFrame([1, 2, 3])
+        mock_cache.return_value.missing_date_range.return_value = None
+        mock_cache.return_value.load.return_value = df_cached
+        self.settings.cache_statements = True
+        df = self.worker.evaluate_platform('Bondora')
+        self.assertTrue(df.equals(df_cached))
+        assert not mock_download.called
+
+    @patch('easyp2p.p2p_worker.StatementCache')
+    @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.parse_statement')
+    @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.download_statement')
+    def test_evaluate_platform_partially_cached(
+            self, mock_download, mock_parse, mock_cache):
+        """Test that only the missing months are downloaded."""
+        download_range = (date(2018, 12, 1), date(2018, 12, 31))
+        mock_cache.return_value.missing_date_range.return_value = \
+            download_range
+        mock_parse.return_value = (pd.DataFrame([4]), ())
+        self.settings.cache_statements = True
+        self.worker.evaluate_platform('Bondora')
+        mock_download.assert_called_once()
+        mock_cache.return_value.save.assert_called_once()
+        self.assertEqual(
+            mock_cache.return_value.save.call_args[0][1], download_range)
+
+    @patch('easyp2p.p2p_worker.p2p_platforms.Bondora.parse_statement')
+    @patch(
+        'easyp2p.p2p_worker.p2p_platforms.Bondora._session_download')
+    def test_evaluate_platform_async(self, mock_download, mock_parse):
+        """Test evaluate_platform_async with a session platform."""
+        mock_parse.return_value = (pd.DataFrame([1]), ())
+        df = asyncio.run(self.worker.evaluate_platform_async('Bondora'))
+        mock_download.assert_called_once()
+        mock_parse.assert_called_once()
+        self.assertTrue(df.equals(pd.DataFrame([1])))
+
     @patch('os.makedirs')
     def test_get_statement_location(self, mock_makedirs):
         """Test get_statement_location."""
@@ -172,6 +299,7 @@ class WorkerTests(unittest.TestCase):
             self.worker.df_result, self.settings.output_file,
             self.settings.date_range)
         mock_text.emit.assert_called_with('No results available!', True)
+        self.assertFalse(self.worker.results_written)
 
 
 if __name__ == "__main__":